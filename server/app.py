@@ -3,13 +3,106 @@ import json
 import os
 import importlib.util
 
-from processingMain import coreExecution, processNodesAndEdgesForJSVisual, obtainRandomValidInputForJS
+from caching.prefixCheckpointCache import PrefixCheckpointCache
+from caching.resultCache import ResultCache, resultKey
+from jobs.routingJobQueue import RoutingJobQueue, JobQueueFullError, CONST_jobDone
+from instrumentation.stageTimings import StageTimings
+from swapping.routingBudget import RoutingBudget
+from topology.topologyArtifactCache import TopologyArtifactCache
+from topology.topologyRegistry import TopologyRegistry, topologyHandle, updatedTopologyHandle
+from config import topologyCacheDirectory, topologyRegistryMaxBytes, resultCacheSize, jobWorkers, jobQueueSize, \
+    prefixCheckpointCacheSize, prefixCheckpointCacheMaxBytes, streamCachedMaxSwapSteps, batchUseProcesses
+from processingMain import (prepareTopology, updatePreparedTopology, routePreparedTopology, routePreparedTopologyBatch,
+                            budgetStoppedAt, iterRoutePreparedTopology, iterEntrySwapSteps, invalidSODDIMessage,
+                            processNodesAndEdgesForJSVisual, processPreparedTopologyForJSVisual,
+                            obtainRandomValidInputForJS)
 
-from flask import Flask, render_template, request, jsonify, url_for, send_from_directory
+from flask import (Flask, render_template, request, jsonify, url_for, send_from_directory, Response,
+                   stream_with_context)
 from flask_jsglue import JSGlue
 
 app = Flask(__name__)
 jsglue = JSGlue(app)
+# Shared by every request, so that each device is only validated and preprocessed once
+artifactCache = TopologyArtifactCache(topologyCacheDirectory)
+# Topologies registered by clients, which can then be referred to by their handle instead of sent in full
+topologyRegistry = TopologyRegistry(topologyRegistryMaxBytes)
+# Solutions of the last requests, for when the same one is submitted again
+resultCache = ResultCache(resultCacheSize)
+# Entries of the last SODDIs routed, so that editing the end of a SODDI only routes the entries after the unchanged part
+prefixCheckpoints = PrefixCheckpointCache(prefixCheckpointCacheSize, prefixCheckpointCacheMaxBytes)
+# Long routing runs submitted as jobs, routed in the background while the client polls for their progress
+jobQueue = RoutingJobQueue(jobWorkers, jobQueueSize)
+
+# How the stepping UI draws each swap step
+stepEdgeAttributes = {
+    "edge_colour_std": "#ffffff",
+    "edge_width_std": 10,
+    "edge_colour_done": "#1df505",
+    "edge_width_done": 10,
+}
+stepNodeAttributes = {
+    "node_colour_from_std": "#ffa600",
+    "node_colour_to_std": "#f5c07a",
+    "node_size_from_std": 30,
+    "node_size_to_std": 30,
+    "node_colour_from_done": "#43f707",
+    "node_colour_to_done": "#43f707"
+}
+
+
+def serverSentEvent(event, data):
+    """
+    One Server-Sent Event, with data as JSON
+    """
+    return "event: %s\ndata: %s\n\n" % (event, json.dumps(data))
+
+
+def eventStream(events):
+    return Response(stream_with_context(events), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def requestedTopology(jsondata):
+    """
+    (handle, inputG_swaps, inputG_interactions) of the topology in the request, which is either referred to by its
+    jsondata['topologyHandle'] (the edge lists being None then) or given in full in jsondata. Raises ValueError,
+    SyntaxError or KeyError if the topology cannot be parsed
+    """
+    if jsondata.get('topologyHandle') is not None:
+        return str(jsondata['topologyHandle']), None, None
+    inputG_swaps = ast.literal_eval(jsondata['gSwapsInputted'])
+    inputG_interactions = ast.literal_eval(jsondata['gInteractionsInputted'])
+    return topologyHandle(inputG_swaps, inputG_interactions), inputG_swaps, inputG_interactions
+
+
+def registeredTopology(handle, inputG_swaps=None, inputG_interactions=None):
+    """
+    PreparedTopology registered under handle. If it is not registered but its edge lists are given, it is prepared
+    and registered on the way. Otherwise (it has been evicted), None is returned
+    """
+    prepared = topologyRegistry.get(handle)
+    if prepared is None and inputG_swaps is not None:
+        prepared = prepareTopology(inputG_swaps, inputG_interactions, artifactCache=artifactCache)
+        topologyRegistry.register(handle, prepared)
+    return prepared
+
+
+def requestedBudget(jsondata, resumeFrom=None):
+    """
+    RoutingBudget asked for in the request, if any: jsondata['deadlineSeconds'] and jsondata['maxEntries'] limit
+    routing, which then stops with the part of the SODDI routed so far or, if jsondata['degrade'] is true, routes the
+    rest of it the cheap way. A request resuming a SODDI (see budgetStoppedAt) always gets a budget, resuming from
+    resumeFrom
+    """
+    seconds = jsondata.get('deadlineSeconds')
+    maxEntries = jsondata.get('maxEntries')
+    if seconds is None and maxEntries is None and resumeFrom is None:
+        return None
+    return RoutingBudget(float(seconds) if seconds is not None else None,
+                         int(maxEntries) if maxEntries is not None else None, bool(jsondata.get('degrade')),
+                         resumeFrom)
+
 
 @app.route('/', methods=["GET", "POST"])
 def indexPage():
@@ -19,44 +112,324 @@ def indexPage():
 def getFavicon():
     return send_from_directory(os.path.join(app.root_path, 'static'), 'favicon.ico')
 
+@app.route("/registerTopologyMethod", methods=["POST"])
+def registerTopologyMethod():
+    """
+    Validates and preprocesses a topology once, returning the handle with which the other methods can be asked to
+    use it instead of receiving it again
+    """
+    if request.method == "POST":
+        print("Registering a topology...")
+        jsondata = request.get_json()
+        try:
+            handle, inputG_swaps, inputG_interactions = requestedTopology(jsondata)
+            prepared = registeredTopology(handle, inputG_swaps, inputG_interactions)
+        except:
+            print("Invalid input received from client")
+            return {"ERROR": "INVALID INPUT"}
+        if prepared is None:
+            return {"ERROR": "UNKNOWN TOPOLOGY HANDLE"}
+        return {"topologyHandle": handle, "ids": prepared.ids}
+    return {"ERROR": "INVALID METHOD"}
+
+@app.route("/updateTopologyMethod", methods=["POST"])
+def updateTopologyMethod():
+    """
+    Registers the topology of jsondata['topologyHandle'] with the edges in jsondata['removeSwapEdges'] and
+    jsondata['removeInteractionEdges'] removed and those in jsondata['addSwapEdges'] and
+    jsondata['addInteractionEdges'] added (each one a list of pairs of node names, all of them optional), updating its
+    precomputed tables instead of preprocessing it all over again. Returns the handle of the new topology, which is not
+    the one registering the same edges would give, since its nodes keep their positions (see updatedTopologyHandle)
+    """
+    if request.method == "POST":
+        print("Updating a topology...")
+        jsondata = request.get_json()
+        try:
+            prepared = registeredTopology(str(jsondata['topologyHandle']))
+            edits = [ast.literal_eval(jsondata.get(field) or "[]")
+                     for field in ('addSwapEdges', 'removeSwapEdges', 'addInteractionEdges', 'removeInteractionEdges')]
+        except:
+            print("Invalid input received from client")
+            return {"ERROR": "INVALID INPUT"}
+        if prepared is None:
+            return {"ERROR": "UNKNOWN TOPOLOGY HANDLE"}
+        try:
+            updated = updatePreparedTopology(prepared, *edits)
+        except Exception as error:
+            return {"ERROR": str(error)}
+        handle = updatedTopologyHandle(updated.inputG_swaps, updated.inputG_interactions, updated.positions)
+        # A topology that is already registered is kept as it is, along with everything cached for it
+        if topologyRegistry.get(handle) is None:
+            topologyRegistry.register(handle, updated)
+        return {"topologyHandle": handle, "ids": updated.ids}
+    return {"ERROR": "INVALID METHOD"}
+
 @app.route("/coreExecutionMethod", methods=["GET", "POST"])
 def coreExecutionMethod():
     if request.method == "POST":
         print("Determining the number of swaps required...")
         jsondata = request.get_json()
         print(jsondata)
+        # The topology can be sent in full or, if it has been registered, referred to by its handle
         try:
-            inputG_swaps = ast.literal_eval(jsondata['gSwapsInputted'])
-            inputG_interactions = ast.literal_eval(jsondata['gInteractionsInputted'])
             soddi = ast.literal_eval(jsondata['SODDIInputted'])
+            handle, inputG_swaps, inputG_interactions = requestedTopology(jsondata)
+            key = resultKey(handle, soddi)
+            budget = requestedBudget(jsondata)
+            # Index from which to resume a SODDI whose routing was stopped by a budget (its budget.resumeIndex)
+            resumeIndex = jsondata.get('resumeIndex')
         except:
             print("Invalid input received from client")
             return {"ERROR": "INVALID INPUT"}
 
-        totalSwaps, swapSteps, ids = coreExecution(inputG_swaps, inputG_interactions, soddi)
+        # Timings are only measured if the client asks for them
+        timings = StageTimings() if jsondata.get('timings') else None
+        # Resubmitted requests are answered straight away, unless they are to be timed or only their rest is wanted
+        result = resultCache.get(key) if timings is None and resumeIndex is None else None
+        if result is None:
+            try:
+                prepared = registeredTopology(handle, inputG_swaps, inputG_interactions)
+            except:
+                print("Invalid input received from client")
+                return {"ERROR": "INVALID INPUT"}
+            if prepared is None:
+                return {"ERROR": "UNKNOWN TOPOLOGY HANDLE"}
+            if resumeIndex is not None:
+                try:
+                    # The budget is only made now, so that rebuilding where routing stopped does not count against it
+                    budget = requestedBudget(jsondata, budgetStoppedAt(prepared, soddi, resumeIndex,
+                                                                       prefixCheckpoints, timings))
+                except Exception as error:
+                    return {"ERROR": str(error)}
+            # Route plans are kept by artifactCache, shared with every request on the same device
+            result = routePreparedTopology(prepared, soddi, timings, budget=budget, checkpoints=prefixCheckpoints)
+            if budget is None or budget.routedInFull():
+                resultCache.put(key, result)
+        totalSwaps, swapSteps, ids = result
         solution = {
+            "topologyHandle": handle,
             "totalSwaps": totalSwaps,
             "swapSteps": swapSteps,
             "ids": ids,
-            "edge_attributes": {
-                "edge_colour_std": "#ffffff",
-                "edge_width_std": 10,
-                "edge_colour_done": "#1df505",
-                "edge_width_done": 10,
-            },
-            "node_attributes": {
-                "node_colour_from_std": "#ffa600",
-                "node_colour_to_std": "#f5c07a",
-                "node_size_from_std": 30,
-                "node_size_to_std": 30,
-                "node_colour_from_done": "#43f707",
-                "node_colour_to_done": "#43f707"
-            }
+            "edge_attributes": stepEdgeAttributes,
+            "node_attributes": stepNodeAttributes
         }
+        if budget is not None:
+            # A solution from the resultCache is always complete, whatever the budget. Otherwise, its swap steps are
+            # those of the entries from budget.startIndex() on
+            solution["budget"] = budget.report()
+        if timings is not None:
+            solution["timings"] = timings.report()
+            solution["topologyArtifactCache"] = artifactCache.stats()
+            solution["topologyRegistry"] = topologyRegistry.stats()
+            solution["resultCache"] = resultCache.stats()
+            solution["prefixCheckpoints"] = prefixCheckpoints.stats()
         jsonSolution = json.dumps(solution)
         print(jsonSolution)
         return jsonSolution
 
+@app.route("/coreExecutionStreamMethod", methods=["GET", "POST"])
+def coreExecutionStreamMethod():
+    """
+    Same as coreExecutionMethod, but the solution is streamed as Server-Sent Events while the SODDI is routed: first a
+    "topology" event (handle, ids and step attributes), then one "entry" event per entry of the SODDI (its index and
+    swap steps) as soon as it is decided and finally a "solution" event with the total number of swaps. Anything
+    wrong is sent as an "error" event. The input comes as JSON in a POST or, for EventSource, as the query string of a
+    GET (usually with the handle of a registered topology). Like coreExecutionMethod, it shares the resultCache: the
+    entries of a solution found before are sent at once, and a SODDI streamed in full has its solution put in it,
+    unless it has more than streamCachedMaxSwapSteps swap steps (see config.py), so that streaming never keeps more
+    than that in memory. It shares the prefixCheckpoints too: the entries of the longest prefix routed before are
+    sent first, without being routed again
+    """
+    print("Streaming the swaps required...")
+    jsondata = request.get_json() if request.method == "POST" else request.args
+    try:
+        soddi = ast.literal_eval(jsondata['SODDIInputted'])
+        handle, inputG_swaps, inputG_interactions = requestedTopology(jsondata)
+        key = resultKey(handle, soddi)
+        result = resultCache.get(key)
+        prepared = registeredTopology(handle, inputG_swaps, inputG_interactions) if result is None else None
+    except:
+        print("Invalid input received from client")
+        return eventStream(iter([serverSentEvent("error", {"ERROR": "INVALID INPUT"})]))
+    if result is not None:
+        totalSwaps, swapSteps, ids = result
+
+        def cachedEvents():
+            yield serverSentEvent("topology", {"topologyHandle": handle, "ids": ids,
+                                               "edge_attributes": stepEdgeAttributes,
+                                               "node_attributes": stepNodeAttributes})
+            for index, entrySwapSteps in enumerate(iterEntrySwapSteps(swapSteps)):
+                yield serverSentEvent("entry", {"index": index, "swapSteps": entrySwapSteps})
+            yield serverSentEvent("solution", {"totalSwaps": totalSwaps})
+
+        return eventStream(cachedEvents())
+    if prepared is None:
+        return eventStream(iter([serverSentEvent("error", {"ERROR": "UNKNOWN TOPOLOGY HANDLE"})]))
+    try:
+        message = invalidSODDIMessage(prepared, soddi)
+        if message is not None:
+            raise ValueError(message)
+        entries = iterRoutePreparedTopology(prepared, soddi, checkpoints=prefixCheckpoints)
+    except Exception as error:
+        return eventStream(iter([serverSentEvent("error", {"ERROR": str(error)})]))
+
+    def events():
+        yield serverSentEvent("topology", {"topologyHandle": handle, "ids": prepared.ids,
+                                           "edge_attributes": stepEdgeAttributes,
+                                           "node_attributes": stepNodeAttributes})
+        totalSwaps = 0
+        # Only kept for the resultCache while the solution stays small enough for it
+        allSwapSteps = []
+        try:
+            for index, swapSteps in enumerate(entries):
+                totalSwaps += len([x for x in swapSteps if type(x) is tuple])
+                if allSwapSteps is not None:
+                    allSwapSteps += swapSteps
+                    if len(allSwapSteps) > streamCachedMaxSwapSteps:
+                        allSwapSteps = None
+                yield serverSentEvent("entry", {"index": index, "swapSteps": swapSteps})
+        except Exception as error:
+            yield serverSentEvent("error", {"ERROR": str(error)})
+            return
+        print("Total number of swaps required: " + str(totalSwaps))
+        if allSwapSteps is not None:
+            resultCache.put(key, (totalSwaps, allSwapSteps, prepared.ids))
+        yield serverSentEvent("solution", {"totalSwaps": totalSwaps})
+
+    return eventStream(events())
+
+@app.route("/batchExecutionMethod", methods=["POST"])
+def batchExecutionMethod():
+    """
+    Routes a list of SODDIs (jsondata['SODDIsInputted'], one string per SODDI) on the same topology, which is only
+    validated and preprocessed once. Results come back in the same order, each SODDI failing on its own. Whether they
+    are routed in threads or processes is set by batchUseProcesses in config.py
+    """
+    if request.method == "POST":
+        print("Determining the number of swaps required for a batch...")
+        jsondata = request.get_json()
+        try:
+            handle, inputG_swaps, inputG_interactions = requestedTopology(jsondata)
+            prepared = registeredTopology(handle, inputG_swaps, inputG_interactions)
+            soddiStrings = list(jsondata['SODDIsInputted'])
+        except:
+            print("Invalid input received from client")
+            return {"ERROR": "INVALID INPUT"}
+        if prepared is None:
+            return {"ERROR": "UNKNOWN TOPOLOGY HANDLE"}
+
+        results = [None] * len(soddiStrings)
+        toRoute = {}
+        for i, soddiString in enumerate(soddiStrings):
+            try:
+                soddi = ast.literal_eval(soddiString)
+                key = resultKey(handle, soddi)
+            except:
+                results[i] = {"ERROR": "INVALID INPUT"}
+                continue
+            solution = resultCache.get(key)
+            if solution is None:
+                toRoute[i] = (key, soddi)
+            else:
+                results[i] = solution
+        routed = routePreparedTopologyBatch(prepared, [soddi for key, soddi in toRoute.values()],
+                                            useProcesses=batchUseProcesses)
+        for (i, (key, soddi)), solution in zip(toRoute.items(), routed):
+            if isinstance(solution, Exception):
+                results[i] = {"ERROR": str(solution)}
+            else:
+                resultCache.put(key, solution)
+                results[i] = solution
+
+        batch = {
+            "topologyHandle": handle,
+            "ids": prepared.ids,
+            "results": [result if type(result) is dict else {"totalSwaps": result[0], "swapSteps": result[1]}
+                        for result in results]
+        }
+        return json.dumps(batch)
+    return {"ERROR": "INVALID METHOD"}
+
+@app.route("/submitJobMethod", methods=["POST"])
+def submitJobMethod():
+    """
+    Same input as coreExecutionMethod, but the SODDI is routed in the background: the SODDI is checked straight away
+    and the ID of the job is returned, with which its progress (jobStatusMethod) and solution (jobResultMethod) can be
+    asked for, or it can be cancelled (cancelJobMethod). The entries of the longest prefix of the SODDI routed before
+    (see prefixCheckpoints) are not routed again
+    """
+    if request.method == "POST":
+        print("Submitting a routing job...")
+        jsondata = request.get_json()
+        try:
+            soddi = ast.literal_eval(jsondata['SODDIInputted'])
+            handle, inputG_swaps, inputG_interactions = requestedTopology(jsondata)
+            prepared = registeredTopology(handle, inputG_swaps, inputG_interactions)
+        except:
+            print("Invalid input received from client")
+            return {"ERROR": "INVALID INPUT"}
+        if prepared is None:
+            return {"ERROR": "UNKNOWN TOPOLOGY HANDLE"}
+        try:
+            message = invalidSODDIMessage(prepared, soddi)
+            if message is not None:
+                raise ValueError(message)
+            entries = iterRoutePreparedTopology(prepared, soddi, checkpoints=prefixCheckpoints)
+        except Exception as error:
+            return {"ERROR": str(error)}
+        try:
+            job = jobQueue.submit(entries, len(soddi), prepared.ids)
+        except JobQueueFullError as error:
+            return {"ERROR": str(error)}, 503
+        return {"jobID": job.jobID, "topologyHandle": handle, "totalEntries": len(soddi)}
+    return {"ERROR": "INVALID METHOD"}
+
+def requestedJob():
+    """
+    Job whose ID is in the request, as JSON in a POST or as the query string of a GET, or None if there is none
+    """
+    jsondata = request.get_json(silent=True) if request.method == "POST" else request.args
+    if not jsondata or jsondata.get('jobID') is None:
+        return None
+    return jobQueue.job(str(jsondata['jobID']))
+
+@app.route("/jobStatusMethod", methods=["GET", "POST"])
+def jobStatusMethod():
+    """
+    Status of a job (queued, running, done, failed or cancelled) and how many entries of its SODDI have been routed
+    """
+    job = requestedJob()
+    if job is None:
+        return {"ERROR": "UNKNOWN JOB"}
+    return job.progress()
+
+@app.route("/jobResultMethod", methods=["GET", "POST"])
+def jobResultMethod():
+    """
+    Solution of a job, in the same format as coreExecutionMethod, once it is done
+    """
+    job = requestedJob()
+    if job is None:
+        return {"ERROR": "UNKNOWN JOB"}
+    if job.status != CONST_jobDone:
+        return {"ERROR": "JOB NOT DONE", "status": job.status}
+    totalSwaps, swapSteps, ids = job.result()
+    return json.dumps({
+        "totalSwaps": totalSwaps,
+        "swapSteps": swapSteps,
+        "ids": ids,
+        "edge_attributes": stepEdgeAttributes,
+        "node_attributes": stepNodeAttributes
+    })
+
+@app.route("/cancelJobMethod", methods=["POST"])
+def cancelJobMethod():
+    job = requestedJob()
+    if job is None:
+        return {"ERROR": "UNKNOWN JOB"}
+    return {"jobID": job.jobID, "cancelled": jobQueue.cancel(job.jobID)}
+
 @app.route("/obtainRandomValidInputMethod", methods=["POST"])
 def obtainRandomValidInputMethod():
     if request.method == "POST":
@@ -85,13 +458,19 @@ def processNodesAndEdgesForJSVisualMethod():
         jsondata = request.get_json()
         print(jsondata)
         try:
-            inputG_swaps = ast.literal_eval(jsondata['gSwapsInputted'])
-            inputG_interactions = ast.literal_eval(jsondata['gInteractionsInputted'])
             soddi = ast.literal_eval(jsondata['SODDIInputted'])
+            if jsondata.get('topologyHandle') is None:
+                # Not registered, since topologies are shown before they are validated
+                inputG_swaps = ast.literal_eval(jsondata['gSwapsInputted'])
+                inputG_interactions = ast.literal_eval(jsondata['gInteractionsInputted'])
+                return processNodesAndEdgesForJSVisual(inputG_swaps, inputG_interactions, soddi)
         except SyntaxError:
             return "INVALID INPUT"
+        prepared = registeredTopology(str(jsondata['topologyHandle']))
+        if prepared is None:
+            return "UNKNOWN TOPOLOGY HANDLE"
 
-        return processNodesAndEdgesForJSVisual(inputG_swaps, inputG_interactions, soddi)
+        return processPreparedTopologyForJSVisual(prepared, soddi)
     return "INVALID METHOD"
 
 
@@ -0,0 +1,144 @@
+import getopt
+import sys
+
+from benchmarks.benchmarkSuite import readResults, resultsWorkloads, runSuite, writeResults
+
+CONST_defaultTimeTolerance = 0.25  # Relative slowdown allowed before failing
+CONST_defaultMemoryTolerance = 0.10  # Relative increase of the peak memory allowed before failing
+# Differences below these are noise whatever the tolerance, since tiny workloads take a few milliseconds. Workloads of
+# a baseline must take long enough for timeTolerance of their time to be over the floor, or slowdowns go unnoticed
+CONST_timeNoiseFloorSeconds = 0.005
+CONST_memoryNoiseFloorBytes = 64 * 1024
+
+CONST_usageMSG = ("python -m benchmarks.baselineComparison -b <baseline.json> [-o <results.json>] "
+                  "[--time-tolerance <0.25>] [--memory-tolerance <0.10>] [-n <repeats>] [--update]")
+
+
+def workloadName(result):
+    return "%s/%d nodes/%d entries/seed %d/%s" % (result["family"], result["numNodes"], result["soddiLength"],
+                                                  result["seed"], result.get("entryPoint", "coreExecution"))
+
+
+def compareResults(baseline, current, timeTolerance=CONST_defaultTimeTolerance,
+                   memoryTolerance=CONST_defaultMemoryTolerance):
+    """
+    Compares the results of running again the workloads of the baseline with the baseline itself. Returns the list of
+    failures, as readable lines (empty if there is none):
+        1) The number of swaps of a workload has changed (in any direction, since it means the routing has changed)
+        2) A workload is slower than the baseline by more than timeTolerance (relative)
+        3) The peak memory of a workload is higher than the baseline by more than memoryTolerance (relative)
+        4) A workload of the baseline has not been run
+    """
+    failures = []
+    currentResults = {workloadName(result): result for result in current["results"]}
+    for baselineResult in baseline["results"]:
+        name = workloadName(baselineResult)
+        result = currentResults.get(name)
+        if result is None:
+            failures.append("%s: missing from the current results" % name)
+            continue
+
+        if result["totalSwaps"] != baselineResult["totalSwaps"]:
+            failures.append("%s: swaps changed %d -> %d" % (name, baselineResult["totalSwaps"], result["totalSwaps"]))
+
+        if result["seconds"] > baselineResult["seconds"] * (1 + timeTolerance) and \
+                result["seconds"] - baselineResult["seconds"] > CONST_timeNoiseFloorSeconds:
+            failures.append("%s: wall time regressed %.4f s -> %.4f s (%+.1f%%, tolerance %.1f%%)" %
+                            (name, baselineResult["seconds"], result["seconds"],
+                             relativeChange(baselineResult["seconds"], result["seconds"]), timeTolerance * 100))
+
+        baselineMemory, memory = baselineResult.get("peakMemoryBytes"), result.get("peakMemoryBytes")
+        if baselineMemory is not None and memory is not None and memory > baselineMemory * (1 + memoryTolerance) \
+                and memory - baselineMemory > CONST_memoryNoiseFloorBytes:
+            failures.append("%s: peak memory regressed %d B -> %d B (%+.1f%%, tolerance %.1f%%)" %
+                            (name, baselineMemory, memory, relativeChange(baselineMemory, memory),
+                             memoryTolerance * 100))
+    return failures
+
+
+def relativeChange(before, after):
+    """
+    Change from before to after as a percentage of before
+    """
+    if before == 0:
+        return 0.0 if after == 0 else float('inf')
+    return (after - before) / before * 100
+
+
+def formattedComparison(baseline, current):
+    """
+    Human readable table with the baseline and current time, memory and swaps of every workload
+    """
+    currentResults = {workloadName(result): result for result in current["results"]}
+    lines = ["%-58s %10s %10s %8s %10s %10s" % ("Workload", "Base s", "Now s", "Time", "Base swaps", "Now swaps")]
+    for baselineResult in baseline["results"]:
+        name = workloadName(baselineResult)
+        result = currentResults.get(name)
+        if result is None:
+            continue
+        lines.append("%-58s %10.4f %10.4f %+7.1f%% %10d %10d" %
+                     (name, baselineResult["seconds"], result["seconds"],
+                      relativeChange(baselineResult["seconds"], result["seconds"]), baselineResult["totalSwaps"],
+                      result["totalSwaps"]))
+    return "\n".join(lines)
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "hb:o:n:", ["baseline=", "ofile=", "time-tolerance=", "memory-tolerance=",
+                                                     "repeats=", "update"])
+    except getopt.GetoptError:
+        print(CONST_usageMSG)
+        sys.exit(2)
+
+    baselineFileName = None
+    outputFileName = None
+    timeTolerance = CONST_defaultTimeTolerance
+    memoryTolerance = CONST_defaultMemoryTolerance
+    repeats = 3
+    update = False
+    for opt, arg in opts:
+        if opt == "-h":
+            print(CONST_usageMSG)
+            sys.exit()
+        elif opt in ("-b", "--baseline"):
+            baselineFileName = arg
+        elif opt in ("-o", "--ofile"):
+            outputFileName = arg
+        elif opt == "--time-tolerance":
+            timeTolerance = float(arg)
+        elif opt == "--memory-tolerance":
+            memoryTolerance = float(arg)
+        elif opt in ("-n", "--repeats"):
+            repeats = int(arg)
+        elif opt == "--update":
+            update = True
+
+    if baselineFileName is None:
+        print(CONST_usageMSG)
+        sys.exit(-1)
+
+    baseline = readResults(baselineFileName)
+    measureMemory = any(result.get("peakMemoryBytes") is not None for result in baseline["results"])
+    current = runSuite(resultsWorkloads(baseline), measureMemory, repeats=repeats)
+    if outputFileName is not None:
+        writeResults(current, outputFileName)
+
+    print(formattedComparison(baseline, current))
+    if update:
+        # Accept the current results (for example, after an intended change in the routing) as the new baseline
+        writeResults(current, baselineFileName)
+        print("Baseline updated: " + baselineFileName)
+        return
+
+    failures = compareResults(baseline, current, timeTolerance, memoryTolerance)
+    if failures:
+        print("\nRegressions against %s:" % baselineFileName)
+        for failure in failures:
+            print("  " + failure)
+        sys.exit(1)
+    print("\nNo regressions against " + baselineFileName)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,182 @@
+import contextlib
+import gc
+import getopt
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+from benchmarks.topologyGenerators import CONST_generators, generateInput
+from processingMain import coreExecution
+from swapping.swapFunctions import swapsRequired
+
+# Workload sizes of each suite: every topology family is run with every number of nodes and every SODDI length
+CONST_suites = {
+    # Big enough that a slowdown within the tolerance of baselineComparison is well over its noise floor
+    "smoke": {"numNodes": (100, 300), "soddiLengths": (500, 1000)},
+    "default": {"numNodes": (30, 300, 1000), "soddiLengths": (10, 1000, 10000)},
+    "full": {"numNodes": (30, 300, 1000, 3000), "soddiLengths": (10, 1000, 10000, 100000)},
+}
+CONST_defaultSeed = 8
+# Functions the workloads can be run through: the whole pipeline (input checks included) or just the router
+CONST_coreExecution = "coreExecution"
+CONST_swapsRequired = "swapsRequired"
+CONST_entryPoints = (CONST_coreExecution, CONST_swapsRequired)
+CONST_resultsFormatVersion = 1
+CONST_usageMSG = ("python -m benchmarks.benchmarkSuite -o <results.json> [-s smoke|default|full] "
+                  "[-f <family,family,...>] [-e coreExecution|swapsRequired] [-n <repeats>] [--no-memory]")
+
+
+def suiteWorkloads(suite="default", families=None, seed=CONST_defaultSeed, entryPoint=CONST_coreExecution):
+    """
+    List of workloads (dictionaries with family, numNodes, soddiLength, seed and entryPoint) of the given suite
+    """
+    sizes = CONST_suites[suite]
+    return [{"family": family, "numNodes": numNodes, "soddiLength": soddiLength, "seed": seed,
+             "entryPoint": entryPoint}
+            for family in (families or list(CONST_generators))
+            for numNodes in sizes["numNodes"]
+            for soddiLength in sizes["soddiLengths"]]
+
+
+def runWorkload(workload, measureMemory=True, repeats=1):
+    """
+    Runs coreExecution (or swapsRequired, depending on the entryPoint of the workload) on the input generated for the
+    workload, recording its wall time (the best of the repeats), its peak memory (traced in another run, since
+    tracemalloc slows everything down) and the total number of swaps
+    """
+    numNodes = workload["numNodes"]
+    generatedInput = generateInput(workload["family"], numNodes, workload["soddiLength"], workload["seed"])
+    entryPoint = workload.get("entryPoint", CONST_coreExecution)
+
+    def execute():
+        if entryPoint == CONST_swapsRequired:
+            G_swaps = nx.Graph()
+            G_swaps.add_nodes_from(range(numNodes))
+            G_swaps.add_edges_from(generatedInput["gSwaps"])
+            G_interactions = nx.DiGraph()
+            G_interactions.add_nodes_from(range(numNodes))
+            G_interactions.add_edges_from(generatedInput["gInteractions"])
+            newG_swaps, newG_interactions, allSwapSteps = swapsRequired(G_swaps, G_interactions,
+                                                                        generatedInput["soddi"])
+            return len([x for x in allSwapSteps if type(x) is tuple])
+        # coreExecution prints every swap step, which would take longer than the routing itself
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            totalSwaps, allSwapSteps, ids = coreExecution(generatedInput["gSwaps"], generatedInput["gInteractions"],
+                                                          generatedInput["soddi"])
+        return totalSwaps
+
+    seconds = float('inf')
+    totalSwaps = None
+    for i in range(max(repeats, 1)):
+        # As timeit does, the garbage collector is kept from kicking in at random points of the measurement
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            totalSwaps = execute()
+            seconds = min(seconds, time.perf_counter() - start)
+        finally:
+            gc.enable()
+
+    peakMemoryBytes = None
+    if measureMemory:
+        tracemalloc.start()
+        try:
+            execute()
+            peakMemoryBytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    result = dict(workload, entryPoint=entryPoint)
+    result.update({"swapEdges": len(generatedInput["gSwaps"]), "interactionEdges": len(generatedInput["gInteractions"]),
+                   "seconds": seconds, "peakMemoryBytes": peakMemoryBytes, "totalSwaps": totalSwaps})
+    return result
+
+
+def runSuite(workloads, measureMemory=True, progress=False, repeats=1):
+    """
+    Runs every workload and returns the results together with a description of the machine they were obtained on
+    """
+    results = []
+    for workload in workloads:
+        result = runWorkload(workload, measureMemory, repeats)
+        if progress:
+            print("%-18s %6d nodes %7d entries %10.3f s %8d swaps" % (result["family"], result["numNodes"],
+                                                                     result["soddiLength"], result["seconds"],
+                                                                     result["totalSwaps"]))
+        results.append(result)
+    return {"formatVersion": CONST_resultsFormatVersion,
+            "machine": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+                        "processor": platform.processor()},
+            "results": results}
+
+
+def writeResults(results, fileName):
+    with open(fileName, "w") as resultsFile:
+        json.dump(results, resultsFile, indent=2)
+
+
+def readResults(fileName):
+    with open(fileName, "r") as resultsFile:
+        return json.load(resultsFile)
+
+
+def resultsWorkloads(results):
+    """
+    Workloads that gave the results, so that exactly the same seeded inputs can be run again
+    """
+    return [{"family": result["family"], "numNodes": result["numNodes"], "soddiLength": result["soddiLength"],
+             "seed": result["seed"], "entryPoint": result.get("entryPoint", CONST_coreExecution)}
+            for result in results["results"]]
+
+
+def main(argv):
+    try:
+        opts, args = getopt.getopt(argv, "ho:s:f:e:n:", ["ofile=", "suite=", "families=", "entry=", "repeats=",
+                                                          "no-memory"])
+    except getopt.GetoptError:
+        print(CONST_usageMSG)
+        sys.exit(2)
+
+    outputFileName = None
+    suite = "default"
+    families = None
+    entryPoint = CONST_coreExecution
+    repeats = 1
+    measureMemory = True
+    for opt, arg in opts:
+        if opt == "-h":
+            print(CONST_usageMSG)
+            sys.exit()
+        elif opt in ("-o", "--ofile"):
+            outputFileName = arg
+        elif opt in ("-s", "--suite"):
+            suite = arg
+        elif opt in ("-f", "--families"):
+            families = arg.split(",")
+        elif opt in ("-e", "--entry"):
+            entryPoint = arg
+        elif opt in ("-n", "--repeats"):
+            repeats = int(arg)
+        elif opt == "--no-memory":
+            measureMemory = False
+
+    if outputFileName is None or suite not in CONST_suites or entryPoint not in CONST_entryPoints or \
+            (families is not None and not set(families).issubset(CONST_generators)):
+        print(CONST_usageMSG)
+        sys.exit(-1)
+
+    results = runSuite(suiteWorkloads(suite, families, entryPoint=entryPoint), measureMemory, progress=True,
+                       repeats=repeats)
+    writeResults(results, outputFileName)
+    print("Results written to: " + outputFileName)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
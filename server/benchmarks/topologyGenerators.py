@@ -0,0 +1,125 @@
+import math
+import random
+
+import networkx as nx
+
+# Families of device topologies the benchmarks are run on
+CONST_line = "line"
+CONST_ring = "ring"
+CONST_grid = "grid"
+CONST_heavyHex = "heavyHex"
+CONST_erdosRenyiPlanar = "erdosRenyiPlanar"
+
+CONST_unknownTopologyMSG = "Unknown topology family. Choose one of: line, ring, grid, heavyHex, erdosRenyiPlanar"
+CONST_tooFewNodesMSG = "A topology needs at least 3 nodes"
+
+
+def lineInput(numNodes, soddiLength, interactionEdgeCreationChance=0.5, seed=None):
+    """
+    Qubits on a line: 0 - 1 - 2 - ... - (numNodes-1)
+    """
+    rng = random.Random(seed)
+    return _validInput(rng, numNodes, list(nx.path_graph(numNodes).edges), soddiLength, interactionEdgeCreationChance)
+
+
+def ringInput(numNodes, soddiLength, interactionEdgeCreationChance=0.5, seed=None):
+    """
+    Qubits on a ring: like the line, with an edge from the last qubit back to the first one
+    """
+    rng = random.Random(seed)
+    return _validInput(rng, numNodes, list(nx.cycle_graph(numNodes).edges), soddiLength, interactionEdgeCreationChance)
+
+
+def gridInput(numNodes, soddiLength, interactionEdgeCreationChance=0.5, seed=None):
+    """
+    Qubits on a 2D square grid as close to a square as possible. The last row is only partially filled if numNodes is
+    not a multiple of the number of columns
+    """
+    rng = random.Random(seed)
+    columns = math.ceil(math.sqrt(numNodes))
+    rows = math.ceil(numNodes / columns)
+    G_swaps = nx.grid_2d_graph(rows, columns)
+    # Row-major order, so that the first numNodes nodes are always connected
+    G_swaps = nx.convert_node_labels_to_integers(G_swaps, ordering="sorted")
+    return _validInput(rng, numNodes, list(G_swaps.subgraph(range(numNodes)).edges), soddiLength,
+                       interactionEdgeCreationChance)
+
+
+def heavyHexInput(numNodes, soddiLength, interactionEdgeCreationChance=0.5, seed=None):
+    """
+    Qubits on a heavy-hex lattice: a hexagonal lattice with an extra qubit on each of its edges, so that no qubit has
+    more than 3 neighbours. The first numNodes qubits in breadth-first order from a corner are kept
+    """
+    rng = random.Random(seed)
+    size = 1
+    G_swaps = None
+    while G_swaps is None or G_swaps.number_of_nodes() < numNodes:
+        hexagonal = nx.hexagonal_lattice_graph(size, size)
+        G_swaps = nx.Graph()
+        for u, v in hexagonal.edges:
+            G_swaps.add_edge(u, (u, v))  # The extra qubit sits in between u and v
+            G_swaps.add_edge((u, v), v)
+        size += 1
+    corner = min(G_swaps.nodes, key=lambda node: (isinstance(node[0], tuple), node))
+    order = [corner] + [v for u, v in nx.bfs_edges(G_swaps, corner)]
+    ids = {node: i for i, node in enumerate(order[:numNodes])}
+    swapEdges = [(ids[u], ids[v]) for u, v in G_swaps.subgraph(ids.keys()).edges]
+    return _validInput(rng, numNodes, swapEdges, soddiLength, interactionEdgeCreationChance)
+
+
+def erdosRenyiPlanarInput(numNodes, soddiLength, interactionEdgeCreationChance=0.5, seed=None, averageDegree=1.0):
+    """
+    Same kind of graph as obtainRandomValidInputForJS, but able to reach thousands of qubits: sparse Erdos-Renyi graphs
+    are drawn until one is planar (dense ones practically never are) and then its components are joined together by
+    single edges, which keeps it planar and makes it connected
+    """
+    rng = random.Random(seed)
+    planar = False
+    G_swaps = None
+    while not planar:
+        G_swaps = nx.fast_gnp_random_graph(numNodes, averageDegree / numNodes, seed=rng.randrange(2 ** 32))
+        planar = nx.check_planarity(G_swaps)[0]
+
+    components = [sorted(component) for component in nx.connected_components(G_swaps)]
+    rng.shuffle(components)
+    for previousComponent, component in zip(components, components[1:]):
+        G_swaps.add_edge(rng.choice(previousComponent), rng.choice(component))
+
+    return _validInput(rng, numNodes, list(G_swaps.edges), soddiLength, interactionEdgeCreationChance)
+
+
+CONST_generators = {CONST_line: lineInput, CONST_ring: ringInput, CONST_grid: gridInput, CONST_heavyHex: heavyHexInput,
+                    CONST_erdosRenyiPlanar: erdosRenyiPlanarInput}
+
+
+def generateInput(family, numNodes, soddiLength, seed=None):
+    """
+    Input of coreExecution for the given topology family, as a dictionary with the fields "gSwaps", "gInteractions"
+    and "soddi". The same seed always gives the same input
+    """
+    if family not in CONST_generators:
+        raise ValueError(CONST_unknownTopologyMSG)
+    if numNodes < 3:
+        raise ValueError(CONST_tooFewNodesMSG)
+    return CONST_generators[family](numNodes, soddiLength, seed=seed)
+
+
+def _validInput(rng, numNodes, swapEdges, soddiLength, interactionEdgeCreationChance):
+    """
+    Completes the swap edges with interaction edges and a SODDI. As on real devices, qubits can only interact with
+    their neighbours, and each swap edge has an interaction edge in a random direction with the given chance (there is
+    always at least one)
+    """
+    gInteractions = [(u, v) if rng.random() < 0.5 else (v, u) for u, v in swapEdges
+                     if rng.random() < interactionEdgeCreationChance]
+    if not gInteractions:
+        gInteractions.append(tuple(rng.choice(swapEdges)))
+
+    soddi = []
+    while len(soddi) < soddiLength:
+        firstNum = rng.randrange(numNodes)
+        secondNum = rng.randrange(numNodes)
+        if firstNum != secondNum:
+            soddi.append((firstNum, secondNum))
+
+    return {"gSwaps": [tuple(edge) for edge in swapEdges], "gInteractions": gInteractions, "soddi": soddi}
@@ -0,0 +1,163 @@
+import sys
+import threading
+from collections import OrderedDict
+
+from swapping.routingState import RoutingState
+
+CONST_defaultPrefixCheckpointCacheSize = 64
+CONST_defaultPrefixCheckpointCacheMaxBytes = 64 * 1024 * 1024
+# A snapshot of the RoutingState is kept every this many entries; the states in between are got by replaying swaps
+CONST_checkpointInterval = 32
+
+
+class RoutedPrefix:
+    """
+    The swap steps (in labels, see executeSwaps) of each entry of a SODDI routed in position space, along with a
+    snapshot of the RoutingState (its positionOf array) after every CONST_checkpointInterval entries, from which the
+    state after any entry can be rebuilt by replaying the few swaps since the snapshot before it. Entries stop being
+    recorded once their estimated memory would go over maxBytes, if given, since it could never be kept then
+    """
+    __slots__ = ("soddi", "entrySteps", "snapshots", "maxBytes", "numBytes", "isFull")
+
+    def __init__(self, soddi, entrySteps=None, snapshots=None, maxBytes=None):
+        self.soddi = soddi
+        self.entrySteps = entrySteps if entrySteps is not None else []
+        # snapshots[i] is the positionOf array after (i + 1) * CONST_checkpointInterval entries
+        self.snapshots = snapshots if snapshots is not None else []
+        self.maxBytes = maxBytes
+        self.numBytes = (sum(_entryBytes(pair, swapSteps) for pair, swapSteps in zip(soddi, self.entrySteps))
+                         + sum(snapshot.nbytes for snapshot in self.snapshots))
+        self.isFull = False
+
+    def addEntry(self, swapSteps, state):
+        """
+        Records the swap steps of the next entry, state being the RoutingState right after it, unless the prefix is
+        full, in which case neither it nor any entry after it is recorded
+        """
+        if self.isFull:
+            return
+        swapSteps = tuple(swapSteps)
+        size = _entryBytes(self.soddi[len(self.entrySteps)], swapSteps)
+        snapshot = state.positionOf.copy() if (len(self.entrySteps) + 1) % CONST_checkpointInterval == 0 else None
+        if snapshot is not None:
+            size += snapshot.nbytes
+        if self.maxBytes is not None and self.numBytes + size > self.maxBytes:
+            self.isFull = True
+            return
+        self.entrySteps.append(swapSteps)
+        if snapshot is not None:
+            self.snapshots.append(snapshot)
+        self.numBytes += size
+
+    def reusedFor(self, soddi, numEntries):
+        """
+        RoutedPrefix of soddi, which starts with the same numEntries entries as this one, with only those routed (their
+        swap steps and snapshots being shared)
+        """
+        return RoutedPrefix(soddi, self.entrySteps[:numEntries],
+                            self.snapshots[:numEntries // CONST_checkpointInterval], self.maxBytes)
+
+    def stateAfter(self, numEntries, numNodes):
+        """
+        RoutingState after the first numEntries entries were routed
+        """
+        numSnapshots = numEntries // CONST_checkpointInterval
+        state = RoutingState.fromPositions(self.snapshots[numSnapshots - 1]) if numSnapshots \
+            else RoutingState(numNodes)
+        for swapSteps in self.entrySteps[numSnapshots * CONST_checkpointInterval:numEntries]:
+            state.applySwapSteps(swapSteps)
+        return state
+
+    def allSwapSteps(self):
+        return [step for swapSteps in self.entrySteps for step in swapSteps]
+
+
+class PrefixCheckpointCache:
+    """
+    LRU cache of the last maxSize SODDIs routed, on any topology (see RoutedPrefix), so that a SODDI that only differs
+    from one of them after its first entries, as when the last few entries are edited and resubmitted, only has the
+    entries after the longest unchanged prefix routed again. Routing is sequential, so the steps and state of the
+    prefix are the same as the ones routed before. The least recently used ones are also evicted whenever their
+    estimated memory goes over maxBytes, the last one kept always staying, and no prefix records more entries than
+    fit in maxBytes. It may be shared by the requests of the app, hence the lock
+    """
+    __slots__ = ("maxSize", "maxBytes", "routed", "totalBytes", "hits", "misses", "entriesReused", "evictions", "lock")
+
+    def __init__(self, maxSize=CONST_defaultPrefixCheckpointCacheSize,
+                 maxBytes=CONST_defaultPrefixCheckpointCacheMaxBytes):
+        self.maxSize = maxSize
+        self.maxBytes = maxBytes
+        # {(topologyHandle, soddi): RoutedPrefix}, soddi being a tuple of pairs of positions
+        self.routed = OrderedDict()
+        self.totalBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.entriesReused = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def longestPrefix(self, topologyHandle, soddi, numNodes):
+        """
+        (routedPrefix, state): the RoutedPrefix of the longest prefix of soddi (pairs of positions) routed before on
+        the topology, and the RoutingState to route the rest of soddi from. Without any, the prefix is empty and the
+        state has every label on its own position
+        """
+        soddi = tuple(tuple(pair) for pair in soddi)
+        best, bestLength = None, 0
+        with self.lock:
+            for (handle, routedSODDI), routedPrefix in self.routed.items():
+                if handle != topologyHandle:
+                    continue
+                length = _commonPrefixLength(soddi, routedSODDI)
+                if length > bestLength:
+                    best, bestLength = (handle, routedSODDI), length
+            if best is None:
+                self.misses += 1
+                return RoutedPrefix(soddi, maxBytes=self.maxBytes), RoutingState(numNodes)
+            self.hits += 1
+            self.entriesReused += bestLength
+            self.routed.move_to_end(best)
+            routedPrefix = self.routed[best]
+        return routedPrefix.reusedFor(soddi, bestLength), routedPrefix.stateAfter(bestLength, numNodes)
+
+    def put(self, topologyHandle, routedPrefix):
+        """
+        Keeps routedPrefix. Only its routed entries are matched against later SODDIs, since routing may have stopped
+        before the end of its SODDI (see RoutingBudget)
+        """
+        if self.maxSize <= 0:
+            return
+        key = (topologyHandle, routedPrefix.soddi[:len(routedPrefix.entrySteps)])
+        with self.lock:
+            if key in self.routed:
+                self.totalBytes -= self.routed.pop(key).numBytes
+            self.routed[key] = routedPrefix
+            self.totalBytes += routedPrefix.numBytes
+            while (len(self.routed) > self.maxSize or self.totalBytes > self.maxBytes) and len(self.routed) > 1:
+                self.totalBytes -= self.routed.popitem(last=False)[1].numBytes
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hitRate": self.hits / lookups if lookups else 0.0,
+                    "entriesReused": self.entriesReused, "evictions": self.evictions, "size": len(self.routed),
+                    "maxSize": self.maxSize, "bytes": self.totalBytes, "maxBytes": self.maxBytes}
+
+
+def _entryBytes(pair, swapSteps):
+    """
+    Estimated memory taken by an entry of a RoutedPrefix: its pair in the SODDI and its swap steps
+    """
+    return sys.getsizeof(pair) + sys.getsizeof(swapSteps) + sum(sys.getsizeof(step) for step in swapSteps
+                                                                 if type(step) is tuple)
+
+
+def _commonPrefixLength(soddi, otherSODDI):
+    length = 0
+    for pair, otherPair in zip(soddi, otherSODDI):
+        if pair != otherPair:
+            break
+        length += 1
+    return length
+
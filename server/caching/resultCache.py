@@ -0,0 +1,62 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+CONST_defaultResultCacheSize = 1024
+
+
+def resultKey(topologyHandle, soddi):
+    """
+    Digest of a request, made of the handle of its topology (see topologyHandle) and its SODDI, pairs given as tuples
+    or lists being the same
+    """
+    content = json.dumps([topologyHandle, [list(pair) for pair in soddi]], separators=(",", ":"))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of the solutions (totalSwaps, swapSteps, ids) given by coreExecution, which is deterministic, so that
+    resubmitting the same topology and SODDI does not route it all over again. Only the maxSize most recently used
+    solutions are kept (with a maxSize of 0, nothing is cached). It may be shared by the requests of the app, hence
+    the lock
+    """
+    __slots__ = ("maxSize", "results", "hits", "misses", "lock")
+
+    def __init__(self, maxSize=CONST_defaultResultCacheSize):
+        self.maxSize = maxSize
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Solution stored under key, or None if it is not cached. Each hit gets its own copy of the lists
+        """
+        with self.lock:
+            result = self.results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.results.move_to_end(key)
+        totalSwaps, swapSteps, ids = result
+        return totalSwaps, list(swapSteps), list(ids)
+
+    def put(self, key, result):
+        if self.maxSize <= 0:
+            return
+        totalSwaps, swapSteps, ids = result
+        with self.lock:
+            self.results[key] = (totalSwaps, tuple(swapSteps), tuple(ids))
+            self.results.move_to_end(key)
+            if len(self.results) > self.maxSize:
+                self.results.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hitRate": self.hits / lookups if lookups else 0.0,
+                    "size": len(self.results), "maxSize": self.maxSize}
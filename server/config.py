@@ -42,3 +42,25 @@ node_color_interactions = "#ff00dd"
 edge_color_interactions = "#ed02c6"
 edge_width_interactions = 1
 
+
+# Directory where the precomputed artifacts of every topology routed on are kept, so that they are not computed again
+# after a restart or in another worker (see topology/topologyArtifactCache.py). Solutions are the same as those of
+# processingMain.py run without it
+topologyCacheDirectory = os.environ.get("ATHENA_TOPOLOGY_CACHE", os.path.join(script_dir, "topologyCache"))
+# Estimated memory that the topologies registered in the app may take before the least recently used are evicted
+topologyRegistryMaxBytes = int(os.environ.get("ATHENA_TOPOLOGY_REGISTRY_MAX_BYTES", 256 * 1024 * 1024))
+# Number of solutions kept in the app for when the same request is submitted again
+resultCacheSize = int(os.environ.get("ATHENA_RESULT_CACHE_SIZE", 1024))
+# Number of background jobs (see jobs/routingJobQueue.py) routed at the same time, and how many may wait to be routed
+jobWorkers = int(os.environ.get("ATHENA_JOB_WORKERS", 2))
+jobQueueSize = int(os.environ.get("ATHENA_JOB_QUEUE_SIZE", 64))
+# Whether the SODDIs of a batch request are routed in a pool of processes instead of threads. Each batch request then
+# starts its own pool, so it is up to whoever runs the server, never to clients
+batchUseProcesses = os.environ.get("ATHENA_BATCH_USE_PROCESSES", "0") == "1"
+# Number of SODDIs routed in the app whose entries are kept, so that resubmitting one with only its last entries edited
+# does not route the rest again, and the estimated memory they may take before the least recently used are evicted
+prefixCheckpointCacheSize = int(os.environ.get("ATHENA_PREFIX_CHECKPOINT_CACHE_SIZE", 64))
+prefixCheckpointCacheMaxBytes = int(os.environ.get("ATHENA_PREFIX_CHECKPOINT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Swap steps that a SODDI streamed in the app may have for its solution to be put in the resultCache, since they are all
+# kept in memory while it is streamed for that
+streamCachedMaxSwapSteps = int(os.environ.get("ATHENA_STREAM_CACHED_MAX_SWAP_STEPS", 100000))
@@ -1,31 +1,76 @@
 import getopt
+import os
 import sys
 
+CONST_usageMSG = ('processingMain.py -i <inputfile.json|inputdirectory> [-i ...] [<inputfile.json> ...] '
+                  '-o <outputfile.json|outputdirectory> [-w <workers>] [-t] [-r <tracefile.csv|tracefile.jsonl>]')
+# Results written by a batch end like this, so that running it again on the same directory skips them
+CONST_solutionFileSuffix = ".solution.json"
+
 
 def checkValidArgs(argv):
-    inputFileName = ''
+    """
+    Returns (inputFileNames, outputFileName, opts). Input files can be given with -i, any number of times, or after
+    the options, and directories stand for every .json file in them (apart from solutions written before)
+    """
+    inputFileNames = []
     outputFileName = ''
     opts = []  # List of strings to hold options #TODO: create uses for this
     try:
-        opts, args = getopt.getopt(argv, "hi:o:", ["ifile=", "ofile="])
+        opts, args = getopt.getopt(argv, "hi:o:tr:w:", ["ifile=", "ofile=", "timings", "trace=", "workers="])
     except getopt.GetoptError:
-        print('processingMain.py -i <inputfile> -o <outputfile>')
+        print(CONST_usageMSG)
         sys.exit(2)
-    if len(opts) == 0:
-        print('processingMain.py -i <inputfile> -o <outputfile>')
+    if len(opts) == 0 and len(args) == 0:
+        print(CONST_usageMSG)
         sys.exit()
     for opt, arg in opts:
         if opt == '-h':
             # TODO: improve the information displayed with -h
-            print('processingMain.py -i <inputfile> -o <outputfile>')
+            print(CONST_usageMSG)
             sys.exit()
         elif opt in ("-i", "--ifile"):
-            inputFileName = arg
+            inputFileNames.extend(inputFilesIn(arg))
         elif opt in ("-o", "--ofile"):
             outputFileName = arg
-    print("Input file: " + inputFileName)
+        elif opt in ("-r", "--trace") and not (arg.endswith(".csv") or arg.endswith(".jsonl")):
+            print("Trace file must be a .csv or .jsonl file")
+            sys.exit(-1)
+        elif opt in ("-w", "--workers") and not (arg.isdigit() and int(arg) > 0):
+            print("Number of workers must be a positive integer")
+            sys.exit(-1)
+    for arg in args:
+        inputFileNames.extend(inputFilesIn(arg))
+    print("Input files: " + ", ".join(inputFileNames))
     print("Output file: " + outputFileName)
-    if not inputFileName.endswith('.json'):
-        print("Input file must be a .json file")
+    if len(inputFileNames) == 0 or not all(inputFileName.endswith('.json') for inputFileName in inputFileNames):
+        print("Input files must be .json files")
+        sys.exit(-1)
+    if len(inputFileNames) > 1 and any(opt in ("-r", "--trace") for opt, arg in opts):
+        print("A trace can only be recorded for a single input file")
         sys.exit(-1)
-    return inputFileName, outputFileName, opts
+    return inputFileNames, outputFileName, opts
+
+
+def inputFilesIn(path):
+    """
+    [path] if it is a file, or every .json file in it (sorted, solutions excluded) if it is a directory
+    """
+    if not os.path.isdir(path):
+        return [path]
+    return [os.path.join(path, fileName) for fileName in sorted(os.listdir(path))
+            if fileName.endswith(".json") and not fileName.endswith(CONST_solutionFileSuffix)]
+
+
+def outputFileFor(inputFileName, outputFileName, numInputFiles):
+    """
+    Where the solution of inputFileName is written: outputFileName itself if it is the only input file and
+    outputFileName is a .json file, or a file inside the outputFileName directory otherwise. None if no output was
+    asked for
+    """
+    if not outputFileName:
+        return None
+    if numInputFiles == 1 and outputFileName.endswith(".json"):
+        return outputFileName
+    stem = os.path.splitext(os.path.basename(inputFileName))[0]
+    return os.path.join(outputFileName, stem + CONST_solutionFileSuffix)
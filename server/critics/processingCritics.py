@@ -12,3 +12,8 @@ def checkDesiredInteractionIsAchieved(desiredInteraction, newG_interactions):
         raise Exception("DESIRED INTERACTION %s IS INCOMPLETE" % str(desiredInteraction))
     # else:
     #     print("DESIRED INTERACTION %s COMPLETED" % str(desiredInteraction))
+
+
+def checkDesiredInteractionIsAchievedOnTopology(desiredInteraction, topology, state):
+    if not topology.hasInteraction(*state.positionsOf(desiredInteraction)):
+        raise Exception("DESIRED INTERACTION %s IS INCOMPLETE" % str(desiredInteraction))
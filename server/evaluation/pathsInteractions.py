@@ -2,12 +2,37 @@ from datetime import time
 
 import networkx as nx
 
+# Situations identified by evaluatePathsInteraction
+CONST_caseNoCrossing = "noCrossing"
+CONST_caseStrongCrossing = "strongCrossing"
+CONST_caseReverseStrongCrossing = "reverseStrongCrossing"
+CONST_caseParallelReversedStrongCrossingDS = "parallelReversedStrongCrossingDS"
+CONST_caseParallelReversedStrongCrossingSD = "parallelReversedStrongCrossingSD"
+CONST_caseContainedDS = "containedDS"
+CONST_caseContainedSD = "containedSD"
+CONST_caseTailsOverlap = "tailsOverlap"
+CONST_caseHeadsOverlap = "headsOverlap"
+CONST_caseSwitchPlaces = "switchPlaces"
+CONST_caseSoldierPathContainsDictatorPathDictatorIsPendulum = "soldierPathContainsDictatorPathDictatorIsPendulum"
+CONST_caseDictatorPathContainsSoldierPathSoldierIsPin = "dictatorPathContainsSoldierPathSoldierIsPin"
+CONST_caseSoldierPathContainsDictatorPathSoldierIsPin = "soldierPathContainsDictatorPathSoldierIsPin"
+CONST_caseDictatorPathContainsSoldierPathDictatorIsPendulum = "dictatorPathContainsSoldierPathDictatorIsPendulum"
+
 
 def evaluatePathsInteraction(G_swaps, pin, pen, dictator, soldier):
 	"""
 	Evaluate whether the dictator should go first or not, and how many more or how many less steps either the
 	dictator or the soldier have to take. This will later on affect the paths
 	"""
+	dictatorFirst, extraDictatorSwaps, extraSoldierSwaps, situation = evaluatePathsInteractionWithCase(G_swaps, pin, pen,
+																									   dictator, soldier)
+	return dictatorFirst, extraDictatorSwaps, extraSoldierSwaps
+
+
+def evaluatePathsInteractionWithCase(G_swaps, pin, pen, dictator, soldier):
+	"""
+	Same as evaluatePathsInteraction, but also returns which situation was identified (one of the CONST_case... names)
+	"""
 	dictatorPath = pin[3]
 	soldierPath = pen[3]
 
@@ -62,6 +87,7 @@ def evaluatePathsInteraction(G_swaps, pin, pen, dictator, soldier):
 
 	# Return variables
 	dictatorFirst = None
+	situation = None
 	extraDictatorSwaps = 0
 	extraSoldierSwaps = 0
 
@@ -89,6 +115,7 @@ def evaluatePathsInteraction(G_swaps, pin, pen, dictator, soldier):
 	# executing one path at a time. This can become a problem in the Weak crossing situation, causing a collision.
 	if not pendulumInDictatorPath and not pinInSoldierPath and not soldierInDictatorPath and not dictatorInSoldierPath:
 		dictatorFirst = True  # Default. Soldier could have gone first with no problem
+		situation = CONST_caseNoCrossing
 
 	# STRONG CROSSING
 	# Either the pin is in the soldier's path or the pen is in the dictator's path.
@@ -96,9 +123,11 @@ def evaluatePathsInteraction(G_swaps, pin, pen, dictator, soldier):
 		if pendulumInDictatorPath and not pinInSoldierPath:
 			# If the soldier were to go first, the dictator would later displace the soldier
 			dictatorFirst = True
+			situation = CONST_caseStrongCrossing
 		elif not pendulumInDictatorPath and pinInSoldierPath:
 			# If the dictator were to go first, the soldier would later displace the dictator
 			dictatorFirst = False
+			situation = CONST_caseStrongCrossing
 
 	# REVERSE STRONG CROSSING
 	# Either the soldier is in the dictator's path or the dictator is in the soldier's path, but the goal nodes are out
@@ -106,9 +135,11 @@ def evaluatePathsInteraction(G_swaps, pin, pen, dictator, soldier):
 		if dictatorInSoldierPath and not soldierInDictatorPath:
 			# If the soldier were to go first, the dictator would be displaced before it begins moving
 			dictatorFirst = True
+			situation = CONST_caseReverseStrongCrossing
 		elif soldierInDictatorPath and not dictatorInSoldierPath:
 			# If the dictator were to go first, the soldier would be displaced before it begins moving
 			dictatorFirst = False
+			situation = CONST_caseReverseStrongCrossing
 
 	# PARALLEL REVERSED STRONG CROSSING
 	# Same situation as normal reversed strong crossing, just that the pin is in the way of the soldier or the pendulum
@@ -116,19 +147,23 @@ def evaluatePathsInteraction(G_swaps, pin, pen, dictator, soldier):
 	# DS (Dictator path contains soldier but not pendulum, and soldier path contains pin)
 	elif not pendulumInDictatorPath and pinInSoldierPath and soldierInDictatorPath and not dictatorInSoldierPath:
 		dictatorFirst = False
+		situation = CONST_caseParallelReversedStrongCrossingDS
 	# SD (Soldier path contains dictator but not pin, and dictator path contains pendulum)
 	elif pendulumInDictatorPath and not pinInSoldierPath and not soldierInDictatorPath and dictatorInSoldierPath:
 		dictatorFirst = True
+		situation = CONST_caseParallelReversedStrongCrossingSD
 
 	# CONTAINED
 	# DS (Dictator path contains soldier path entirely)
 	if not dictatorInSoldierPath and not pinInSoldierPath and soldierInDictatorPath and pendulumInDictatorPath:
 		if isInBetween(dictator, pen[0], soldier, dictatorPath, soldierPath):  # Both going in opposite directions
 			dictatorFirst = False
+			situation = CONST_caseContainedDS
 			extraSoldierSwaps = -1
 		# Both going in the same direction or soldier is already pendulum
 		elif soldier == pen[0] or isInBetween(dictator, soldier, pen[0], dictatorPath, soldierPath):
 			dictatorFirst = False
+			situation = CONST_caseContainedDS
 			extraSoldierSwaps = 1
 		else:
 			print("Weird situation of dictatorPath containing soldierPath. Here are the paths:")
@@ -139,10 +174,12 @@ def evaluatePathsInteraction(G_swaps, pin, pen, dictator, soldier):
 	elif not soldierInDictatorPath and not pendulumInDictatorPath and dictatorInSoldierPath and pinInSoldierPath:
 		if isInBetween(soldier, pin[0], dictator, soldierPath, dictatorPath):  # Both going in opposite directions
 			dictatorFirst = True
+			situation = CONST_caseContainedSD
 			extraDictatorSwaps = -1
 		# Both going in the same direction or dictator is already pin
 		elif dictator == pin[0] or isInBetween(soldier, dictator, pin[0], soldierPath, dictatorPath):
 			dictatorFirst = True
+			situation = CONST_caseContainedSD
 			extraDictatorSwaps = 1
 		else:
 			print("Weird situation of soldierPath containing dictatorPath. Here are the paths:")
@@ -155,36 +192,43 @@ def evaluatePathsInteraction(G_swaps, pin, pen, dictator, soldier):
 	# Tails of the paths overlaps
 	elif pendulumInDictatorPath and pinInSoldierPath and not soldierInDictatorPath and not dictatorInSoldierPath:
 		dictatorFirst = True
+		situation = CONST_caseTailsOverlap
 		extraDictatorSwaps = -1
 
 	# Heads of the paths overlap
 	elif not pinInSoldierPath and not pendulumInDictatorPath and soldierInDictatorPath and dictatorInSoldierPath:
 		dictatorFirst = True
+		situation = CONST_caseHeadsOverlap
 		extraSoldierSwaps = -1  # Movement of the dictator moves soldier 1 swap closer to goal already
 
 	# Pin is soldier and pen is dictator, so dictator and soldier just need to switch places
 	elif pendulumInDictatorPath and pinInSoldierPath and soldierInDictatorPath and dictatorInSoldierPath:
 		dictatorFirst = True
+		situation = CONST_caseSwitchPlaces
 		extraDictatorSwaps = -1
 
 	# Soldier path contains dictator path but dictator is pendulum
 	elif pendulumInDictatorPath and pinInSoldierPath and not soldierInDictatorPath and dictatorInSoldierPath:
 		dictatorFirst = True
+		situation = CONST_caseSoldierPathContainsDictatorPathDictatorIsPendulum
 		extraDictatorSwaps = -1
 
 	# Dictator path contains soldier path but soldier is pin
 	elif pendulumInDictatorPath and pinInSoldierPath and soldierInDictatorPath and not dictatorInSoldierPath:
 		dictatorFirst = False
+		situation = CONST_caseDictatorPathContainsSoldierPathSoldierIsPin
 		extraSoldierSwaps = -1
 
 	# Soldier path contains dictator path but soldier is pin
 	elif not pendulumInDictatorPath and pinInSoldierPath and soldierInDictatorPath and dictatorInSoldierPath:
 		dictatorFirst = True
+		situation = CONST_caseSoldierPathContainsDictatorPathSoldierIsPin
 		extraDictatorSwaps = -1
 
 	# Dictator path contains soldier path but dictator is pendulum
 	elif pendulumInDictatorPath and not pinInSoldierPath and soldierInDictatorPath and dictatorInSoldierPath:
 		dictatorFirst = False
+		situation = CONST_caseDictatorPathContainsSoldierPathDictatorIsPendulum
 		extraSoldierSwaps = -1
 
 
@@ -202,4 +246,4 @@ def evaluatePathsInteraction(G_swaps, pin, pen, dictator, soldier):
 	# print("Extra swaps that dictator has to make: " + str(extraDictatorSwaps))
 	# print("Extra swaps that soldier has to make: " + str(extraSoldierSwaps))
 
-	return dictatorFirst, extraDictatorSwaps, extraSoldierSwaps
+	return dictatorFirst, extraDictatorSwaps, extraSoldierSwaps, situation
@@ -33,8 +33,11 @@ def drawGInteractions(G_interactions):
 		plt.show(block=False)
 
 
-def drawStepsInGraph(G_swaps):
+def drawStepsInGraph(G_swaps, getLabelMapping=None):
+	# The graph may have positions as nodes, in which case it is only relabelled if it is actually going to be drawn
 	if showSteps:
+		if getLabelMapping is not None:
+			G_swaps = nx.relabel_nodes(G_swaps, getLabelMapping(), copy=True)
 		plt.figure()
 		nx.draw_circular(G_swaps, with_labels=True, node_color=node_color_step_swaps,
 						 edge_color=edge_color_swaps)
@@ -5,3 +5,15 @@ def relabelGraphs(newG_swaps, newG_interactions, mapping):
     newG_swaps = nx.relabel_nodes(newG_swaps, mapping, copy=True)
     newG_interactions = nx.relabel_nodes(newG_interactions, mapping, copy=True)
     return newG_swaps, newG_interactions
+
+
+def relabelGraphsInPlace(G_swaps, G_interactions, mapping):
+    """
+    Same as relabelGraphs, but reusing the given graph objects instead of building new ones. The mapping must be a
+    permutation of the nodes, so only the edges have to be rewritten
+    """
+    for G in (G_swaps, G_interactions):
+        relabelledEdges = [(mapping[u], mapping[v], data) for u, v, data in G.edges(data=True)]
+        G.clear_edges()
+        G.add_edges_from(relabelledEdges)
+    return G_swaps, G_interactions
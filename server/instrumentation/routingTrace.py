@@ -0,0 +1,70 @@
+import csv
+import json
+
+# Columns of the trace, one row per SODDI entry
+CONST_traceFields = ("entry", "source", "target", "planCacheHit", "pinSearchNodesScanned", "pinsConsidered",
+                     "evaluationsSkipped", "pendulumsScanned", "shortestPathCalls", "mergeBranch", "evaluationCase",
+                     "swaps")
+CONST_doneAlreadyCase = "doneAlready"
+CONST_unknownTraceFormatMSG = "The trace file must end in .csv or .jsonl"
+
+
+class RoutingTrace:
+    """
+    Work counters of every SODDI entry routed, to see which topologies and SODDI patterns make the search blow up (when
+    planCacheHit is True, the plan was reused from the RoutePlanCache and there was no search at all):
+        1) pinSearchNodesScanned: nodes looked at while searching for pins (dequeued by the BFS, or scanned to fill the
+           pin index of the topology; 0 when the pins of that position were already known)
+        2) pinsConsidered: number of pins in allPinNodes, and evaluationsSkipped: how many of them were discarded
+           without evaluating their combo, since their bound showed that they could not be the best one
+        3) pendulumsScanned: pendulums looked at for all of those pins
+        4) shortestPathCalls: number of swap paths built
+        5) mergeBranch and evaluationCase: branch of mergePaths and situation of evaluatePathsInteraction of the chosen
+           pin-pen combo
+        6) swaps: number of swaps emitted for the entry
+    """
+    __slots__ = ("entries",)
+
+    def __init__(self):
+        self.entries = []
+
+    def newEntry(self, desiredInteraction):
+        """
+        Starts the counters of the next SODDI entry and returns them, to be filled in while it is routed
+        """
+        counters = {"entry": len(self.entries), "source": desiredInteraction[0], "target": desiredInteraction[1],
+                    "planCacheHit": False, "pinSearchNodesScanned": 0, "pinsConsidered": 0, "evaluationsSkipped": 0,
+                    "pendulumsScanned": 0, "shortestPathCalls": 0, "mergeBranch": None, "evaluationCase": None,
+                    "swaps": 0}
+        self.entries.append(counters)
+        return counters
+
+    def writeCSV(self, fileName):
+        with open(fileName, "w", newline="") as traceFile:
+            writer = csv.DictWriter(traceFile, fieldnames=CONST_traceFields)
+            writer.writeheader()
+            writer.writerows(self.entries)
+
+    def writeJSONL(self, fileName):
+        with open(fileName, "w") as traceFile:
+            for counters in self.entries:
+                traceFile.write(json.dumps(counters) + "\n")
+
+    def write(self, fileName):
+        """
+        Writes the trace as CSV or as JSON Lines, depending on the extension of fileName
+        """
+        if fileName.endswith(".csv"):
+            self.writeCSV(fileName)
+        elif fileName.endswith(".jsonl"):
+            self.writeJSONL(fileName)
+        else:
+            raise ValueError(CONST_unknownTraceFormatMSG)
+
+
+def countWork(counters, name, amount=1):
+    """
+    Adds amount to the counter name if counters were given (see RoutingTrace.newEntry). Does nothing otherwise
+    """
+    if counters is not None:
+        counters[name] += amount
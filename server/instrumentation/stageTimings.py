@@ -0,0 +1,66 @@
+import time
+from contextlib import nullcontext
+
+# Shared do-nothing context manager, so that timing a stage costs nothing more than a function call when disabled
+CONST_noTiming = nullcontext()
+
+
+class StageTimings:
+    """
+    Accumulates the wall time and the number of calls of each stage of the routing pipeline. Stages may be nested (for
+    example, evaluatePathsInteraction happens inside pinPenSelection), in which case the time of the inner stage is
+    also counted in the outer one.
+    """
+    __slots__ = ("seconds", "calls")
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+
+    def stage(self, name):
+        return _TimedStage(self, name)
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def report(self):
+        """
+        Dictionary {stage: {"seconds": total wall time, "calls": number of calls}}, in the order stages first ran
+        """
+        return {name: {"seconds": self.seconds[name], "calls": self.calls[name]} for name in self.seconds}
+
+    def formattedReport(self):
+        """
+        Human readable table of the report, for the command line
+        """
+        lines = ["%-26s %12s %10s" % ("Stage", "Seconds", "Calls")]
+        for name, values in self.report().items():
+            lines.append("%-26s %12.6f %10d" % (name, values["seconds"], values["calls"]))
+        return "\n".join(lines)
+
+
+class _TimedStage:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def timedStage(timings, name):
+    """
+    Context manager timing the stage name if timings is a StageTimings. If timings is None, nothing is measured
+    """
+    if timings is None:
+        return CONST_noTiming
+    return timings.stage(name)
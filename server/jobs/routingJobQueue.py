@@ -0,0 +1,193 @@
+import heapq
+import itertools
+import threading
+import uuid
+from collections import OrderedDict, deque
+
+CONST_defaultJobWorkers = 2
+CONST_defaultJobQueueSize = 64
+CONST_defaultFinishedJobsKept = 1024
+# Most jobs that may start while a job is the oldest one waiting, shorter SODDIs first, before it starts anyway
+CONST_defaultMaxJobsOvertaking = 8
+CONST_jobQueueFullMSG = "Too many jobs are waiting already, try again later"
+
+CONST_jobQueued = "queued"
+CONST_jobRunning = "running"
+CONST_jobDone = "done"
+CONST_jobFailed = "failed"
+CONST_jobCancelled = "cancelled"
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class RoutingJob:
+    """
+    A routing run in the background: entries is an iterator over the swap steps of each entry of its SODDI (see
+    iterRoutePreparedTopology), routed one by one by a worker of a RoutingJobQueue, so that progress can be followed
+    and the job can be cancelled between entries
+    """
+    __slots__ = ("jobID", "entries", "totalEntries", "ids", "status", "entriesRouted", "totalSwaps", "swapSteps",
+                 "error", "cancelRequested")
+
+    def __init__(self, entries, totalEntries, ids):
+        self.jobID = uuid.uuid4().hex
+        self.entries = entries
+        self.totalEntries = totalEntries
+        self.ids = ids
+        self.status = CONST_jobQueued
+        self.entriesRouted = 0
+        self.totalSwaps = 0
+        self.swapSteps = []
+        self.error = None
+        self.cancelRequested = False
+
+    def progress(self):
+        """
+        Dictionary with the status of the job and how many entries of its SODDI have been routed
+        """
+        progress = {"jobID": self.jobID, "status": self.status, "entriesRouted": self.entriesRouted,
+                    "totalEntries": self.totalEntries}
+        if self.error is not None:
+            progress["error"] = self.error
+        return progress
+
+    def result(self):
+        """
+        (totalSwaps, swapSteps, ids) once the job is done, like coreExecution
+        """
+        return self.totalSwaps, self.swapSteps, self.ids
+
+
+class RoutingJobQueue:
+    """
+    Runs RoutingJobs on maxWorkers background threads, so that long routing runs do not keep a request waiting.
+    Waiting jobs are started shortest SODDI first (and in order of submission among equals), so that short interactive
+    jobs are not stuck behind long ones, and at most maxQueued of them can be waiting at once. So that a steady stream
+    of short jobs cannot keep a long one waiting forever, the oldest waiting job starts next once maxOvertaking jobs
+    have started since it was submitted. Only the last finishedJobsKept finished jobs are remembered
+    """
+    __slots__ = ("maxQueued", "finishedJobsKept", "maxOvertaking", "jobs", "finishedJobs", "waiting",
+                 "waitingInOrder", "numWaiting", "jobsStarted", "sequence", "condition", "workers")
+
+    def __init__(self, maxWorkers=CONST_defaultJobWorkers, maxQueued=CONST_defaultJobQueueSize,
+                 finishedJobsKept=CONST_defaultFinishedJobsKept, maxOvertaking=CONST_defaultMaxJobsOvertaking):
+        self.maxQueued = maxQueued
+        self.finishedJobsKept = finishedJobsKept
+        self.maxOvertaking = maxOvertaking
+        self.jobs = {}
+        self.finishedJobs = OrderedDict()
+        # Heap of (number of entries, order of submission, job), and the same jobs in order of submission as (jobs
+        # started before it was submitted, job). Jobs that are no longer waiting are only dropped from either one once
+        # they come up
+        self.waiting = []
+        self.waitingInOrder = deque()
+        self.numWaiting = 0
+        self.jobsStarted = 0
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.workers = [threading.Thread(target=self._work, daemon=True) for _ in range(maxWorkers)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, entries, totalEntries, ids):
+        """
+        Queues a new RoutingJob and returns it. Raises JobQueueFullError if maxQueued jobs are waiting already
+        """
+        job = RoutingJob(entries, totalEntries, ids)
+        with self.condition:
+            if self.numWaiting >= self.maxQueued:
+                raise JobQueueFullError(CONST_jobQueueFullMSG)
+            self.jobs[job.jobID] = job
+            heapq.heappush(self.waiting, (totalEntries, next(self.sequence), job))
+            self.waitingInOrder.append((self.jobsStarted, job))
+            self.numWaiting += 1
+            self.condition.notify()
+        return job
+
+    def job(self, jobID):
+        """
+        RoutingJob with the given ID, or None if it is unknown or has been forgotten
+        """
+        with self.condition:
+            return self.jobs.get(jobID)
+
+    def cancel(self, jobID):
+        """
+        Cancels a job that is waiting or running (a running one stops before its next entry). Returns whether there
+        was such a job
+        """
+        with self.condition:
+            job = self.jobs.get(jobID)
+            if job is None or job.status not in (CONST_jobQueued, CONST_jobRunning):
+                return False
+            job.cancelRequested = True
+            if job.status == CONST_jobQueued:
+                # It stays among the waiting jobs until a worker comes across it, but no longer takes a place in the
+                # queue
+                self.numWaiting -= 1
+                self._finish(job, CONST_jobCancelled)
+            return True
+
+    def stats(self):
+        with self.condition:
+            statuses = [job.status for job in self.jobs.values()]
+            return {status: statuses.count(status) for status in (CONST_jobQueued, CONST_jobRunning, CONST_jobDone,
+                                                                  CONST_jobFailed, CONST_jobCancelled)}
+
+    def _work(self):
+        while True:
+            with self.condition:
+                while not self.numWaiting:
+                    self.condition.wait()
+                job = self._nextJob()
+                self.numWaiting -= 1
+                self.jobsStarted += 1
+                job.status = CONST_jobRunning
+            self._run(job)
+
+    def _nextJob(self):
+        """
+        Takes the next job to start out of the waiting ones: the oldest if it has been overtaken maxOvertaking times
+        already, or else the one with the shortest SODDI. Called holding the lock, with some job waiting
+        """
+        while self.waitingInOrder[0][1].status != CONST_jobQueued:
+            self.waitingInOrder.popleft()
+        jobsStartedBefore, oldest = self.waitingInOrder[0]
+        if self.jobsStarted - jobsStartedBefore >= self.maxOvertaking:
+            self.waitingInOrder.popleft()
+            return oldest
+        job = heapq.heappop(self.waiting)[2]
+        while job.status != CONST_jobQueued:
+            job = heapq.heappop(self.waiting)[2]
+        return job
+
+    def _run(self, job):
+        try:
+            for swapSteps in job.entries:
+                if job.cancelRequested:
+                    break
+                job.swapSteps += swapSteps
+                job.totalSwaps += len([x for x in swapSteps if type(x) is tuple])
+                job.entriesRouted += 1
+        except Exception as error:
+            job.error = str(error)
+        with self.condition:
+            if job.cancelRequested:
+                self._finish(job, CONST_jobCancelled)
+            else:
+                self._finish(job, CONST_jobFailed if job.error is not None else CONST_jobDone)
+
+    def _finish(self, job, status):
+        """
+        Marks the job as finished, forgetting the oldest finished job if too many are kept. Called holding the lock
+        """
+        job.status = status
+        job.entries = None
+        if status == CONST_jobCancelled:
+            job.swapSteps = []
+        self.finishedJobs[job.jobID] = job
+        if len(self.finishedJobs) > self.finishedJobsKept:
+            forgottenID, _ = self.finishedJobs.popitem(last=False)
+            del self.jobs[forgottenID]
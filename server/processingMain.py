@@ -1,19 +1,43 @@
+import functools
 import itertools
+import json
 import math
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 import networkx as nx
 
 from config import *
-from critics.argsGatekeeper import checkValidArgs
-from critics.inputCritics import checkingG_swaps, checkingG_interactions, checkingSODDI
-from critics.jsonCritics import retrieveJSONFields, checkExtractedContents
+from caching.resultCache import resultKey
+from critics.argsGatekeeper import checkValidArgs, outputFileFor
+from critics.inputCritics import checkingG_swaps, checkingG_interactions, checkingSODDI, \
+    CONST_gSwapsMustBeConnectedMSG, CONST_gInteractionsLoopsMSG, CONST_gInteractionsHasNoEdgeMSG
+from critics.jsonCritics import retrieveJSONFields, checkExtractedContents, isValidList
 from graphDrawing.graphDrawingMethods import drawOriginalGSwap, drawGInteractions, drawNewGSwaps
-from swapping.swapFunctions import swapsRequired
+from instrumentation.routingTrace import RoutingTrace
+from instrumentation.stageTimings import StageTimings, timedStage
+from searching.routePlanCache import RoutePlanCache
+from swapping.routingBudget import RoutingBudget
+from swapping.swapFunctions import swapsRequired, routeSODDI, iterRouteSODDI
+from topology.canonicalLabelling import canonicalLabelling, canonicalEdges
+from topology.dynamicRoutingTopology import DynamicRoutingTopology
+from topology.preparedTopology import PreparedTopology
+from topology.routingTopology import RoutingTopology
+from topology.topologyArtifactCache import topologyKey
+from topology.topologyRegistry import topologyHandle
 
 script_dir = os.path.dirname(__file__)
 edgelist_dir = os.path.join(script_dir, "edgelist.txt")
 
+CONST_batchSODDIBadFormatMSG = "SODDI must be a list of lists (or tuples) of two ints or strings"
+CONST_batchSODDINodesNotInG_swapsMSG = "Nodes in SODDI must be in G_swaps"
+CONST_batchInvalidInputFileMSG = "Input file must be a valid JSON file with the fields G_swaps, G_interactions and SODDI"
+CONST_batchInvalidTopologyMSG = "G_swaps and G_interactions must be lists of lists (or tuples) of two ints or strings"
+CONST_updateNodesNotInG_swapsMSG = "Edges can only be added or removed between nodes that are already in G_swaps"
+CONST_resumeIndexOutOfRangeMSG = "resumeIndex must be an int from 0 to the length of the SODDI"
+
 
 def obtainRandomValidInputForJS(numNodes, soddiLength, swapEdgeCreationChance=0.4, interactionEdgeCreationChance=0.1):
     G_swaps = None
@@ -145,33 +169,433 @@ def randomInput():
 
 
 
-def coreExecution(inputG_swaps, inputG_interactions, soddi):
+def coreExecution(inputG_swaps, inputG_interactions, soddi, timings=None, trace=None, planCache=None,
+                  artifactCache=None, resultCache=None, budget=None, checkpoints=None):
+    """
+    Validates the input, routes the SODDI and returns (totalSwaps, renamedAllSwapSteps, ids). If a StageTimings is
+    given, the time spent in every stage of the pipeline is accumulated in it. If a RoutingTrace is given, the work
+    counters of every SODDI entry are recorded in it. If a RoutePlanCache is given, it is the one used while routing,
+    so that its stats can be looked at afterwards. If a TopologyArtifactCache is given, the topology is only validated
+    and preprocessed the first time that it, or any relabelled copy of it, is seen (see prepareTopology), the solution
+    being the same as without one. If a ResultCache is given (always along with the same artifactCache, or none), solutions found before are returned straight away,
+    unless a RoutingTrace has to be recorded. If a RoutingBudget is given, routing stops (or goes on the cheap way)
+    once it runs out, see RoutingBudget, and only solutions of the whole SODDI routed in full are put in the resultCache.
+    If a PrefixCheckpointCache is given, only the entries after the longest prefix of the SODDI routed before are routed
+    """
+    if resultCache is not None:
+        with timedStage(timings, "resultCache"):
+            key = resultKey(topologyHandle(inputG_swaps, inputG_interactions), soddi)
+            # A resumed SODDI only needs its remaining entries, which are not what is cached
+            solution = resultCache.get(key) if trace is None and (budget is None or budget.resumeFrom is None) \
+                else None
+        if solution is not None:
+            return solution
+    prepared = prepareTopology(inputG_swaps, inputG_interactions, timings, artifactCache)
+    solution = routePreparedTopology(prepared, soddi, timings, trace, planCache, budget, checkpoints)
+    if resultCache is not None and (budget is None or budget.routedInFull()):
+        resultCache.put(key, solution)
+    return solution
+
+
+def prepareTopology(inputG_swaps, inputG_interactions, timings=None, artifactCache=None):
+    """
+    First half of coreExecution, which only depends on the topology: validates it and returns a PreparedTopology on
+    which any number of SODDIs can then be routed with routePreparedTopology. With an artifactCache, the tables are
+    shared with every relabelled copy of the topology through its canonical labelling, but relabelled back to the IDs
+    of the nodes (see RoutingTopology.relabelled), so the solutions are the same as without one
+    """
     # Check that the data types of the contents are valid
-    checkExtractedContents(inputG_swaps, inputG_interactions, soddi)
+    with timedStage(timings, "inputChecks"):
+        checkExtractedContents(inputG_swaps, inputG_interactions, [])
     # Map each node to a number (index in list) which will be used to identify it afterwards
+    with timedStage(timings, "idMapping"):
+        ids = idNodes(inputG_swaps)
+        adaptedG_swapsEdges, adaptedG_interactionsEdges, adaptedSODDI = adaptNodeNamesToIDs(ids, inputG_interactions,
+                                                                                            inputG_swaps, [])
+
+    # positions[i] is the position on which the node with ID i is routed: its ID itself, so that routing breaks its
+    # ties the same way with or without an artifactCache
+    positions = list(range(len(ids)))
+    topology = None
+    labelling = None
+    if artifactCache is not None:
+        with timedStage(timings, "artifactCache"):
+            # The topology as it was given is kept in memory under its own key, relabelled from the canonical one
+            exactKey = topologyKey(len(ids), adaptedG_swapsEdges, adaptedG_interactionsEdges)
+            topology = artifactCache.loadKept(exactKey)
+            if topology is None:
+                # A topology given exactly like this before skips finding its canonical labelling again
+                labelling = artifactCache.loadLabelling(exactKey)
+                if labelling is not None:
+                    key, canonicalPositions = labelling
+                else:
+                    # Topologies too costly to label canonically are cached as they come instead, only shared with
+                    # identical copies
+                    canonicalPositions = canonicalLabelling(len(ids), adaptedG_swapsEdges,
+                                                            adaptedG_interactionsEdges) or positions
+                    key = topologyKey(len(ids), *canonicalEdges(canonicalPositions, adaptedG_swapsEdges,
+                                                                adaptedG_interactionsEdges))
+                canonical = artifactCache.load(key)
+                if canonical is not None:
+                    topology = canonical if key == exactKey \
+                        else canonical.relabelled(_inversePermutation(canonicalPositions))
+                    artifactCache.keepLoaded(exactKey, topology)
+    if topology is None:
+        topology = validatedTopology(len(ids), adaptedG_swapsEdges, adaptedG_interactionsEdges, timings)
+        if artifactCache is not None:
+            with timedStage(timings, "artifactCache"):
+                artifactCache.store(key, topology if key == exactKey else topology.relabelled(canonicalPositions))
+                artifactCache.keepLoaded(exactKey, topology)
+                if labelling is None and key != exactKey:
+                    artifactCache.storeLabelling(exactKey, key, canonicalPositions)
+    # Route plans are in positions, so they are only shared with the topology given exactly like this
+    planCache = artifactCache.routePlanCache(exactKey, topology) if artifactCache is not None else None
+    return PreparedTopology(inputG_swaps, inputG_interactions, ids, positions, topology, planCache)
+
+
+def updatePreparedTopology(prepared, addedSwapEdges=(), removedSwapEdges=(), addedInteractionEdges=(),
+                           removedInteractionEdges=(), timings=None):
+    """
+    PreparedTopology of prepared with some edges (pairs of node names) removed and others added, whose RoutingTopology
+    is updated edge by edge with a DynamicRoutingTopology instead of being built again. Nodes keep their positions,
+    so new nodes cannot be added (nor can nodes be left without swap edges, since G_swaps must stay connected), but
+    get the IDs of the edited edge lists. Positions, and so routing ties, may still differ from preparing them again
+    (see updatedTopologyHandle). Raises the same exceptions as the input critics if the result is not a valid topology
+    """
+    positionOf = {name: prepared.positions[i] for i, name in enumerate(prepared.ids)}
+
+    def positionEdges(edges):
+        if any(node not in positionOf for edge in edges for node in edge):
+            raise ValueError(CONST_updateNodesNotInG_swapsMSG)
+        return [(positionOf[u], positionOf[v]) for u, v in edges]
+
+    with timedStage(timings, "topologyUpdate"):
+        dynamic = DynamicRoutingTopology(prepared.topology)
+        for u, v in positionEdges(removedSwapEdges):
+            dynamic.removeSwapEdge(u, v)
+        for u, v in positionEdges(addedSwapEdges):
+            dynamic.addSwapEdge(u, v)
+        for u, v in positionEdges(removedInteractionEdges):
+            dynamic.removeInteractionEdge(u, v)
+        for u, v in positionEdges(addedInteractionEdges):
+            if u == v:
+                raise Exception(CONST_gInteractionsLoopsMSG)
+            dynamic.addInteractionEdge(u, v)
+        if not dynamic.isConnected():
+            raise Exception(CONST_gSwapsMustBeConnectedMSG)
+        if dynamic.numInteractionEdges() == 0:
+            raise Exception(CONST_gInteractionsHasNoEdgeMSG)
+        topology = dynamic.topology()
+    inputG_swaps = editedEdges(prepared.inputG_swaps, addedSwapEdges, removedSwapEdges, directed=False)
+    inputG_interactions = editedEdges(prepared.inputG_interactions, addedInteractionEdges, removedInteractionEdges,
+                                      directed=True)
+    # The IDs are those of the edited edge lists, as preparing them again would give, while every node stays on its
+    # position so that the topology still applies
     ids = idNodes(inputG_swaps)
-    adaptedG_swapsEdges, adaptedG_interactionsEdges, adaptedSODDI = adaptNodeNamesToIDs(ids, inputG_interactions,
-                                                                                        inputG_swaps, soddi)
-    # Create the actual graphs and check them
-    G_swaps = nx.Graph()
-    G_swaps.add_nodes_from(range(len(ids)))
-    G_swaps.add_edges_from(adaptedG_swapsEdges)
-    checkingG_swaps(G_swaps)
-    G_interactions = nx.DiGraph()
-    G_interactions.add_nodes_from(range(len(ids)))
-    G_interactions.add_edges_from(adaptedG_interactionsEdges)
-    checkingG_interactions(G_interactions)
-    # Check SODDI
-    checkingSODDI(adaptedSODDI, len(ids))
-    # From this point on, we are ready to manipulate the graphs as we wish
-    newG_swaps, newG_interactions, allSwapSteps = swapsRequired(G_swaps, G_interactions, adaptedSODDI)
+    positions = [positionOf[name] for name in ids]
+    return PreparedTopology(inputG_swaps, inputG_interactions, ids, positions, topology, RoutePlanCache())
+
+
+def _inversePermutation(permutation):
+    inverse = [0] * len(permutation)
+    for i, value in enumerate(permutation):
+        inverse[value] = i
+    return inverse
+
+
+def editedEdges(edges, addedEdges, removedEdges, directed):
+    """
+    Edge list with removedEdges taken out and addedEdges that are not in it yet appended, edges going both ways
+    unless directed
+    """
+    def bothWays(edgeSet):
+        return edgeSet if directed else edgeSet | {(v, u) for u, v in edgeSet}
+
+    removed = bothWays({tuple(edge) for edge in removedEdges})
+    edited = [edge for edge in edges if tuple(edge) not in removed]
+    present = bothWays({tuple(edge) for edge in edited})
+    for edge in addedEdges:
+        if tuple(edge) not in present:
+            edited.append(tuple(edge))
+            present |= bothWays({tuple(edge)})
+    return edited
+
+
+def routePreparedTopology(prepared, soddi, timings=None, trace=None, planCache=None, budget=None, checkpoints=None):
+    """
+    Second half of coreExecution: routes the SODDI on a PreparedTopology and returns (totalSwaps,
+    renamedAllSwapSteps, ids). Unless a RoutePlanCache is given, the one of the PreparedTopology is used. With a
+    RoutingBudget, the swap steps are those of the entries routed before it ran out (from its startIndex on, if it
+    resumes from another one). With a PrefixCheckpointCache, the longest prefix of the SODDI routed before is reused,
+    without counting against the budget, unless every entry has to be traced
+    """
+    routedSODDI = checkedRoutedSODDI(prepared, soddi, timings)
+    if planCache is None:
+        planCache = prepared.planCache
+    allSwapSteps = None
+    if checkpoints is not None and trace is None:
+        allSwapSteps = routeAfterLongestPrefix(prepared, routedSODDI, checkpoints, timings, planCache, budget)
+    if allSwapSteps is None:
+        allSwapSteps, finalState = routeSODDI(prepared.topology, routedSODDI, timings=timings, trace=trace,
+                                               planCache=planCache, budget=budget)
     # Rename every node in allSwapSteps to the original names
-    renamedAllSwapSteps = revertAllSwapStepsNames(allSwapSteps, ids)
+    with timedStage(timings, "idMapping"):
+        renamedAllSwapSteps = revertAllSwapStepsNames(allSwapSteps, prepared.namesOnPositions)
     totalSwaps = len([x for x in renamedAllSwapSteps if type(x) is tuple])
     print("SODDI: " + str(soddi))
     print("Swap steps: " + str(renamedAllSwapSteps))
     print("Total number of swaps required: " + str(totalSwaps))
-    return totalSwaps, renamedAllSwapSteps, ids
+    return totalSwaps, renamedAllSwapSteps, prepared.ids
+
+
+def routeAfterLongestPrefix(prepared, routedSODDI, checkpoints, timings=None, planCache=None, budget=None):
+    """
+    Swap steps (in labels) of the SODDI, already mapped to positions, of which only the entries after the longest
+    prefix found in the PrefixCheckpointCache are routed, under the RoutingBudget if any. The entries routed in full
+    are then kept in it too. If the budget resumes from an entry past that prefix, None is returned instead, since
+    the state to resume from is not known to the checkpoints (see budgetStoppedAt)
+    """
+    entries = iterRouteAfterLongestPrefix(prepared, routedSODDI, checkpoints, timings, planCache, budget)
+    if entries is None:
+        return None
+    return [step for swapSteps in entries for step in swapSteps]
+
+
+def iterRouteAfterLongestPrefix(prepared, routedSODDI, checkpoints, timings=None, planCache=None, budget=None):
+    """
+    Streaming version of routeAfterLongestPrefix: looks the prefix up straight away, and then returns an iterator over
+    the swap steps (in labels) of each entry, those of the prefix first. The entries routed in full are kept once the
+    iterator is exhausted or closed, so a stream given up halfway still leaves its prefix for the next one
+    """
+    handle = checkpointsHandle(prepared)
+    with timedStage(timings, "prefixCheckpoints"):
+        routedPrefix, state = checkpoints.longestPrefix(handle, routedSODDI, prepared.topology.numNodes)
+    startIndex = budget.startIndex() if budget is not None else 0
+    if len(routedPrefix.entrySteps) < startIndex:
+        return None
+    return _iterEntriesAfterPrefix(prepared, routedSODDI, checkpoints, handle, routedPrefix, state, startIndex,
+                                   timings, planCache, budget)
+
+
+def _iterEntriesAfterPrefix(prepared, routedSODDI, checkpoints, handle, routedPrefix, state, startIndex, timings,
+                            planCache, budget):
+    numReused = len(routedPrefix.entrySteps)
+    if budget is not None:
+        budget.entriesReused = numReused - startIndex
+    try:
+        yield from routedPrefix.entrySteps[startIndex:]
+        for swapSteps in iterRouteSODDI(prepared.topology, routedSODDI, state=state, timings=timings,
+                                        planCache=planCache, budget=budget, startIndex=numReused):
+            # Entries routed the cheap way are not what routing them in full would give, so they are not kept
+            if budget is None or not budget.degradedEntries:
+                routedPrefix.addEntry(swapSteps, state)
+            yield swapSteps
+    finally:
+        checkpoints.put(handle, routedPrefix)
+
+
+def checkpointsHandle(prepared):
+    """
+    Key of a PreparedTopology in a PrefixCheckpointCache. Steps are kept in positions, which are not always the same
+    for the same topology (see updatePreparedTopology), so they are part of it
+    """
+    return topologyHandle(prepared.inputG_swaps, prepared.inputG_interactions), tuple(prepared.positions)
+
+
+def budgetStoppedAt(prepared, soddi, resumeIndex, checkpoints=None, timings=None):
+    """
+    RoutingBudget that stopped routing the SODDI right before the entry resumeIndex, so that a new budget can resume
+    from it, for when only that index is known (as in a request of the app). The state after the entries before it is
+    taken from the PrefixCheckpointCache, where a budget that stopped there kept them, and whatever entries are
+    missing from it are routed again (and kept)
+    """
+    routedSODDI = checkedRoutedSODDI(prepared, soddi, timings)
+    if type(resumeIndex) is not int or not 0 <= resumeIndex <= len(routedSODDI):
+        raise ValueError(CONST_resumeIndexOutOfRangeMSG)
+    prefix = routedSODDI[:resumeIndex]
+    if checkpoints is not None:
+        handle = checkpointsHandle(prepared)
+        with timedStage(timings, "prefixCheckpoints"):
+            routedPrefix, state = checkpoints.longestPrefix(handle, prefix, prepared.topology.numNodes)
+        for swapSteps in iterRouteSODDI(prepared.topology, prefix, state=state, timings=timings,
+                                        planCache=prepared.planCache, startIndex=len(routedPrefix.entrySteps)):
+            routedPrefix.addEntry(swapSteps, state)
+        checkpoints.put(handle, routedPrefix)
+    else:
+        state = routeSODDI(prepared.topology, prefix, timings=timings, planCache=prepared.planCache)[1]
+    stopped = RoutingBudget()
+    stopped.stop(resumeIndex, state)
+    return stopped
+
+
+def iterRoutePreparedTopology(prepared, soddi, timings=None, planCache=None, budget=None, checkpoints=None):
+    """
+    Streaming version of routePreparedTopology: checks the whole SODDI straight away, and then returns an iterator
+    over the renamed swap steps of each of its entries, each one routed when it is asked for (see iterRouteSODDI).
+    With a PrefixCheckpointCache, the entries of the longest prefix routed before come first, without being routed
+    """
+    routedSODDI = checkedRoutedSODDI(prepared, soddi, timings)
+    if planCache is None:
+        planCache = prepared.planCache
+    entries = None
+    if checkpoints is not None:
+        entries = iterRouteAfterLongestPrefix(prepared, routedSODDI, checkpoints, timings, planCache, budget)
+    if entries is None:
+        entries = iterRouteSODDI(prepared.topology, routedSODDI, timings=timings, planCache=planCache, budget=budget)
+    return (revertAllSwapStepsNames(swapSteps, prepared.namesOnPositions) for swapSteps in entries)
+
+
+def checkedRoutedSODDI(prepared, soddi, timings=None):
+    """
+    Checks the SODDI and maps it to the positions of the PreparedTopology
+    """
+    with timedStage(timings, "inputChecks"):
+        checkExtractedContents([], [], soddi)
+    with timedStage(timings, "idMapping"):
+        adaptedG_swapsEdges, adaptedG_interactionsEdges, adaptedSODDI = adaptNodeNamesToIDs(prepared.ids, [], [],
+                                                                                            soddi)
+    # Check SODDI
+    with timedStage(timings, "inputChecks"):
+        checkingSODDI(adaptedSODDI, len(prepared.ids))
+    positions = prepared.positions
+    return [(positions[x], positions[y]) for x, y in adaptedSODDI]
+
+
+def invalidSODDIMessage(prepared, soddi):
+    """
+    Why the SODDI cannot be routed on the PreparedTopology, for the checks that would otherwise exit (instead of
+    raising an exception), or None if it passes them
+    """
+    if not isValidList(soddi):
+        return CONST_batchSODDIBadFormatMSG
+    names = set(prepared.ids)
+    if any(node not in names for pair in soddi for node in pair):
+        return CONST_batchSODDINodesNotInG_swapsMSG
+    return None
+
+
+def coreExecutionBatch(inputG_swaps, inputG_interactions, soddis, maxWorkers=None, useProcesses=False,
+                       artifactCache=None):
+    """
+    coreExecution of every SODDI in soddis on the same topology, which is only validated and preprocessed once (see
+    routePreparedTopologyBatch)
+    """
+    prepared = prepareTopology(inputG_swaps, inputG_interactions, artifactCache=artifactCache)
+    return routePreparedTopologyBatch(prepared, soddis, maxWorkers, useProcesses)
+
+
+def routePreparedTopologyBatch(prepared, soddis, maxWorkers=None, useProcesses=False):
+    """
+    Routes every SODDI in soddis on a PreparedTopology, in a pool of maxWorkers threads (or processes if useProcesses,
+    each of which gets the topology only once). Returns, in the same order as soddis, either the (totalSwaps,
+    renamedAllSwapSteps, ids) of each SODDI or the exception that made it fail, so that one invalid SODDI does not
+    fail the whole batch
+    """
+    if useProcesses:
+        pool = ProcessPoolExecutor(maxWorkers, initializer=_setBatchWorkerTopologies, initargs=({None: prepared},))
+        task = functools.partial(_routeOnBatchWorkerTopology, None)
+    else:
+        pool = ThreadPoolExecutor(maxWorkers)
+        task = functools.partial(routeBatchItem, prepared)
+    with pool:
+        return list(pool.map(task, soddis))
+
+
+def coreExecutionFiles(inputFileNames, maxWorkers=None):
+    """
+    coreExecution of every input file, in a pool of maxWorkers processes. Files are first grouped by topology (see
+    topologyHandle), so that each one is only prepared once, also in parallel, and sent to every worker only once.
+    Returns, in the same order as inputFileNames, either the solution of each file or the exception that made it fail
+    """
+    inputs = [_readBatchInputFile(inputFileName) for inputFileName in inputFileNames]
+    # Edge lists of each distinct topology, by handle
+    topologies = {}
+    for fileInput in inputs:
+        if not isinstance(fileInput, Exception):
+            topologies.setdefault(fileInput[0], fileInput[1:3])
+
+    with ProcessPoolExecutor(maxWorkers) as pool:
+        preparedTopologies = dict(zip(topologies, pool.map(_prepareBatchTopology, topologies.values())))
+    for fileIndex, fileInput in enumerate(inputs):
+        if not isinstance(fileInput, Exception) and isinstance(preparedTopologies[fileInput[0]], Exception):
+            inputs[fileIndex] = preparedTopologies[fileInput[0]]
+
+    toRoute = [(fileInput[0], fileInput[3]) for fileInput in inputs if not isinstance(fileInput, Exception)]
+    workerTopologies = {handle: prepared for handle, prepared in preparedTopologies.items()
+                        if not isinstance(prepared, Exception)}
+    with ProcessPoolExecutor(maxWorkers, initializer=_setBatchWorkerTopologies, initargs=(workerTopologies,)) as pool:
+        # Several SODDIs per message, but still enough messages to keep every worker busy until the end
+        chunkSize = max(1, len(toRoute) // (4 * (maxWorkers or os.cpu_count() or 1)))
+        routed = iter(pool.map(_routeOnBatchWorkerTopology, *zip(*toRoute), chunksize=chunkSize) if toRoute else [])
+        return [fileInput if isinstance(fileInput, Exception) else next(routed) for fileInput in inputs]
+
+
+def routeBatchItem(prepared, soddi):
+    """
+    routePreparedTopology for one SODDI of a batch, returning the exception instead of raising it (or exiting)
+    """
+    try:
+        message = invalidSODDIMessage(prepared, soddi)
+        if message is not None:
+            raise ValueError(message)
+        return routePreparedTopology(prepared, soddi)
+    except Exception as error:
+        return error
+
+
+def _readBatchInputFile(inputFileName):
+    """
+    (handle, inputG_swaps, inputG_interactions, soddi) of an input file of a batch, or the exception if it is not valid
+    """
+    try:
+        inputG_swaps, inputG_interactions, soddi = retrieveJSONFields(inputFileName)
+        return topologyHandle(inputG_swaps, inputG_interactions), inputG_swaps, inputG_interactions, soddi
+    except SystemExit:
+        return ValueError(CONST_batchInvalidInputFileMSG)
+    except Exception as error:
+        return error
+
+
+def _prepareBatchTopology(topology):
+    inputG_swaps, inputG_interactions = topology
+    try:
+        return prepareTopology(inputG_swaps, inputG_interactions)
+    except SystemExit:
+        return ValueError(CONST_batchInvalidTopologyMSG)
+    except Exception as error:
+        return error
+
+
+# PreparedTopology objects of each worker process of a batch, by handle
+_batchWorkerTopologies = {}
+
+
+def _setBatchWorkerTopologies(preparedTopologies):
+    global _batchWorkerTopologies
+    _batchWorkerTopologies = preparedTopologies
+
+
+def _routeOnBatchWorkerTopology(handle, soddi):
+    return routeBatchItem(_batchWorkerTopologies[handle], soddi)
+
+
+def validatedTopology(numNodes, swapEdges, interactionEdges, timings=None):
+    """
+    Checks G_swaps and G_interactions, given as edge lists of nodes 0 to numNodes - 1, and builds their RoutingTopology
+    """
+    # Create the actual graphs and check them
+    with timedStage(timings, "inputChecks"):
+        G_swaps = nx.Graph()
+        G_swaps.add_nodes_from(range(numNodes))
+        G_swaps.add_edges_from(swapEdges)
+        checkingG_swaps(G_swaps)
+        G_interactions = nx.DiGraph()
+        G_interactions.add_nodes_from(range(numNodes))
+        G_interactions.add_edges_from(interactionEdges)
+        checkingG_interactions(G_interactions)
+    # From this point on, routing runs on the compact topology built straight from the edge lists
+    with timedStage(timings, "topologyBuild"):
+        return RoutingTopology(numNodes, swapEdges, interactionEdges)
 
 
 def processNodesAndEdgesForJSVisual(inputG_swaps, inputG_interactions, soddi, node_colour="#9CC3D5FF", node_size=50,
@@ -185,7 +609,27 @@ def processNodesAndEdgesForJSVisual(inputG_swaps, inputG_interactions, soddi, no
     checkExtractedContents(inputG_swaps, inputG_interactions, soddi)
     # Map each node to a number (index in list) which will be used to identify it afterwards
     ids = idNodes(inputG_swaps)
+    return nodesAndEdgesForJSVisual(inputG_swaps, inputG_interactions, ids, node_colour, node_size, swap_edge_colour,
+                                    swap_edge_width, interaction_edge_colour, interaction_edge_width,
+                                    overlap_edge_colour, overlap_edge_width)
+
+
+def processPreparedTopologyForJSVisual(prepared, soddi):
+    """
+    Same as processNodesAndEdgesForJSVisual for a PreparedTopology, which keeps the result for the next time
+    """
+    checkExtractedContents([], [], soddi)
+    if prepared.visual is None:
+        prepared.visual = nodesAndEdgesForJSVisual(prepared.inputG_swaps, prepared.inputG_interactions, prepared.ids)
+    return prepared.visual
 
+
+def nodesAndEdgesForJSVisual(inputG_swaps, inputG_interactions, ids, node_colour="#9CC3D5FF", node_size=50,
+			swap_edge_colour="#0a3780", swap_edge_width=4, interaction_edge_colour="#FFC400", interaction_edge_width=4,
+			overlap_edge_colour="#ff00ae", overlap_edge_width=4):
+    """
+    Lists with dictionaries with information regarding the nodes and edges, once the contents have been checked
+    """
     #WARNING remember that went making edges, you want to join the IDs and not the labels. For the IDs, use ids.index()
 
     #Lists of dictionaries to be returned
@@ -241,13 +685,27 @@ def revertAllSwapStepsNames(allSwapSteps, ids):
     return renamedAllSwapSteps
 
 
+def iterEntrySwapSteps(allSwapSteps):
+    """
+    Iterator over the swap steps of each entry of a SODDI, split from the swap steps of the whole SODDI, in which every
+    entry ends with its "#" (or is just "Done already")
+    """
+    swapSteps = []
+    for step in allSwapSteps:
+        swapSteps.append(step)
+        if type(step) is not tuple:
+            yield swapSteps
+            swapSteps = []
+
+
 def adaptNodeNamesToIDs(ids, inputG_swaps, inputG_interactions, soddi):
     try:
         print("IDs: " + str(ids))
-        adaptedG_swapsEdges = [[ids.index(x), ids.index(y)] for x, y in inputG_swaps]
-        adaptedG_interactionsEdges = [[ids.index(x), ids.index(y)] for x, y in inputG_interactions]
-        adaptedSODDI = [(ids.index(x), ids.index(y)) for x, y in soddi]
-    except ValueError:
+        idOf = {node: i for i, node in enumerate(ids)}
+        adaptedG_swapsEdges = [[idOf[x], idOf[y]] for x, y in inputG_swaps]
+        adaptedG_interactionsEdges = [[idOf[x], idOf[y]] for x, y in inputG_interactions]
+        adaptedSODDI = [(idOf[x], idOf[y]) for x, y in soddi]
+    except KeyError:
         print("Nodes in G_interactions and SODDI must be in G_swaps")
         sys.exit(-1)
     return adaptedG_interactionsEdges, adaptedG_swapsEdges, adaptedSODDI
@@ -264,12 +722,57 @@ def idNodes(inputG_swaps):
 
 def main(argv):
     # Check that the arguments input in the shell are valid
-    inputFileName, outputFileName, opts = checkValidArgs(argv)
+    inputFileNames, outputFileName, opts = checkValidArgs(argv)
+    showTimings = any(opt in ("-t", "--timings") for opt, arg in opts)
+    traceFileName = next((arg for opt, arg in opts if opt in ("-r", "--trace")), None)
+    maxWorkers = next((int(arg) for opt, arg in opts if opt in ("-w", "--workers")), None)
+
+    if len(inputFileNames) > 1:
+        start = time.perf_counter()
+        solutions = coreExecutionFiles(inputFileNames, maxWorkers)
+        seconds = time.perf_counter() - start
+        for inputFileName, solution in zip(inputFileNames, solutions):
+            if isinstance(solution, Exception):
+                print("%s failed: %s" % (inputFileName, solution))
+            writeSolution(outputFileFor(inputFileName, outputFileName, len(inputFileNames)), solution)
+        if showTimings:
+            print("%d input files routed in %.3f seconds (%.1f per second)" % (len(inputFileNames), seconds,
+                                                                                len(inputFileNames) / seconds))
+        return
 
     # Check that these files are in the correct format (JSON, G_swaps, G_interactions, SODDI, etc.)
-    inputG_swaps, inputG_interactions, soddi = retrieveJSONFields(inputFileName)
-
-    coreExecution(inputG_interactions, inputG_swaps, soddi)
+    inputG_swaps, inputG_interactions, soddi = retrieveJSONFields(inputFileNames[0])
+
+    timings = StageTimings() if showTimings else None
+    trace = RoutingTrace() if traceFileName else None
+    planCache = RoutePlanCache()
+    solution = coreExecution(inputG_swaps, inputG_interactions, soddi, timings, trace, planCache)
+    writeSolution(outputFileFor(inputFileNames[0], outputFileName, 1), solution)
+    if showTimings:
+        print(timings.formattedReport())
+        stats = planCache.stats()
+        print("Route plan cache: %d hits, %d misses (hit rate %.1f%%)" % (stats["hits"], stats["misses"],
+                                                                          stats["hitRate"] * 100))
+    if trace is not None:
+        trace.write(traceFileName)
+        print("Trace written to: " + traceFileName)
+
+
+def writeSolution(outputFileName, solution):
+    """
+    Writes the solution of coreExecution (or the exception that made it fail) as JSON, if there is an output file
+    """
+    if outputFileName is None:
+        return
+    if isinstance(solution, Exception):
+        contents = {"ERROR": str(solution)}
+    else:
+        totalSwaps, swapSteps, ids = solution
+        contents = {"totalSwaps": totalSwaps, "swapSteps": swapSteps, "ids": ids}
+    if os.path.dirname(outputFileName):
+        os.makedirs(os.path.dirname(outputFileName), exist_ok=True)
+    with open(outputFileName, "w") as outputFile:
+        json.dump(contents, outputFile)
 
 if __name__ == "__main__":
     if len(sys.argv) == 1:
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+CONST_defaultRoutePlanCacheSize = 4096
+
+
+class RoutePlanCache:
+    """
+    LRU cache of route plans on one RoutingTopology. On a fixed device, the pin-pen combo chosen for a desired
+    interaction only depends on the positions iSource and iTarget are sitting on (and on extraLevelsToConsider), not on
+    their labels, so the plan found once can be reused every time the same pair of positions shows up again. A plan is
+    the bestPinPen tuple given to executeSwaps, plus the mergePaths branch and evaluatePathsInteraction situation that
+    led to it. Only the maxSize most recently used plans are kept (with a maxSize of 0, nothing is cached). It may be
+    shared by the requests of the app and the threads of a batch, hence the lock
+    """
+    __slots__ = ("topology", "maxSize", "plans", "hits", "misses", "lock")
+
+    def __init__(self, maxSize=CONST_defaultRoutePlanCacheSize):
+        self.topology = None
+        self.maxSize = maxSize
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def useWith(self, topology):
+        """
+        Plans are only valid on the topology they were found on, so they are dropped if the cache starts being used
+        with a different one. The hits and misses keep adding up
+        """
+        with self.lock:
+            if topology is not self.topology:
+                self.topology = topology
+                self.plans.clear()
+
+    def get(self, iSource, iTarget, extraLevelsToConsider=0):
+        """
+        Plan for the positions iSource and iTarget, or None if it is not cached. executeSwaps alters the paths it is
+        given, so each hit gets its own copy of them
+        """
+        key = (iSource, iTarget, extraLevelsToConsider)
+        with self.lock:
+            plan = self.plans.get(key)
+            if plan is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.plans.move_to_end(key)
+        (bestPinPenCombo, bestPinPenComboSwaps, (dictatorPath, soldierPath, dictatorFirst)), mergeBranch, situation = plan
+        return (bestPinPenCombo, bestPinPenComboSwaps, (list(dictatorPath), list(soldierPath), dictatorFirst)), \
+            mergeBranch, situation
+
+    def put(self, iSource, iTarget, extraLevelsToConsider, bestPinPen, mergeBranch=None, situation=None):
+        """
+        Stores the plan (a copy of it, since executeSwaps will alter the paths), evicting the least recently used one
+        if the cache is full
+        """
+        if self.maxSize <= 0:
+            return
+        bestPinPenCombo, bestPinPenComboSwaps, (dictatorPath, soldierPath, dictatorFirst) = bestPinPen
+        key = (iSource, iTarget, extraLevelsToConsider)
+        plan = ((bestPinPenCombo, bestPinPenComboSwaps, (list(dictatorPath), list(soldierPath), dictatorFirst)),
+                mergeBranch, situation)
+        with self.lock:
+            self.plans[key] = plan
+            self.plans.move_to_end(key)
+            if len(self.plans) > self.maxSize:
+                self.plans.popitem(last=False)
+
+    def stats(self):
+        """
+        Dictionary with the hits, misses, hit rate and size of the cache
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hitRate": self.hits / lookups if lookups else 0.0,
+                    "size": len(self.plans), "maxSize": self.maxSize}
+
+    def __reduce__(self):
+        # Pickled empty (for example, to be sent to worker processes along with a PreparedTopology), since the lock
+        # cannot be pickled and each process finds its own plans
+        return RoutePlanCache, (self.maxSize,)
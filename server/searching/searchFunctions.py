@@ -1,24 +1,64 @@
 import copy
+import itertools
+from collections import deque
 
 import networkx as nx
+import numpy as np
 
-from evaluation.pathsInteractions import evaluatePathsInteraction
+from evaluation.pathsInteractions import evaluatePathsInteractionWithCase
+from instrumentation.routingTrace import countWork
+from instrumentation.stageTimings import timedStage
 
 CONST_gInteractionsHasNoActiveOrPassiveNodesMSG = "G_interaction has no edges. The function checkingG_interactions " \
                                                   "should have caught this."
 
+# evaluatePathsInteraction only ever changes the swaps of one side of a combo (the dictator or the soldier), by one
+# swap, so the swaps of a combo are never more than this far from its base cost
+CONST_maxExtraSwapsPerCombo = 1
+# Below this many (pin, pendulum) pairs, scoring them in a Python loop is faster than with NumPy
+CONST_vectorizedScoringMinPairs = 32
 
-def findActiveNeighbours(G_interactions, target):
+# Branches of mergePaths
+CONST_mergePath2InsidePath1 = "path2InsidePath1"
+CONST_mergePath1InsidePath2 = "path1InsidePath2"
+CONST_mergeTailsOverlap = "tailsOverlap"
+CONST_mergeHeadsOverlap = "headsOverlap"
+CONST_mergeNotRequired = "notRequired"
+
+
+def findActiveNeighbours(G_interactions, target, topology=None):
     """
-    Input is target, output is a list of nodes that aim at target
+    Input is target, output is a list of nodes that aim at target, in ascending order. Only the predecessors of target
+    are looked at (or its slice of the in-neighbour index of a RoutingTopology), so this is O(in-degree of target)
     """
-    nodesAimingAtTarget = [node for node in range(len(list(G_interactions.nodes)))
-                           if target in G_interactions.neighbors(node)]
+    if topology is not None:
+        return topology.activeNeighbours(target)
+
+    return sorted(G_interactions.predecessors(target))
 
-    return nodesAimingAtTarget
+
+def findPassiveNeighbours(G_interactions, source, topology=None):
+    """
+    Input is source, output is a list of nodes that source aims at
+    """
+    if topology is not None:
+        return topology.passiveNeighbours(source)
+
+    return list(G_interactions.neighbors(source))
+
+
+def shortestSwapPath(G_swaps, source, target, topology=None):
+    """
+    Shortest path in G_swaps from source to target. If a RoutingTopology is given, the path is read from its next-hop
+    table instead of searching the graph again
+    """
+    if topology is None:
+        return nx.shortest_path(G_swaps, source, target)
+    return topology.shortestPath(source, target)
 
 
-def bfsCheckingNeighbours(G_swaps, G_interactions, root: int, lookForPassive=True, extraLevelsToConsider=0):
+def bfsCheckingNeighbours(G_swaps, G_interactions, root: int, lookForPassive=True, extraLevelsToConsider=0,
+                          topology=None, counters=None):
     """
     Checking all of the neighbours of the given start node to see if they are active or passive, depending on the
     boolean. Once we find a desired node, we add it to the list desiredNodes, and we only continue checking nodes that
@@ -28,8 +68,15 @@ def bfsCheckingNeighbours(G_swaps, G_interactions, root: int, lookForPassive=Tru
         2) Depth (/distance from root/number of swaps for root to take the place of node
         3) Assigned Placeholder (whether the target or the source is meant to replace it)
         4) Path from root to node
-    Note that we will not keep track of the assigned placeholder nor path until it is a desired node. This is just for
-    performance improvement purposes.
+    While searching, only the parent of each node is recorded, so the search is O(V+E); the paths are only rebuilt from
+    the parents for the desired nodes once the search is over. If a RoutingTopology is given, the paths are read from
+    its tables instead. If counters are given (see RoutingTrace), the nodes dequeued and the paths built are counted in
+    them.
+
+    Nodes on the same level are found in the order G_swaps lists the neighbours of each node, and on a tie the pin found
+    first wins (see findBestPinPenCombo). Since routing happens in position space, G_swaps is the input graph as given,
+    whose neighbour order stays the same for the whole SODDI; it used to be relabelled after every entry, which reordered
+    the neighbours, so ties between pins at the same depth, and with them the total swaps, can differ from then.
     """
     # TODO: check how the parameter extraLevelsToConsider affects the number of swaps later on on average
     if extraLevelsToConsider < 0: # Negative numbers are invalid, so the default becomes 0
@@ -37,85 +84,139 @@ def bfsCheckingNeighbours(G_swaps, G_interactions, root: int, lookForPassive=Tru
     elif type(extraLevelsToConsider) != int:
         raise Exception("extraLevelsToConsider is not an int")
 
-    # Visited will contain ints of the nodes visited
+    # Parents will contain the node from which each visited node was reached (so it also tells us which are visited)
     # Queue will contain tuples of the form (node, depth of node from root)
-    # When we obtain a desired node, we will add the assigned placeholder and the path from the root
-    # This will later help to keep track of the number of swaps necessary and what it is supposed to replace
-    # "s" is for "source" and "t" is for "target"
-    visited = []  # List of ints
-    queue = []  # List of tuples of ints
-    visited.append(root)
-    queue.append((root, 0))
+    # When we obtain a desired node, we only keep it with its depth. The assigned placeholder and the path from the
+    # root are added at the end. "s" is for "source" and "t" is for "target"
+    parents = {root: None}
+    queue = deque([(root, 0)])
+    assignedPlaceholder = "t" if lookForPassive else "s"
+    isDesired = G_interactions.in_degree if lookForPassive else G_interactions.out_degree
 
-    desiredNodes = []  # All of the nodes that meet the requirements
+    desiredNodes = []  # All of the nodes that meet the requirements, as (node, depth)
 
-    while len(queue) > 0:
-        newStartNode = queue.pop(0)
+    while queue:
+        node, depth = queue.popleft()
+        countWork(counters, "pinSearchNodesScanned")
 
         # "SHORT BASE CASE"
-        # If we have already some desired nodes and this newStartNode has a depth greater than the desired nodes plus
-        # the extra levels that are to be considered, we stop the search and return the desired nodes.
-        if len(desiredNodes) > 0 and newStartNode[1] > desiredNodes[0][1] + extraLevelsToConsider:
-            # We have checked the entire level of the desired nodes, so we return the desired nodes
-            return desiredNodes
-
-        # NOTE: the last parameter in this function allows for admitting pins that are at a depth greater than the node
-        # with the shallowest depth. There is a certain trade-off by increasing this number, since you could either find
-        # a better option or have wasted time and effort looking for a non-existent better node.
-
-        # LOOKING FOR DESIRED NODES
-        #TODO: improve this if else. There is probably a nicer and shorter way to do this,since the only thing that
-        # changes is the assigned placeholder ("s" and "t"). However, I don't want this to unpack and repack all nodes,
-        # just the ones that meet the conditions, for the sake of performance.
-        if lookForPassive and G_interactions.in_degree(newStartNode[0]) > 0:  # Looking for passive nodes
-            # If this new node is a desired node, we first unpack it
-            desiredNode, depth = newStartNode
-
-            # Then we repack it into another node with more information
-            pathIncludedDesiredNode = (desiredNode, depth, "t",
-                                       nx.shortest_path(G_swaps, root, desiredNode))
-
-            # Finally, we add it to the list of desiredNodes
-            desiredNodes.append(pathIncludedDesiredNode)
-
-        if not lookForPassive and G_interactions.out_degree(newStartNode[0]) > 0:  # Looking for active nodes
-            # If this new node is a desired node, we first unpack it
-            desiredNode, depth = newStartNode
-
-            # Then we repack it into another node with more information
-            pathIncludedDesiredNode = (desiredNode, depth, "s",
-                                       nx.shortest_path(G_swaps, root, desiredNode))
-
-            # Finally, we add it to the list of desiredNodes
-            desiredNodes.append(pathIncludedDesiredNode)
+        # If we have already some desired nodes and this node has a depth greater than the desired nodes plus the
+        # extra levels that are to be considered, we have checked every level we wanted, so we stop the search.
+        if desiredNodes and depth > desiredNodes[0][1] + extraLevelsToConsider:
+            break
+
+        # NOTE: extraLevelsToConsider allows for admitting pins that are at a depth greater than the node with the
+        # shallowest depth. There is a certain trade-off by increasing this number, since you could either find a
+        # better option or have wasted time and effort looking for a non-existent better node.
+
+        # LOOKING FOR DESIRED NODES (passive nodes have incoming interaction edges, active ones outgoing edges)
+        if isDesired(node) > 0:
+            desiredNodes.append((node, depth))
 
         # PREPARING FOR THE NEXT ITERATIONS
-        for neighbour in list(G_swaps.neighbors(newStartNode[0])):
-            if neighbour not in visited:
-                visited.append(neighbour)
-                queue.append((neighbour, newStartNode[1] + 1))  # These nodes will have a depth of 1 more
+        for neighbour in G_swaps.neighbors(node):
+            if neighbour not in parents:
+                parents[neighbour] = node
+                queue.append((neighbour, depth + 1))  # These nodes will have a depth of 1 more
 
     if not desiredNodes:
         # If this point of the code is reached, then no passive nodes have been found, which means there is no edge in
         # G_interactions, which is a problem that the input critics should have caught
         raise Exception(CONST_gInteractionsHasNoActiveOrPassiveNodesMSG)
 
-    # This point is reached when there are no more neighbours to explore (we reach the leaf nodes of the tree graph)
+    def pathFromRoot(node):
+        path = [node]
+        while parents[path[-1]] is not None:
+            path.append(parents[path[-1]])
+        path.reverse()
+        return path
+
+    countWork(counters, "shortestPathCalls", len(desiredNodes))
+    if topology is not None:
+        return [(node, depth, assignedPlaceholder, topology.shortestPath(root, node)) for node, depth in desiredNodes]
+    return [(node, depth, assignedPlaceholder, pathFromRoot(node)) for node, depth in desiredNodes]
+
+
+def findPinNodes(topology, root: int, lookForPassive=True, extraLevelsToConsider=0, counters=None):
+    """
+    Same output as bfsCheckingNeighbours, but answered from the nearest-active/nearest-passive index of a
+    RoutingTopology instead of searching the graph again. Nodes on the same level are given in ascending order, not in
+    the order bfsCheckingNeighbours reaches them, so on a tie between pins at the same depth (see findBestPinPenCombo)
+    the lowest position wins. Whenever G_swaps does not list neighbours in ascending order, this can choose another pin,
+    and give another total, than the BFS did. The first time a root is asked for, every position is scanned, which is
+    what is counted in counters
+    """
+    if extraLevelsToConsider < 0:  # Negative numbers are invalid, so the default becomes 0
+        extraLevelsToConsider = 0
+    elif type(extraLevelsToConsider) != int:
+        raise Exception("extraLevelsToConsider is not an int")
+
+    if not topology.hasPinCandidates(root, lookForPassive, extraLevelsToConsider):
+        countWork(counters, "pinSearchNodesScanned", topology.numNodes)
+
+    assignedPlaceholder = "t" if lookForPassive else "s"
+    desiredNodes = [(node, depth, assignedPlaceholder, topology.shortestPath(root, node))
+                    for node, depth in topology.pinCandidates(root, lookForPassive, extraLevelsToConsider)]
+
+    if not desiredNodes:
+        # Same as in bfsCheckingNeighbours, the input critics should have caught this
+        raise Exception(CONST_gInteractionsHasNoActiveOrPassiveNodesMSG)
+
+    countWork(counters, "shortestPathCalls", len(desiredNodes))
     return desiredNodes
 
 
-def findBestPinPenCombo(G_swaps, G_interactions, allPinNodes, iSource, iTarget):
+def findBestPinPenCombo(G_swaps, G_interactions, allPinNodes, iSource, iTarget, topology=None, timings=None,
+                        counters=None):
     """
     From all the pin nodes obtained, we want to find the corresponding best pendulum, and then we want to find the best
-    combination of pin and pendulum, which is the one which will require the fewest swaps.
+    combination of pin and pendulum, which is the one which will require the fewest swaps. If counters are given, the
+    work done and the mergePaths branch and evaluatePathsInteraction situation of the chosen combo are recorded in them.
+
+    The swaps of a combo are never more than CONST_maxExtraSwapsPerCombo away from its base cost (the swaps to the pin
+    plus the swaps to the pendulum), since evaluatePathsInteraction only changes one side of it by one swap. The base
+    cost minus CONST_maxExtraSwapsPerCombo is then a lower bound of its swaps, and the lowest base cost plus
+    CONST_maxExtraSwapsPerCombo an upper bound of the swaps of the best combo.
+
+    With a RoutingTopology, the best pendulum of every pin is found at once by scorePinPendulumPairs, and only the pins
+    whose lower bound is not over that upper bound are evaluated. They are evaluated by increasing base cost, and the
+    search stops (branch and bound) once the bound shows that no pin left can need fewer swaps than the best combo so
+    far. Ties are broken by the original order of the pins (by depth, then by position with findPinNodes), so the
+    combo chosen is the same as evaluating every pin in order. Without a topology the distance to the pendulum is not
+    known beforehand, so the bound is the pin depth alone. The number of pins that were never evaluated is counted in
+    counters as evaluationsSkipped
     """
-
     allPinNodes.sort(key=lambda tup: tup[1])  # Sort by swaps from dictator to pin
     # The first tuples in candidatePinNodes have the fewest swaps, so we will start by finding their pendulums
 
+    pinsToEvaluate = range(len(allPinNodes))
+    if topology is not None:
+        bestPendulums, bestPendulumsSwaps, baseCosts = scorePinPendulumPairs(topology, allPinNodes, iSource, iTarget,
+                                                                             counters)
+        # Upper bound of the swaps of the best combo, which the lower bound of a pin must not be over
+        upperBound = min(baseCosts) + CONST_maxExtraSwapsPerCombo
+        pinsToEvaluate = sorted((i for i, baseCost in enumerate(baseCosts)
+                                 if baseCost - CONST_maxExtraSwapsPerCombo <= upperBound),
+                                key=lambda i: baseCosts[i])
+    countWork(counters, "pinsConsidered", len(allPinNodes))
+    countWork(counters, "evaluationsSkipped", len(allPinNodes) - len(pinsToEvaluate))
+
     bestPinPenCombo, bestPinPenComboSwaps, bestPinPenComboPaths = None, (float('inf'), float('inf'), float('inf'),
                                                                          float('inf')), None
-    for pin in allPinNodes:
+    bestTotalSwaps, bestPinIndex = float('inf'), None
+    for evaluated, i in enumerate(pinsToEvaluate):
+        pin = allPinNodes[i]
+
+        # Bound: even if evaluatePathsInteraction saved a swap, this pin could not beat the best combo
+        lowerBound = (baseCosts[i] if topology is not None else pin[1]) - CONST_maxExtraSwapsPerCombo
+        if lowerBound > bestTotalSwaps:
+            # The pins are sorted by their bound, so neither can any of the following ones
+            countWork(counters, "evaluationsSkipped", len(pinsToEvaluate) - evaluated)
+            break
+        if lowerBound == bestTotalSwaps and i > bestPinIndex:
+            # At best it would tie, and on a tie the pin that comes first wins
+            countWork(counters, "evaluationsSkipped")
+            continue
         dictator = None
         soldier = None
         if pin[2] == "s":  # If the pin is supposed to hold iSource
@@ -126,29 +227,39 @@ def findBestPinPenCombo(G_swaps, G_interactions, allPinNodes, iSource, iTarget):
             soldier = iSource  # Then the pendulum is supposed to hold iSource
 
         # We find the best pen for the pin
-        pen = findBestPendulumForPin(G_swaps, G_interactions, soldier, pin)
+        if topology is not None:
+            countWork(counters, "shortestPathCalls")
+            pendulum = bestPendulums[i]
+            pen = (pendulum, bestPendulumsSwaps[i], "t" if pin[2] == "s" else "s",
+                   topology.shortestPath(soldier, pendulum))
+        else:
+            pen = findBestPendulumForPin(G_swaps, G_interactions, soldier, pin, topology, counters)
 
         #TODO: from this point on is where shit gets crazy. Be prepared.
 
         # Align the paths if the situation requires it
-        newPinPath, newPenPath = mergePaths(pin[3], pen[3])
+        newPinPath, newPenPath, mergeBranch = mergePathsWithBranch(pin[3], pen[3])
 
         # Repackage pin and pen with their new paths
         pin = (pin[0], pin[1], pin[2], newPinPath)
         pen = (pen[0], pen[1], pen[2], newPenPath)
 
-        dictatorFirst, extraDictatorSwaps, extraSoldierSwaps = evaluatePathsInteraction(G_swaps, pin, pen, dictator,
-                                                                                        soldier)
+        with timedStage(timings, "evaluatePathsInteraction"):
+            dictatorFirst, extraDictatorSwaps, extraSoldierSwaps, situation = evaluatePathsInteractionWithCase(
+                G_swaps, pin, pen, dictator, soldier)
         finalDictatorSwaps = (pin[1] + extraDictatorSwaps)
         finalSoldierSwaps = (pen[1] + extraSoldierSwaps)
         totalPinPenComboSwaps = finalDictatorSwaps + finalSoldierSwaps
 
         # Compare this pin-pen combo with the best one so far
-        if totalPinPenComboSwaps < bestPinPenComboSwaps[0] + bestPinPenComboSwaps[1] + bestPinPenComboSwaps[2] + \
-                bestPinPenComboSwaps[3]:
+        if totalPinPenComboSwaps < bestTotalSwaps or (totalPinPenComboSwaps == bestTotalSwaps and i < bestPinIndex):
+            bestTotalSwaps, bestPinIndex = totalPinPenComboSwaps, i
             bestPinPenCombo = (pin[0], pen[0])
             bestPinPenComboSwaps = (pin[1], pen[1], extraDictatorSwaps, extraSoldierSwaps)
             bestPinPenComboPaths = (pin[3], pen[3], dictatorFirst)
+            if counters is not None:
+                counters["mergeBranch"] = mergeBranch
+                counters["evaluationCase"] = situation
 
     if bestPinPenCombo is None or bestPinPenComboPaths[0] is None or bestPinPenComboPaths[1] is None:
         raise Exception("No pin pen combo found. This should not happen")
@@ -156,21 +267,78 @@ def findBestPinPenCombo(G_swaps, G_interactions, allPinNodes, iSource, iTarget):
     return bestPinPenCombo, bestPinPenComboSwaps, bestPinPenComboPaths
 
 
-def findBestPendulumForPin(G_swaps, G_interactions, soldier, pin):
+def scorePinPendulumPairs(topology, allPinNodes, iSource, iTarget, counters=None):
     """
-    Given a pin, find the best pendulum for the soldier
+    Same choice of pendulum as findBestPendulumForPin, but for all the pins at once over the interaction edges of a
+    RoutingTopology: every (pin, pendulum) pair is scored by the distance from the soldier to the pendulum, and the best
+    pendulum of each pin is the closest one (the lowest position on a tie). Returns three lists aligned with
+    allPinNodes:
+        1) bestPendulums: best pendulum of each pin
+        2) bestPendulumsSwaps: distance from the soldier to it
+        3) baseCosts: pin depth + bestPendulumsSwaps, the swaps of the combo before evaluatePathsInteraction
+    With at least CONST_vectorizedScoringMinPairs pairs, they are all scored as one NumPy expression. Below that, the
+    overhead of NumPy is larger than the loop it saves, so they are scored one by one
+    """
+    # A pin holding iSource has the passive nodes it interacts with as pendulums, and iTarget is the soldier. A pin
+    # holding iTarget has the active nodes interacting with it as pendulums, and iSource is the soldier
+    soldiers = [iTarget if pin[2] == "s" else iSource for pin in allPinNodes]
+    pendulumsOfPins = [topology.passiveNeighbours(pin[0]) if pin[2] == "s" else topology.activeNeighbours(pin[0])
+                       for pin in allPinNodes]
+    lengths = [len(pendulums) for pendulums in pendulumsOfPins]
+    numPairs = sum(lengths)
+    countWork(counters, "pendulumsScanned", numPairs)
+
+    if numPairs < CONST_vectorizedScoringMinPairs:
+        bestPendulums, bestPendulumsSwaps = [], []
+        for soldier, pendulums in zip(soldiers, pendulumsOfPins):
+            bestPendulumSwaps, bestPendulum = min((topology.distance(soldier, pendulum), pendulum)
+                                                  for pendulum in pendulums)
+            bestPendulums.append(bestPendulum)
+            bestPendulumsSwaps.append(bestPendulumSwaps)
+    else:
+        # Flatten the pendulums of all the pins, remembering which pin each one belongs to
+        pendulums = np.fromiter(itertools.chain.from_iterable(pendulumsOfPins), dtype=np.int64, count=numPairs)
+        pinOfPair = np.repeat(np.arange(len(allPinNodes)), lengths)
+        pendulumsSwaps = topology.distances[np.array(soldiers, dtype=np.int64)[pinOfPair], pendulums].astype(np.int64)
+
+        # Within the pairs of each pin, the first one once sorted by distance and then position is the best one
+        firstPairOfPin = np.cumsum(lengths) - lengths
+        best = np.lexsort((pendulums, pendulumsSwaps, pinOfPair))[firstPairOfPin]
+        bestPendulums, bestPendulumsSwaps = pendulums[best].tolist(), pendulumsSwaps[best].tolist()
+
+    return bestPendulums, bestPendulumsSwaps, [pin[1] + swaps for pin, swaps in zip(allPinNodes, bestPendulumsSwaps)]
+
+
+def findBestPendulumForPin(G_swaps, G_interactions, soldier, pin, topology=None, counters=None):
+    """
+    Given a pin, find the best pendulum for the soldier. With a RoutingTopology, pendulums are compared by their
+    precomputed distance and only the path of the best one is built
     """
     pendulumsToLookAt = None  # List of nodes we should be looking at
     associatedHolder = None  # iSource or iTarget
     if pin[2] == "s":  # Pin node will hold iSource, the dictator
-        pendulumsToLookAt = list(G_interactions.neighbors(pin[0]))
+        pendulumsToLookAt = findPassiveNeighbours(G_interactions, pin[0], topology)
         associatedHolder = "t"  # Pendulum will hold iTarget, the soldier
     elif pin[2] == "t":  # Pin node will hold iTarget, the dictator
-        pendulumsToLookAt = findActiveNeighbours(G_interactions, pin[0])
+        pendulumsToLookAt = findActiveNeighbours(G_interactions, pin[0], topology)
         associatedHolder = "s"  # Pendulum will hold iSource, the soldier
 
+    countWork(counters, "pendulumsScanned", len(pendulumsToLookAt))
+
     # The best pendulum is the one with the shortest path for the soldier
     bestPendulum, bestPendulumSwaps, bestPendulumPath = None, float('inf'), None
+    if topology is not None:
+        for pendulum in pendulumsToLookAt:
+            pendulumSwaps = topology.distance(soldier, pendulum)
+            if pendulumSwaps < bestPendulumSwaps:
+                bestPendulum = pendulum
+                bestPendulumSwaps = pendulumSwaps
+        if bestPendulum is not None:
+            countWork(counters, "shortestPathCalls")
+            bestPendulumPath = topology.shortestPath(soldier, bestPendulum)
+        return bestPendulum, bestPendulumSwaps, associatedHolder, bestPendulumPath
+
+    countWork(counters, "shortestPathCalls", len(pendulumsToLookAt))
     for pendulum in pendulumsToLookAt:
         pendulumPath = nx.shortest_path(G_swaps, soldier, pendulum)
         pendulumSwaps = len(pendulumPath) - 1
@@ -191,27 +359,37 @@ def mergePaths(path1, path2):
 
     Returns newPath1, newPath2
     """
+    newPath1, newPath2, branch = mergePathsWithBranch(path1, path2)
+    return newPath1, newPath2
+
+
+def mergePathsWithBranch(path1, path2):
+    """
+    Same as mergePaths, but also returns which of its branches was taken (one of the CONST_merge... names)
+
+    Returns newPath1, newPath2, branch
+    """
     # path2 inside of path1
     if path2[0] in path1 and path2[-1] in path1:
         startIndex = path1.index(path2[0])
         endIndex = path1.index(path2[-1])
         if startIndex < endIndex:
-            return path1, path1[startIndex:endIndex + 1]
+            return path1, path1[startIndex:endIndex + 1], CONST_mergePath2InsidePath1
         elif startIndex > endIndex:
-            return path1, path1[endIndex:startIndex + 1:][::-1]
+            return path1, path1[endIndex:startIndex + 1:][::-1], CONST_mergePath2InsidePath1
         else:
-            return path1, path2
+            return path1, path2, CONST_mergePath2InsidePath1
 
     # path1 inside of path2
     elif path1[0] in path2 and path1[-1] in path2:
         startIndex = path2.index(path1[0])
         endIndex = path2.index(path1[-1])
         if startIndex < endIndex:
-            return path2[startIndex:endIndex + 1], path2
+            return path2[startIndex:endIndex + 1], path2, CONST_mergePath1InsidePath2
         elif startIndex > endIndex:
-            return path2[endIndex:startIndex+1:][::-1], path2
+            return path2[endIndex:startIndex+1:][::-1], path2, CONST_mergePath1InsidePath2
         else:
-            return path1, path2
+            return path1, path2, CONST_mergePath1InsidePath2
 
     # For both following overlap cases, path2 will always be adjusted to path1
     # Tails overlap
@@ -223,7 +401,7 @@ def mergePaths(path1, path2):
             # As path2 goes forward from startIndex to end, path1 goes backwards from end
             alteredPath2[i] = path1[-(1+x)]
             x += 1
-        return path1, alteredPath2
+        return path1, alteredPath2, CONST_mergeTailsOverlap
 
     # Heads overlap
     elif path1[0] in path2 and path2[0] in path1:
@@ -233,8 +411,8 @@ def mergePaths(path1, path2):
         for i in range(endIndex+1):
             # As path2 goes forward to endIndex, path1 goes backwards from path1StartIndex
             alteredPath2[i] = path1[path1StartIndex-i]
-        return path1, alteredPath2
+        return path1, alteredPath2, CONST_mergeHeadsOverlap
 
     # It's a situation that does not require path merging
     else:
-        return path1, path2
+        return path1, path2, CONST_mergeNotRequired
@@ -16,6 +16,9 @@ function stepForwards() {
     else if(!(Array.isArray(soddi) && soddi.length)) {
         document.getElementById("target2").innerHTML = "No swap steps are required";
     }
+    else if (currentIndex == (stepsSolution.length - 1) && stepsStreaming) {
+        document.getElementById("target2").innerHTML = "Waiting for the next steps to be decided...";
+    }
     else if (currentIndex == (stepsSolution.length - 1)) {
         document.getElementById("target2").innerHTML = "All steps have been completed";
     }
@@ -41,7 +44,7 @@ function stepForwards() {
             }
         }catch(err){}; 
         currentIndex++;  //Move onto the next step
-        if(currentIndex == (stepsSolution.length - 1)) {
+        if(currentIndex == (stepsSolution.length - 1) && !stepsStreaming) {
             document.getElementById("target2").innerHTML = "All steps have been completed";
             document.getElementById("next_step_button").classList.add("w3-disabled");
         }
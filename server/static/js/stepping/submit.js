@@ -1,3 +1,6 @@
+var stepsStreaming = false;  //Whether more swap steps are still to come from the server
+var submissionNumber = 0;  //Identifies the latest submission, so that the steps of an older one are ignored
+
 function submit() {
     //First we update the graph to the inputs, in case it is different
     updateGraphToInputs();
@@ -9,37 +12,86 @@ function submit() {
         'gInteractionsInputted': $("#submissionGInteractions").val(),
         'SODDIInputted': $("#submissionSODDI").val(),
     };
-    
-    var jsonString = JSON.stringify(inputStructure);
-    const xhr = new XMLHttpRequest();
 
-    xhr.open("POST", "coreExecutionMethod");
-    xhr.setRequestHeader("Content-Type", "application/json");
-    xhr.responseType = 'json';
-    xhr.send(jsonString);
+    window.currentSoddiIndex = 0;
+    //Turn string into array
+    var preppedSODDI = $("#submissionSODDI").val().replace(/\(/g, "[").replace(/\)/g, "]"); //Write it as a string of list of lists, not tuples
+    window.soddi = JSON.parse(preppedSODDI);  //Turn it from string to array
+    window.currentIndex =-1;
+    window.stepsSolution = [];
+    window.stepsStreaming = true;
+    var submission = ++window.submissionNumber;
 
-    xhr.onload = function () {
-        if (xhr.status != 200) { // analyze HTTP status of the response
-            alert(`Error ${xhr.status}: ${xhr.statusText}`); // e.g. 404: Not Found
+    //The solution is streamed as Server-Sent Events, so that stepping can start as soon as the first steps are decided
+    fetch("coreExecutionStreamMethod", {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify(inputStructure),
+    }).then(function (response) {
+        if (!response.ok) { // analyze HTTP status of the response
+            window.stepsStreaming = false;
+            alert(`Error ${response.status}: ${response.statusText}`); // e.g. 404: Not Found
+            return;
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        var buffer = "";
+        function readEvents() {
+            return reader.read().then(function (result) {
+                if (submission != window.submissionNumber) {  //Submitted again in the meantime
+                    reader.cancel();
+                    return;
+                }
+                if (result.done) {
+                    window.stepsStreaming = false;
+                    return;
+                }
+                buffer += decoder.decode(result.value, {stream: true});
+                var events = buffer.split("\n\n");
+                buffer = events.pop();  //The last one may not be complete yet
+                events.forEach(handleSolutionEvent);
+                return readEvents();
+            });
         }
-        else { // show the result
-            let solution = xhr.response;
-            document.getElementById("target1").innerHTML = "Total number of swaps: " + solution["totalSwaps"];
-            //document.getElementById("target1").innerHTML = JSON.stringify(solution);
-            window.currentSoddiIndex = 0;
-            //Turn string into array
-            var preppedSODDI = $("#submissionSODDI").val().replace(/\(/g, "[").replace(/\)/g, "]"); //Write it as a string of list of lists, not tuples
-            window.soddi = JSON.parse(preppedSODDI);  //Turn it from string to array
-            window.currentIndex =-1;
-            window.stepsSolution = solution["swapSteps"];
-            //Show all the steps at the start
-            document.getElementById("all_steps").innerHTML = "All steps: " + JSON.stringify(window.stepsSolution);
+        return readEvents();
+    });
+}
 
-            window.stepNodesAttributes = solution["node_attributes"];
-            window.stepEdgesAtrributes = solution["edge_attributes"];
-            window.ids = solution["ids"];
+function handleSolutionEvent(rawEvent) {
+    var event = "";
+    var data = "";
+    rawEvent.split("\n").forEach(function (line) {
+        if (line.startsWith("event: ")) {
+            event = line.slice("event: ".length);
         }
-    };
+        else if (line.startsWith("data: ")) {
+            data += line.slice("data: ".length);
+        }
+    });
+    let contents = JSON.parse(data);
+
+    if (event == "topology") {
+        window.stepNodesAttributes = contents["node_attributes"];
+        window.stepEdgesAtrributes = contents["edge_attributes"];
+        window.ids = contents["ids"];
+    }
+    else if (event == "entry") {
+        //Appended one by one, since spreading a long array into push() overflows the call stack
+        contents["swapSteps"].forEach(function (step) {
+            window.stepsSolution.push(step);
+        });
+        document.getElementById("target1").innerHTML = "Desired interactions routed so far: " + (contents["index"] + 1);
+    }
+    else if (event == "solution") {
+        window.stepsStreaming = false;
+        document.getElementById("target1").innerHTML = "Total number of swaps: " + contents["totalSwaps"];
+        //Show all the steps once they are all known
+        document.getElementById("all_steps").innerHTML = "All steps: " + JSON.stringify(window.stepsSolution);
+    }
+    else if (event == "error") {
+        window.stepsStreaming = false;
+        alert("Error: " + contents["ERROR"]);
+    }
 }
 
 function clearSODDItext() {
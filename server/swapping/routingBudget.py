@@ -0,0 +1,69 @@
+import time
+
+from swapping.routingState import RoutingState
+
+
+class RoutingBudget:
+    """
+    Limits how long routing a SODDI may take: at most seconds (counted from when the budget is created, so that
+    everything before routing counts too) and at most maxEntries entries, either of which may be None. Once the budget
+    runs out, routing either stops, the SODDI being only routed up to resumeIndex, or, if degrade is True, goes on with
+    every remaining entry routed the cheap way (only the first pins found are tried, see routeDesiredInteraction), their
+    indexes being kept in degradedEntries. A budget is only used for one SODDI. The rest of a stopped SODDI can be
+    routed by giving a new budget resumeFrom the one that stopped, which starts from the entry and state it stopped at.
+    Entries taken from a PrefixCheckpointCache instead of being routed do not count against it, but are counted in
+    entriesReused
+    """
+    __slots__ = ("seconds", "maxEntries", "degrade", "resumeFrom", "deadline", "entriesRouted", "entriesReused",
+                 "degradedEntries", "resumeIndex", "state")
+
+    def __init__(self, seconds=None, maxEntries=None, degrade=False, resumeFrom=None):
+        if resumeFrom is not None and resumeFrom.resumeIndex is None:
+            raise ValueError("Only a budget that stopped routing can be resumed from")
+        self.seconds = seconds
+        self.maxEntries = maxEntries
+        self.degrade = degrade
+        self.resumeFrom = resumeFrom
+        self.deadline = time.perf_counter() + seconds if seconds is not None else None
+        self.entriesRouted = 0
+        self.entriesReused = 0
+        self.degradedEntries = []
+        # Index of the first entry that was not routed, and state it would have been routed from, if routing stopped
+        self.resumeIndex = None
+        self.state = None
+
+    def exhausted(self):
+        return (self.maxEntries is not None and self.entriesRouted >= self.maxEntries) or \
+            (self.deadline is not None and time.perf_counter() >= self.deadline)
+
+    def routedInFull(self):
+        """
+        Whether the whole SODDI was routed, from its first entry and without any entry routed the cheap way
+        """
+        return self.resumeFrom is None and self.resumeIndex is None and not self.degradedEntries
+
+    def startIndex(self):
+        """
+        Index of the first entry of the SODDI to route
+        """
+        return self.resumeFrom.resumeIndex if self.resumeFrom is not None else 0
+
+    def startState(self, numNodes):
+        """
+        RoutingState to start routing from: where the budget resumed from stopped, or every label on its own position
+        """
+        return self.resumeFrom.state.copy() if self.resumeFrom is not None else RoutingState(numNodes)
+
+    def stop(self, index, state):
+        self.resumeIndex = index
+        self.state = state
+
+    def report(self):
+        """
+        Dictionary with the index of the first entry routed, whether the rest of the SODDI was routed, the index to
+        resume from if it was not, how many entries were routed and reused from checkpoints after the first one
+        (together taking it to resumeIndex) and the indexes of the entries routed the cheap way
+        """
+        return {"startIndex": self.startIndex(), "complete": self.resumeIndex is None, "resumeIndex": self.resumeIndex,
+                "entriesRouted": self.entriesRouted, "entriesReused": self.entriesReused,
+                "degradedEntries": list(self.degradedEntries)}
@@ -0,0 +1,87 @@
+import numpy as np
+
+from topology.routingTopology import narrowestSignedDtype
+
+
+class RoutingState:
+    """
+    Which label (state) is sitting on which physical position. G_swaps and G_interactions are never relabelled while
+    routing; instead, this pair of permutation arrays is updated in place after every SODDI entry:
+        1) positionOf[label]: position currently holding label
+        2) labelAt[position]: label currently held by position
+    Initially, every label sits on the position with its same number.
+    """
+    __slots__ = ("positionOf", "labelAt")
+
+    def __init__(self, numNodes):
+        dtype = narrowestSignedDtype(numNodes)
+        self.positionOf = np.arange(numNodes, dtype=dtype)
+        self.labelAt = np.arange(numNodes, dtype=dtype)
+
+    def copy(self):
+        """
+        Independent copy of the state, which only costs the two permutation arrays
+        """
+        stateCopy = RoutingState.__new__(RoutingState)
+        stateCopy.positionOf = self.positionOf.copy()
+        stateCopy.labelAt = self.labelAt.copy()
+        return stateCopy
+
+    @classmethod
+    def fromPositions(cls, positionOf):
+        """
+        State in which label is on positionOf[label], such as a copy of the positionOf of another state
+        """
+        state = cls.__new__(cls)
+        state.positionOf = positionOf.copy()
+        state.labelAt = np.empty_like(state.positionOf)
+        state.labelAt[state.positionOf] = np.arange(len(state.positionOf), dtype=state.positionOf.dtype)
+        return state
+
+    def isIdentity(self):
+        """
+        Whether every label is still on the position with its same number
+        """
+        return bool(np.array_equal(self.labelAt, np.arange(len(self.labelAt))))
+
+    def positionsOf(self, labels):
+        """
+        Translates a tuple of labels into the tuple of positions holding them
+        """
+        return tuple(int(self.positionOf[label]) for label in labels)
+
+    def labelSwapSteps(self, swapSteps):
+        """
+        Translates swap steps given in positions (as named before the swaps took place) into swap steps given in labels
+        """
+        return [(int(self.labelAt[step[0]]), int(self.labelAt[step[1]])) if type(step) is tuple else step
+                for step in swapSteps]
+
+    def applySwapSteps(self, swapSteps):
+        """
+        Replays swap steps given in labels (as returned by executeSwaps), each of which exchanges the positions of its
+        two labels, which gets the state that routing their entries got to without routing them again
+        """
+        positionOf, labelAt = self.positionOf, self.labelAt
+        for step in swapSteps:
+            if type(step) is tuple:
+                x, y = step
+                positionX, positionY = positionOf[x], positionOf[y]
+                positionOf[x], positionOf[y] = positionY, positionX
+                labelAt[positionX], labelAt[positionY] = y, x
+
+    def applyMapping(self, mapping):
+        """
+        Applies the mapping returned by executeSwaps, in which {position: otherPosition} means that position now holds
+        the label that otherPosition held before the swaps. Only the positions in the mapping are touched
+        """
+        positions = list(mapping.keys())
+        labels = self.labelAt[list(mapping.values())]
+        self.labelAt[positions] = labels
+        self.positionOf[labels] = positions
+
+    def labelMapping(self):
+        """
+        Mapping {position: label} to relabel graphs whose nodes are positions
+        """
+        return {position: int(label) for position, label in enumerate(self.labelAt)}
@@ -1,10 +1,16 @@
 import copy
+import itertools
 from typing import List, Tuple
 
-from critics.processingCritics import checkSwapStepsMakesSense, checkDesiredInteractionIsAchieved
+from critics.processingCritics import checkSwapStepsMakesSense, checkDesiredInteractionIsAchievedOnTopology
 from graphDrawing.graphDrawingMethods import drawStepsInGraph
-from graphDrawing.graphRelabelling import relabelGraphs
-from searching.searchFunctions import bfsCheckingNeighbours, findBestPinPenCombo
+from graphDrawing.graphRelabelling import relabelGraphs, relabelGraphsInPlace
+from instrumentation.routingTrace import CONST_doneAlreadyCase
+from instrumentation.stageTimings import timedStage
+from searching.routePlanCache import RoutePlanCache
+from searching.searchFunctions import findBestPinPenCombo, findPinNodes
+from swapping.routingState import RoutingState
+from topology.routingTopology import RoutingTopology
 
 CONST_notListOfIntsOrNotBool = "First parameter must be a list of ints and second parameter must be a boolean"
 
@@ -35,9 +41,10 @@ def representSwaps(G_swaps, path: List[int], swapEndNodes: bool):
     return toReturnPath
 
 
-def executeSwaps(G_swaps, G_interactions, pinPen):
+def executeSwaps(G_swaps, G_interactions, pinPen, state=None, timings=None):
     """
-    Executes the swaps accordingly
+    Executes the swaps accordingly. If a RoutingState is given, the paths are taken to be positions: the swap steps are
+    returned in terms of labels and the state is updated in place instead of having to relabel the graphs
     """
     mapping = {}
     swapSteps = []
@@ -180,70 +187,208 @@ def executeSwaps(G_swaps, G_interactions, pinPen):
     # We add a # to swapSteps to signal the end of swaps necessary to achieve this SODDI
     swapSteps.append("#")
 
+    if state is not None:
+        with timedStage(timings, "relabelling"):
+            swapSteps = state.labelSwapSteps(swapSteps)
+            state.applyMapping(mapping)
+
     return swapSteps, mapping
 
-def swapsRequired(G_swaps, G_interactions, soddi: List[Tuple[int, int]]):
+def routeDesiredInteraction(topology, state, desiredInteraction, extraLevelsToConsider=0, timings=None,
+                            counters=None, planCache=None, firstPinsOnly=False):
     """
-    Determines the number of swaps required to implement the SODDI with the given G_swaps and G_interactions graphs
-    :param G_swaps: Graph with all the swap edges possible
-    :param G_interactions: Graph with all of the interaction edges
-    :param soddi: Sequence of Desired Direct Interactions as a tuple of tuples
-    :return: swaps: Total number of swaps required to execute the soddi given G_swaps and G_interactions
+    Routes one entry of the SODDI on the topology, moving the labels in the state. Returns the swap steps (in labels)
+    needed for it and the number of swaps they add up to. If a StageTimings is given, each stage is timed in it, and if
+    counters are given (see RoutingTrace.newEntry), the work done for the entry is counted in them. If a RoutePlanCache
+    (already in use with this topology) is given, the pin search and pin-pen selection are skipped for pairs of
+    positions that have already been routed. If firstPinsOnly is True, the entry is routed the cheap way, for when a
+    RoutingBudget has run out: only the first active pin of the source and passive pin of the target are tried (a
+    plan already in the planCache is still used, but cheap plans are not kept in it)
     """
-    swaps = 0
-    allSwapSteps = []
-
-    # Make copies of G_swaps and G_interactions to use them as we wish without compromising the original versions
-    newG_swaps, newG_interactions = copy.deepcopy(G_swaps), copy.deepcopy(G_interactions)
-
-    for desiredInteraction in soddi:
-        # Step 1: find the interaction we want to accomplish
-        iSource, iTarget = desiredInteraction
-
-        # Step 2: check if the target is source interaction neighbour already
-        # If so, move onto next desired interaction
-        if iTarget in newG_interactions.neighbors(iSource):
-            allSwapSteps.append("Done already")
-            continue
-
-        # Step 3: find the closes pin-pen combo to iSource and iTarget
-        closestActiveNodesToSource = bfsCheckingNeighbours(newG_swaps, newG_interactions, iSource, lookForPassive=False)
-        closestPassiveNodesToTarget = bfsCheckingNeighbours(newG_swaps, newG_interactions, iTarget, lookForPassive=True)
-
-        allPinNodes = closestActiveNodesToSource + closestPassiveNodesToTarget
-
-        bestPinPenCombo, bestPinPenComboSwaps, bestPinPenComboPaths = findBestPinPenCombo(newG_swaps, newG_interactions,
-                                                                                          allPinNodes,
-                                                                                          iSource, iTarget)
-        # Add to the total (dictatorSwaps, soldierSwaps, extraDictatorSwaps, extraSoldierSwaps)
-        swaps += bestPinPenComboSwaps[0] + bestPinPenComboSwaps[1] + bestPinPenComboSwaps[2] + bestPinPenComboSwaps[3]
-
-        # Pack all information about the combination into one tuple for compactness and readability
-        bestPinPen = (bestPinPenCombo, bestPinPenComboSwaps, bestPinPenComboPaths)
-
-        # Step 4: execute the swaps necessary to get the nodes to where they need to be (know what to relabel where)
-        swapSteps, mapping = executeSwaps(newG_swaps, newG_interactions, bestPinPen)
-
+    # Step 1: find the interaction we want to accomplish, and where its labels are sitting
+    iSource, iTarget = state.positionsOf(desiredInteraction)
+
+    # Step 2: check if the target is source interaction neighbour already
+    # If so, move onto next desired interaction
+    if topology.hasInteraction(iSource, iTarget):
+        if counters is not None:
+            counters["evaluationCase"] = CONST_doneAlreadyCase
+        return ["Done already"], 0
+
+    plan = planCache.get(iSource, iTarget, extraLevelsToConsider) if planCache is not None else None
+    if plan is not None:
+        (bestPinPenCombo, bestPinPenComboSwaps, bestPinPenComboPaths), mergeBranch, situation = plan
+        if counters is not None:
+            counters.update({"planCacheHit": True, "mergeBranch": mergeBranch, "evaluationCase": situation})
+    else:
+        # Step 3: find the closes pin-pen combo to iSource and iTarget (the pins come from the precomputed index)
+        with timedStage(timings, "pinSearch"):
+            closestActiveNodesToSource = findPinNodes(topology, iSource, lookForPassive=False,
+                                                      extraLevelsToConsider=extraLevelsToConsider, counters=counters)
+            closestPassiveNodesToTarget = findPinNodes(topology, iTarget, lookForPassive=True,
+                                                       extraLevelsToConsider=extraLevelsToConsider, counters=counters)
+
+        if firstPinsOnly:
+            allPinNodes = closestActiveNodesToSource[:1] + closestPassiveNodesToTarget[:1]
+        else:
+            allPinNodes = closestActiveNodesToSource + closestPassiveNodesToTarget
+
+        with timedStage(timings, "pinPenSelection"):
+            bestPinPenCombo, bestPinPenComboSwaps, bestPinPenComboPaths = findBestPinPenCombo(None, None, allPinNodes,
+                                                                                              iSource, iTarget,
+                                                                                              topology, timings,
+                                                                                              counters)
+        if planCache is not None and not firstPinsOnly:
+            # The branch and situation are only known if the work is being counted
+            mergeBranch, situation = (counters["mergeBranch"], counters["evaluationCase"]) if counters is not None \
+                else (None, None)
+            planCache.put(iSource, iTarget, extraLevelsToConsider,
+                          (bestPinPenCombo, bestPinPenComboSwaps, bestPinPenComboPaths), mergeBranch, situation)
+
+    # Add to the total (dictatorSwaps, soldierSwaps, extraDictatorSwaps, extraSoldierSwaps)
+    swaps = bestPinPenComboSwaps[0] + bestPinPenComboSwaps[1] + bestPinPenComboSwaps[2] + bestPinPenComboSwaps[3]
+
+    # Pack all information about the combination into one tuple for compactness and readability
+    bestPinPen = (bestPinPenCombo, bestPinPenComboSwaps, bestPinPenComboPaths)
+
+    # Step 4: execute the swaps necessary to get the nodes to where they need to be, moving the labels in the state
+    with timedStage(timings, "executeSwaps"):
+        swapSteps, mapping = executeSwaps(topology, None, bestPinPen, state, timings)
+
+    with timedStage(timings, "postStepCritics"):
         # Step 5: check that each swapStep makes sense
         checkSwapStepsMakesSense(desiredInteraction, swapSteps)
 
-        # Step 6: update the list containing all of the swaps needed
-        allSwapSteps += swapSteps
-
-        # Step 7: relabel the graphs
-        newG_swaps, newG_interactions = relabelGraphs(newG_swaps, newG_interactions, mapping)
+        # Step 6: check that the desired interaction is happening
+        checkDesiredInteractionIsAchievedOnTopology(desiredInteraction, topology, state)
 
-        # Step 8: check that the desired interaction is happening
-        checkDesiredInteractionIsAchieved(desiredInteraction, newG_interactions)
+    if counters is not None:
+        counters["swaps"] = swaps
+    return swapSteps, swaps
 
-        drawStepsInGraph(newG_swaps)
 
+def checkSwapCount(swaps, allSwapSteps):
+    """
+    Checks that the number of swaps that was expected matches the number of swaps in the list of swap steps
+    """
     i = len([x for x in allSwapSteps if type(x) is tuple])
     if swaps != i:
         print("Total number of swaps required: " + str(swaps))
         print("List of swaps necessary: " + str(allSwapSteps))
         print("Count of swaps in list: " + str(i))
         raise Exception("The numbers don't match")
-    return newG_swaps, newG_interactions, allSwapSteps
 
 
+def routeSODDI(topology, soddi: List[Tuple[int, int]], extraLevelsToConsider=0, state=None, timings=None,
+              trace=None, planCache=None, budget=None):
+    """
+    Routes the whole SODDI on a RoutingTopology, without any networkx graph involved
+    :param topology: RoutingTopology of the device
+    :param soddi: Sequence of Desired Direct Interactions as a list of tuples of labels
+    :param extraLevelsToConsider: Pins up to this many levels deeper than the closest ones are also considered
+    :param state: RoutingState to start from. By default, every label starts on the position with its same number
+    :param timings: StageTimings in which to accumulate the time spent in each stage, if any
+    :param trace: RoutingTrace in which to record the work counters of each entry, if any
+    :param planCache: RoutePlanCache to reuse the plans of pairs of positions already routed. A new one is used if none
+                      is given, so passing one is only needed to look at its stats or to keep it across calls
+    :param budget: RoutingBudget limiting the time or entries spent routing, if any. If it runs out, only part of the
+                   SODDI may be routed (see RoutingBudget)
+    :return: allSwapSteps, state: swap steps for the whole SODDI and the final RoutingState
+    """
+    if state is None:
+        state = budget.startState(topology.numNodes) if budget is not None else RoutingState(topology.numNodes)
+    allSwapSteps = []
+    for swapSteps in iterRouteSODDI(topology, soddi, extraLevelsToConsider, state, timings, trace, planCache,
+                                    budget):
+        allSwapSteps += swapSteps
+    return allSwapSteps, state
+
+
+def iterRouteSODDI(topology, soddi, extraLevelsToConsider=0, state=None, timings=None, trace=None, planCache=None,
+                   budget=None, startIndex=None):
+    """
+    Same as routeSODDI, but yielding the swap steps of each entry of the SODDI as soon as they are decided, so that
+    they can be used (or sent) while the rest is routed, without ever holding the steps of the whole SODDI. The SODDI
+    may be any iterable, and the given state (if any) is kept up to date as entries are yielded. The entries before
+    startIndex are skipped, the state being the one after them: by default, those before the startIndex of a
+    RoutingBudget that resumes from another one, or none
+    """
+    if state is None:
+        state = budget.startState(topology.numNodes) if budget is not None else RoutingState(topology.numNodes)
+    if planCache is None:
+        planCache = RoutePlanCache()
+    planCache.useWith(topology)
+
+    if startIndex is None:
+        startIndex = budget.startIndex() if budget is not None else 0
+    for index, desiredInteraction in enumerate(itertools.islice(soddi, startIndex, None), startIndex):
+        firstPinsOnly = False
+        if budget is not None and budget.exhausted():
+            if not budget.degrade:
+                budget.stop(index, state)
+                return
+            firstPinsOnly = True
+            budget.degradedEntries.append(index)
+        counters = trace.newEntry(desiredInteraction) if trace is not None else None
+        swapSteps, entrySwaps = routeDesiredInteraction(topology, state, desiredInteraction, extraLevelsToConsider,
+                                                        timings, counters, planCache, firstPinsOnly)
+        checkSwapCount(entrySwaps, swapSteps)
+        if budget is not None:
+            budget.entriesRouted += 1
+        yield swapSteps
+
+
+def iterSwapsRequired(G_swaps, G_interactions, soddi, extraLevelsToConsider=0, timings=None, trace=None,
+                      planCache=None, budget=None):
+    """
+    Iterator version of swapsRequired, yielding the swap steps of each entry of the SODDI (see iterRouteSODDI). The
+    graphs are never relabelled, since they are only final once the whole SODDI has been routed
+    """
+    with timedStage(timings, "topologyBuild"):
+        topology = RoutingTopology.fromGraphs(G_swaps, G_interactions)
+    state = budget.startState(topology.numNodes) if budget is not None else RoutingState(topology.numNodes)
+    for swapSteps in iterRouteSODDI(topology, soddi, extraLevelsToConsider, state, timings, trace, planCache,
+                                    budget):
+        drawStepsInGraph(G_swaps, state.labelMapping)
+        yield swapSteps
+
+
+def swapsRequired(G_swaps, G_interactions, soddi: List[Tuple[int, int]], extraLevelsToConsider=0,
+                  destructive=False, timings=None, trace=None, planCache=None, budget=None):
+    """
+    Determines the number of swaps required to implement the SODDI with the given G_swaps and G_interactions graphs
+    :param G_swaps: Graph with all the swap edges possible
+    :param G_interactions: Graph with all of the interaction edges
+    :param soddi: Sequence of Desired Direct Interactions as a tuple of tuples
+    :param extraLevelsToConsider: Pins up to this many levels deeper than the closest ones are also considered
+    :param destructive: If True, G_swaps and G_interactions themselves are relabelled and returned, instead of copies
+    :param timings: StageTimings in which to accumulate the time spent in each stage, if any
+    :param trace: RoutingTrace in which to record the work counters of each entry, if any
+    :param planCache: RoutePlanCache to reuse the plans of pairs of positions already routed (see routeSODDI)
+    :param budget: RoutingBudget limiting the time or entries spent routing (see routeSODDI). If routing stops, the
+                   graphs returned are relabelled as they are at budget.resumeIndex
+    :return: swaps: Total number of swaps required to execute the soddi given G_swaps and G_interactions
+    """
+    allSwapSteps = []
+
+    # The graphs are only read to build the compact topology, so there is no need to copy them: routing only writes to
+    # the routing state (which label is on which position), never to the graphs
+    with timedStage(timings, "topologyBuild"):
+        topology = RoutingTopology.fromGraphs(G_swaps, G_interactions)
+    state = budget.startState(topology.numNodes) if budget is not None else RoutingState(topology.numNodes)
+    for swapSteps in iterRouteSODDI(topology, soddi, extraLevelsToConsider, state, timings, trace, planCache,
+                                    budget):
+        allSwapSteps += swapSteps
+        drawStepsInGraph(G_swaps, state.labelMapping)
+
+    # The graphs are only relabelled, once, if some label actually ended up on a different position. Otherwise they
+    # are returned as they are if destructive, or as plain copies, since the caller owns the graphs it passed in
+    if state.isIdentity():
+        if destructive:
+            return G_swaps, G_interactions, allSwapSteps
+        return G_swaps.copy(), G_interactions.copy(), allSwapSteps
+    if destructive:
+        newG_swaps, newG_interactions = relabelGraphsInPlace(G_swaps, G_interactions, state.labelMapping())
+    else:
+        newG_swaps, newG_interactions = relabelGraphs(G_swaps, G_interactions, state.labelMapping())
+    return newG_swaps, newG_interactions, allSwapSteps
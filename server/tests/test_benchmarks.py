@@ -0,0 +1,91 @@
+import copy
+import os
+import unittest
+import networkx as nx
+
+from server.benchmarks.baselineComparison import compareResults, CONST_defaultTimeTolerance, \
+    CONST_timeNoiseFloorSeconds
+from server.benchmarks.benchmarkSuite import readResults, resultsWorkloads, runSuite, runWorkload, suiteWorkloads
+from server.benchmarks.topologyGenerators import CONST_generators, CONST_heavyHex, generateInput
+from server.critics.inputCritics import checkingG_swaps, checkingG_interactions, checkingSODDI
+
+
+class TestTopologyGenerators(unittest.TestCase):
+    def test_validInputs(self):
+        # Test that every family gives a valid input of exactly the number of nodes requested
+        for family in CONST_generators:
+            for numNodes in (30, 97):
+                generatedInput = generateInput(family, numNodes, 20, seed=1)
+                G_swaps = nx.Graph()
+                G_swaps.add_nodes_from(range(numNodes))
+                G_swaps.add_edges_from(generatedInput["gSwaps"])
+                G_interactions = nx.DiGraph()
+                G_interactions.add_nodes_from(range(numNodes))
+                G_interactions.add_edges_from(generatedInput["gInteractions"])
+
+                self.assertEqual(numNodes, G_swaps.number_of_nodes())
+                self.assertTrue(nx.check_planarity(G_swaps)[0])
+                checkingG_swaps(G_swaps)
+                checkingG_interactions(G_interactions)
+                checkingSODDI(generatedInput["soddi"], numNodes)
+
+    def test_heavyHexDegree(self):
+        # Test that no qubit of a heavy-hex lattice has more than 3 neighbours
+        G_swaps = nx.Graph(generateInput(CONST_heavyHex, 200, 1, seed=1)["gSwaps"])
+        self.assertLessEqual(max(degree for node, degree in G_swaps.degree), 3)
+
+    def test_seeded(self):
+        # Test that the same seed always gives the same input
+        for family in CONST_generators:
+            self.assertEqual(generateInput(family, 50, 10, seed=3), generateInput(family, 50, 10, seed=3))
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_runWorkload(self):
+        # Test that a workload records its time, memory and swaps, and that the swaps are reproducible
+        workload = suiteWorkloads("smoke")[0]
+        result = runWorkload(workload)
+        self.assertGreater(result["seconds"], 0)
+        self.assertGreater(result["peakMemoryBytes"], 0)
+        self.assertEqual(result["totalSwaps"], runWorkload(workload, measureMemory=False)["totalSwaps"])
+
+
+class TestBaselineComparison(unittest.TestCase):
+    def setUp(self):
+        self.baseline = {"results": [{"family": "grid", "numNodes": 30, "soddiLength": 10, "seed": 8,
+                                      "entryPoint": "swapsRequired", "seconds": 1.0, "peakMemoryBytes": 10 ** 6,
+                                      "totalSwaps": 40}]}
+
+    def test_noRegression(self):
+        # Test that results within the tolerances are accepted
+        current = copy.deepcopy(self.baseline)
+        current["results"][0]["seconds"] = 1.2
+        self.assertEqual([], compareResults(self.baseline, current, timeTolerance=0.25))
+
+    def test_regressions(self):
+        # Test that slowdowns, more memory and different swap counts are all reported
+        current = copy.deepcopy(self.baseline)
+        current["results"][0].update({"seconds": 1.5, "peakMemoryBytes": 2 * 10 ** 6, "totalSwaps": 39})
+        failures = compareResults(self.baseline, current, timeTolerance=0.25, memoryTolerance=0.1)
+        self.assertEqual(3, len(failures))
+        self.assertIn("swaps changed 40 -> 39", failures[0])
+
+        self.assertIn("missing", compareResults(self.baseline, {"results": []})[0])
+
+    def test_committedBaselineSwaps(self):
+        # Test that the router still gives the swap counts of the committed baseline (times are machine dependent)
+        baseline = readResults(os.path.join(os.path.dirname(__file__), "..", "benchmarks", "baselines", "smoke.json"))
+        current = runSuite(resultsWorkloads(baseline), measureMemory=False)
+        self.assertEqual([result["totalSwaps"] for result in baseline["results"]],
+                         [result["totalSwaps"] for result in current["results"]])
+
+    def test_committedBaselineOverNoiseFloor(self):
+        # Test that a slowdown of every workload of the committed baseline by the tolerance is clearly over the noise
+        # floor, so that it is reported
+        baseline = readResults(os.path.join(os.path.dirname(__file__), "..", "benchmarks", "baselines", "smoke.json"))
+        for result in baseline["results"]:
+            self.assertGreater(result["seconds"] * CONST_defaultTimeTolerance, 2 * CONST_timeNoiseFloorSeconds)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import random
+import unittest
+
+import networkx as nx
+
+from server.topology.canonicalLabelling import canonicalLabelling, canonicalEdges
+
+
+class TestCanonicalLabelling(unittest.TestCase):
+    def assertSameCanonicalEdges(self, numNodes, swapEdges, interactionEdges, rng):
+        permutation = list(range(numNodes))
+        rng.shuffle(permutation)
+        relabelledSwapEdges = [(permutation[v], permutation[u]) for u, v in swapEdges]
+        rng.shuffle(relabelledSwapEdges)
+        relabelledInteractionEdges = [(permutation[u], permutation[v]) for u, v in interactionEdges]
+
+        canonical = canonicalLabelling(numNodes, swapEdges, interactionEdges)
+        relabelledCanonical = canonicalLabelling(numNodes, relabelledSwapEdges, relabelledInteractionEdges)
+        self.assertEqual(list(range(numNodes)), sorted(canonical))
+        self.assertEqual(canonicalEdges(canonical, swapEdges, interactionEdges),
+                         canonicalEdges(relabelledCanonical, relabelledSwapEdges, relabelledInteractionEdges))
+
+    def test_relabelledCopies(self):
+        # Test that relabelled copies of symmetric and random topologies get the same canonical edges
+        rng = random.Random(8)
+        self.assertSameCanonicalEdges(12, list(nx.cycle_graph(12).edges), [(0, 1), (6, 7)], rng)
+        grid = nx.convert_node_labels_to_integers(nx.grid_2d_graph(4, 5))
+        self.assertSameCanonicalEdges(20, list(grid.edges), [(0, 1)], rng)
+        for i in range(20):
+            G = nx.connected_watts_strogatz_graph(15, 4, 0.3, seed=i)
+            interactionEdges = [(u, v) if rng.random() < 0.5 else (v, u) for u, v in G.edges if rng.random() < 0.3]
+            self.assertSameCanonicalEdges(15, list(G.edges), interactionEdges, rng)
+
+    def test_directionMatters(self):
+        # Test that reversing an interaction edge gives another topology
+        canonical = canonicalLabelling(3, [(0, 1), (1, 2)], [(0, 1)])
+        reversedCanonical = canonicalLabelling(3, [(0, 1), (1, 2)], [(1, 0)])
+        self.assertNotEqual(canonicalEdges(canonical, [(0, 1), (1, 2)], [(0, 1)]),
+                            canonicalEdges(reversedCanonical, [(0, 1), (1, 2)], [(1, 0)]))
+
+    def test_tooSymmetric(self):
+        # Test that topologies needing too many labellings to be compared are given up on
+        self.assertIsNone(canonicalLabelling(8, list(nx.complete_graph(8).edges), []))
+
+    def test_longPathsGivenUp(self):
+        # Test that long rings and paths, whose every refinement takes as many rounds as they have nodes, are given up
+        # on too, while short ones still get a labelling
+        self.assertIsNone(canonicalLabelling(400, list(nx.cycle_graph(400).edges), []))
+        self.assertIsNone(canonicalLabelling(1000, list(nx.path_graph(1000).edges), [(0, 1)]))
+        self.assertIsNotNone(canonicalLabelling(200, list(nx.path_graph(200).edges), [(0, 1)]))
+        self.assertIsNotNone(canonicalLabelling(30, list(nx.cycle_graph(30).edges), []))
+
+
+if __name__ == '__main__':
+    unittest.main()
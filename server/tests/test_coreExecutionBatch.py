@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from server.critics.argsGatekeeper import checkValidArgs, outputFileFor
+from server.processingMain import (coreExecution, coreExecutionBatch, coreExecutionFiles,
+                                   CONST_batchSODDINodesNotInG_swapsMSG, CONST_batchSODDIBadFormatMSG,
+                                   CONST_batchInvalidInputFileMSG)
+
+
+class TestCoreExecutionBatch(unittest.TestCase):
+    def setUp(self):
+        self.inputG_swaps = [("a", "b"), ("b", "c"), ("c", "d"), ("d", "e"), ("c", "f")]
+        self.inputG_interactions = [("d", "e"), ("a", "b")]
+        self.soddis = [[("a", "e")], [("e", "a"), ("b", "f")], [("a", "z")], "not a SODDI", [("f", "f")],
+                       [("b", "d"), ("f", "a")]]
+
+    def assertBatch(self, results):
+        # Results come in the same order as the SODDIs, those that fail giving their exception
+        self.assertEqual(len(self.soddis), len(results))
+        for i in (0, 1, 5):
+            self.assertEqual(coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddis[i]), results[i])
+        self.assertEqual(CONST_batchSODDINodesNotInG_swapsMSG, str(results[2]))
+        self.assertEqual(CONST_batchSODDIBadFormatMSG, str(results[3]))
+        self.assertIsInstance(results[4], Exception)
+
+    def test_threads(self):
+        # Test that routing a batch in threads gives the solutions of coreExecution, and errors for the invalid SODDIs
+        self.assertBatch(coreExecutionBatch(self.inputG_swaps, self.inputG_interactions, self.soddis, maxWorkers=3))
+
+    def test_processes(self):
+        # Test that worker processes give the same results
+        self.assertBatch(coreExecutionBatch(self.inputG_swaps, self.inputG_interactions, self.soddis, maxWorkers=2,
+                                            useProcesses=True))
+
+
+
+class TestCoreExecutionFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.inputs = [
+            {"G_swaps": [[0, 1], [1, 2], [2, 3]], "G_interactions": [[2, 3]], "SODDI": [[0, 3]]},
+            {"G_swaps": [[0, 1], [1, 2], [2, 3]], "G_interactions": [[2, 3]], "SODDI": [[3, 0], [1, 3]]},
+            {"G_swaps": [["a", "b"], ["b", "c"]], "G_interactions": [["a", "b"]], "SODDI": [["c", "a"]]},
+            {"G_swaps": [[0, 1], [1, 2]], "G_interactions": [[0, 1]], "SODDI": [[0, 7]]},
+        ]
+        self.inputFileNames = []
+        for i, contents in enumerate(self.inputs):
+            self.inputFileNames.append(os.path.join(self.directory, "input%d.json" % i))
+            with open(self.inputFileNames[-1], "w") as inputFile:
+                json.dump(contents, inputFile)
+        self.inputFileNames.append(os.path.join(self.directory, "broken.json"))
+        with open(self.inputFileNames[-1], "w") as inputFile:
+            inputFile.write("{")
+
+    def test_sameAsCoreExecution(self):
+        # Test that every file gets the solution of coreExecution, in order, and the invalid ones their own error
+        solutions = coreExecutionFiles(self.inputFileNames, maxWorkers=2)
+
+        self.assertEqual(len(self.inputFileNames), len(solutions))
+        for contents, solution in zip(self.inputs[:3], solutions):
+            expected = coreExecution([tuple(edge) for edge in contents["G_swaps"]],
+                                     [tuple(edge) for edge in contents["G_interactions"]],
+                                     [tuple(pair) for pair in contents["SODDI"]])
+            self.assertEqual(expected, solution)
+        self.assertEqual(CONST_batchSODDINodesNotInG_swapsMSG, str(solutions[3]))
+        self.assertEqual(CONST_batchInvalidInputFileMSG, str(solutions[4]))
+
+    def test_arguments(self):
+        # Test that directories stand for the .json files in them and that each solution gets its own output file
+        outputDirectory = os.path.join(self.directory, "solutions")
+        inputFileNames, outputFileName, opts = checkValidArgs(["-i", self.directory, "-o", outputDirectory, "-w",
+                                                               "2"])
+        self.assertEqual(sorted(self.inputFileNames), inputFileNames)
+        self.assertIn(("-w", "2"), opts)
+        self.assertEqual(os.path.join(outputDirectory, "input0.solution.json"),
+                         outputFileFor(self.inputFileNames[0], outputFileName, len(inputFileNames)))
+        self.assertEqual("out.json", outputFileFor(self.inputFileNames[0], "out.json", 1))
+        self.assertIsNone(outputFileFor(self.inputFileNames[0], "", 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
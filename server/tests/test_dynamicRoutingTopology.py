@@ -0,0 +1,106 @@
+import random
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from server.critics.inputCritics import CONST_gSwapsMustBeConnectedMSG
+from server.processingMain import prepareTopology, updatePreparedTopology, routePreparedTopology, \
+    CONST_updateNodesNotInG_swapsMSG
+from server.topology.dynamicRoutingTopology import DynamicRoutingTopology
+from server.topology.routingTopology import RoutingTopology, CONST_topologyArrayNames
+from server.topology.topologyRegistry import topologyHandle, updatedTopologyHandle
+
+
+class TestDynamicRoutingTopology(unittest.TestCase):
+    """
+    DynamicRoutingTopology repairs the tables of a RoutingTopology edge by edge, which must end up exactly as building
+    them from the edges, ties included, since routing depends on which shortest path is chosen
+    """
+    def assertSameTopology(self, expected, topology):
+        for name in CONST_topologyArrayNames:
+            self.assertEqual(getattr(expected, name).dtype, getattr(topology, name).dtype, name)
+            self.assertTrue(np.array_equal(getattr(expected, name), getattr(topology, name)), name)
+
+    def test_randomEdits(self):
+        # Test that after every random edit, disconnected graphs included, the topology is the same as a new one
+        for seed in range(20):
+            rng = random.Random(seed)
+            numNodes = rng.randint(2, 30)
+            swapEdges = {tuple(sorted(edge)) for edge in
+                         nx.gnm_random_graph(numNodes, rng.randint(0, 2 * numNodes), seed=seed).edges}
+            interactionEdges = set()
+            dynamic = DynamicRoutingTopology.fromEdges(numNodes, sorted(swapEdges), [])
+            for _ in range(30):
+                u, v = rng.sample(range(numNodes), 2)
+                edit = rng.random()
+                if edit < 0.4:
+                    dynamic.addSwapEdge(u, v)
+                    swapEdges.add((min(u, v), max(u, v)))
+                elif edit < 0.75 and swapEdges:
+                    edge = rng.choice(sorted(swapEdges))
+                    dynamic.removeSwapEdge(*edge[::rng.choice((1, -1))])
+                    swapEdges.discard(edge)
+                elif edit < 0.9:
+                    dynamic.addInteractionEdge(u, v)
+                    interactionEdges.add((u, v))
+                elif interactionEdges:
+                    edge = rng.choice(sorted(interactionEdges))
+                    dynamic.removeInteractionEdge(*edge)
+                    interactionEdges.discard(edge)
+                self.assertSameTopology(RoutingTopology(numNodes, sorted(swapEdges), sorted(interactionEdges)),
+                                        dynamic.topology())
+
+    def test_onlyAffectedRowsRepaired(self):
+        # Test that adding an edge between two positions at the same distance from every other one repairs nothing
+        dynamic = DynamicRoutingTopology.fromEdges(4, [(0, 1), (0, 2), (1, 3), (2, 3)], [(0, 3)])
+        self.assertTrue(dynamic.addSwapEdge(1, 2))
+        self.assertFalse(dynamic.addSwapEdge(2, 1))
+        self.assertEqual(2, dynamic.rowsRepaired)  # Only the rows of 1 and 2 themselves
+        self.assertTrue(dynamic.isConnected())
+        self.assertTrue(dynamic.removeSwapEdge(1, 3))
+        self.assertTrue(dynamic.removeSwapEdge(2, 3))
+        self.assertFalse(dynamic.isConnected())
+
+
+class TestUpdatePreparedTopology(unittest.TestCase):
+    def setUp(self):
+        self.inputG_swaps = [("a", "b"), ("b", "c"), ("c", "d"), ("d", "e"), ("e", "f")]
+        self.inputG_interactions = [("e", "f")]
+        self.prepared = prepareTopology(self.inputG_swaps, self.inputG_interactions)
+
+    def test_sameAsPreparingAgain(self):
+        # Test that the updated topology routes like the edited edge lists prepared from scratch
+        updated = updatePreparedTopology(self.prepared, addedSwapEdges=[("a", "f"), ("b", "a")],
+                                         removedSwapEdges=[("d", "c")], addedInteractionEdges=[("a", "c")])
+        self.assertEqual([("a", "b"), ("b", "c"), ("d", "e"), ("e", "f"), ("a", "f")], updated.inputG_swaps)
+        self.assertEqual([("e", "f"), ("a", "c")], updated.inputG_interactions)
+
+        prepared = prepareTopology(updated.inputG_swaps, updated.inputG_interactions)
+        soddi = [("a", "e"), ("c", "f"), ("b", "d")]
+        self.assertEqual(routePreparedTopology(prepared, soddi), routePreparedTopology(updated, soddi))
+
+    def test_idsOfEditedEdges(self):
+        # Test that the IDs are those of the edited edge lists, every node staying on its position, and that the
+        # handle of the updated topology is not the one of the same edges registered from scratch
+        updated = updatePreparedTopology(self.prepared, addedSwapEdges=[("f", "a")], removedSwapEdges=[("a", "b")])
+        prepared = prepareTopology(updated.inputG_swaps, updated.inputG_interactions)
+        self.assertEqual(["b", "c", "d", "e", "f", "a"], updated.ids)
+        self.assertEqual(prepared.ids, updated.ids)
+        self.assertEqual(self.prepared.namesOnPositions, updated.namesOnPositions)
+        soddi = [("a", "e"), ("c", "f"), ("b", "d")]
+        self.assertEqual(routePreparedTopology(prepared, soddi)[:2], routePreparedTopology(updated, soddi)[:2])
+        self.assertEqual(prepared.ids, routePreparedTopology(updated, soddi)[2])
+        self.assertNotEqual(topologyHandle(updated.inputG_swaps, updated.inputG_interactions),
+                            updatedTopologyHandle(updated.inputG_swaps, updated.inputG_interactions, updated.positions))
+
+    def test_invalidUpdates(self):
+        # Test that G_swaps cannot be disconnected, nor edges given between unknown nodes
+        with self.assertRaisesRegex(Exception, CONST_gSwapsMustBeConnectedMSG):
+            updatePreparedTopology(self.prepared, removedSwapEdges=[("c", "d")])
+        with self.assertRaisesRegex(ValueError, CONST_updateNodesNotInG_swapsMSG):
+            updatePreparedTopology(self.prepared, addedSwapEdges=[("a", "z")])
+
+
+if __name__ == '__main__':
+    unittest.main()
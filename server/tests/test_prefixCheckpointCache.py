@@ -0,0 +1,161 @@
+import random
+import unittest
+
+import networkx as nx
+
+from server.caching.prefixCheckpointCache import PrefixCheckpointCache, CONST_checkpointInterval, \
+    CONST_defaultPrefixCheckpointCacheMaxBytes
+from server.processingMain import coreExecution, prepareTopology, routePreparedTopology, iterRoutePreparedTopology, \
+    budgetStoppedAt, CONST_resumeIndexOutOfRangeMSG
+from server.swapping.routingBudget import RoutingBudget
+from server.swapping.routingState import RoutingState
+from server.swapping.swapFunctions import iterRouteSODDI
+from server.topology.routingTopology import RoutingTopology
+
+
+class TestPrefixCheckpointCache(unittest.TestCase):
+    def setUp(self):
+        random.seed(3)
+        G_swaps = nx.convert_node_labels_to_integers(nx.grid_2d_graph(5, 5))
+        self.inputG_swaps = [(str(u), str(v)) for u, v in G_swaps.edges]
+        self.inputG_interactions = [("0", "1"), ("12", "17"), ("24", "19")]
+        self.soddi = [tuple(str(node) for node in random.sample(range(25), 2))
+                      for _ in range(3 * CONST_checkpointInterval + 5)]
+
+    def test_editedSuffix(self):
+        # Test that a SODDI with its last entries edited gets the same solution, only its changed entries being routed
+        checkpoints = PrefixCheckpointCache()
+        edited = self.soddi[:-3] + [("3", "21"), ("7", "8"), ("0", "24")]
+        self.assertEqual(coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi),
+                         coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi,
+                                       checkpoints=checkpoints))
+        self.assertEqual(coreExecution(self.inputG_swaps, self.inputG_interactions, edited),
+                         coreExecution(self.inputG_swaps, self.inputG_interactions, edited, checkpoints=checkpoints))
+        self.assertEqual(len(self.soddi) - 3, checkpoints.entriesReused)
+
+        # Both are kept, and a shorter SODDI is answered from the longest one without routing anything
+        self.assertEqual(coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi[:40]),
+                         coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi[:40],
+                                       checkpoints=checkpoints))
+        stats = checkpoints.stats()
+        self.assertEqual(sum(routedPrefix.numBytes for routedPrefix in checkpoints.routed.values()), stats.pop("bytes"))
+        self.assertEqual({"hits": 2, "misses": 1, "hitRate": 2 / 3, "entriesReused": len(self.soddi) - 3 + 40,
+                          "evictions": 0, "size": 3, "maxSize": 64,
+                          "maxBytes": CONST_defaultPrefixCheckpointCacheMaxBytes}, stats)
+
+    def test_budgetedRunsSeededAndResumed(self):
+        # Test that budgeted runs reuse and keep prefixes too, that a stopped SODDI is resumed from its resumeIndex
+        # alone, with or without checkpoints, and that entries routed the cheap way are never kept
+        prepared = prepareTopology(self.inputG_swaps, self.inputG_interactions)
+        entries = list(iterRoutePreparedTopology(prepared, self.soddi))
+        checkpoints = PrefixCheckpointCache()
+
+        budget = RoutingBudget(maxEntries=40)
+        stopped = routePreparedTopology(prepared, self.soddi, budget=budget, checkpoints=checkpoints)
+        self.assertEqual([step for swapSteps in entries[:40] for step in swapSteps], stopped[1])
+        self.assertEqual(40, budget.resumeIndex)
+
+        for resumeCheckpoints in (checkpoints, None):
+            resumed = RoutingBudget(maxEntries=30, resumeFrom=budgetStoppedAt(prepared, self.soddi, 40,
+                                                                              resumeCheckpoints))
+            rest = routePreparedTopology(prepared, self.soddi, budget=resumed, checkpoints=resumeCheckpoints)
+            self.assertEqual([step for swapSteps in entries[40:70] for step in swapSteps], rest[1])
+            self.assertEqual({"startIndex": 40, "complete": False, "resumeIndex": 70, "entriesRouted": 30,
+                              "entriesReused": 0, "degradedEntries": []}, resumed.report())
+
+        # The entries kept by the runs before are reused, only those after them counting against the budget
+        budget = RoutingBudget(maxEntries=10)
+        reused = routePreparedTopology(prepared, self.soddi, budget=budget, checkpoints=checkpoints)
+        self.assertEqual([step for swapSteps in entries[:80] for step in swapSteps], reused[1])
+        self.assertEqual({"startIndex": 0, "complete": False, "resumeIndex": 80, "entriesRouted": 10,
+                          "entriesReused": 70, "degradedEntries": []}, budget.report())
+        self.assertEqual(routePreparedTopology(prepared, self.soddi),
+                         routePreparedTopology(prepared, self.soddi, checkpoints=checkpoints))
+        with self.assertRaisesRegex(ValueError, CONST_resumeIndexOutOfRangeMSG):
+            budgetStoppedAt(prepared, self.soddi, len(self.soddi) + 1)
+
+        checkpoints = PrefixCheckpointCache()
+        budget = RoutingBudget(maxEntries=10, degrade=True)
+        routePreparedTopology(prepared, self.soddi, budget=budget, checkpoints=checkpoints)
+        self.assertEqual([10], [len(routedPrefix.entrySteps) for routedPrefix in checkpoints.routed.values()])
+
+    def test_streamedPrefixesReusedAndKept(self):
+        # Test that streaming reuses the prefixes routed before and keeps its own, even when given up halfway
+        prepared = prepareTopology(self.inputG_swaps, self.inputG_interactions)
+        entries = list(iterRoutePreparedTopology(prepared, self.soddi))
+        checkpoints = PrefixCheckpointCache()
+
+        streamed = iterRoutePreparedTopology(prepared, self.soddi, checkpoints=checkpoints)
+        self.assertEqual(entries[:40], [next(streamed) for _ in range(40)])
+        streamed.close()
+        self.assertEqual([40], [len(routedPrefix.entrySteps) for routedPrefix in checkpoints.routed.values()])
+
+        edited = self.soddi[:-3] + [("3", "21"), ("7", "8"), ("0", "24")]
+        self.assertEqual(list(iterRoutePreparedTopology(prepared, edited)),
+                         list(iterRoutePreparedTopology(prepared, edited, checkpoints=checkpoints)))
+        self.assertEqual(entries, list(iterRoutePreparedTopology(prepared, self.soddi, checkpoints=checkpoints)))
+        self.assertEqual(40 + len(self.soddi) - 3, checkpoints.entriesReused)
+
+    def test_stateAfter(self):
+        # Test that the state rebuilt after any entry, from a snapshot and the swaps since, is the one routing got to
+        topology = RoutingTopology(25, [(int(u), int(v)) for u, v in self.inputG_swaps],
+                                   [(int(u), int(v)) for u, v in self.inputG_interactions])
+        soddi = [(int(x), int(y)) for x, y in self.soddi]
+        checkpoints = PrefixCheckpointCache()
+        routedPrefix, state = checkpoints.longestPrefix("handle", soddi, 25)
+        states = [state.copy()]
+        for swapSteps in iterRouteSODDI(topology, soddi, state=state):
+            routedPrefix.addEntry(swapSteps, state)
+            states.append(state.copy())
+        self.assertEqual(len(soddi) // CONST_checkpointInterval, len(routedPrefix.snapshots))
+        for numEntries in (0, 1, CONST_checkpointInterval, CONST_checkpointInterval + 7, len(soddi)):
+            rebuilt = routedPrefix.stateAfter(numEntries, 25)
+            self.assertEqual(list(states[numEntries].positionOf), list(rebuilt.positionOf))
+            self.assertEqual(list(states[numEntries].labelAt), list(rebuilt.labelAt))
+
+    def test_otherTopologyNotReused(self):
+        # Test that SODDIs routed on another topology are never reused, and that the least recently used is evicted
+        checkpoints = PrefixCheckpointCache(maxSize=1)
+        checkpoints.put("handle", checkpoints.longestPrefix("handle", [(0, 1)], 2)[0])
+        routedPrefix, state = checkpoints.longestPrefix("other", [(0, 1)], 2)
+        self.assertEqual([], routedPrefix.entrySteps)
+        self.assertTrue(state.isIdentity())
+        checkpoints.put("other", routedPrefix)
+        self.assertEqual(1, checkpoints.stats()["size"])
+
+    def test_maxBytes(self):
+        # Test that prefixes stop recording entries, snapshots included, once they would go over maxBytes, still
+        # giving the same solutions, and that the least recently used are evicted once they go over it together
+        prepared = prepareTopology(self.inputG_swaps, self.inputG_interactions)
+        entries = list(iterRoutePreparedTopology(prepared, self.soddi))
+        checkpoints = PrefixCheckpointCache()
+        list(iterRoutePreparedTopology(prepared, self.soddi, checkpoints=checkpoints))
+        full = next(iter(checkpoints.routed.values()))
+        self.assertEqual(len(self.soddi), len(full.entrySteps))
+        half = full.reusedFor(full.soddi, 2 * CONST_checkpointInterval).numBytes
+
+        checkpoints = PrefixCheckpointCache(maxBytes=half)
+        self.assertEqual(entries, list(iterRoutePreparedTopology(prepared, self.soddi, checkpoints=checkpoints)))
+        routedPrefix = next(iter(checkpoints.routed.values()))
+        self.assertEqual(2 * CONST_checkpointInterval, len(routedPrefix.entrySteps))
+        self.assertEqual(2, len(routedPrefix.snapshots))
+        self.assertLessEqual(routedPrefix.numBytes, half)
+        self.assertEqual(entries, list(iterRoutePreparedTopology(prepared, self.soddi, checkpoints=checkpoints)))
+        self.assertEqual(2 * CONST_checkpointInterval, checkpoints.entriesReused)
+
+        list(iterRoutePreparedTopology(prepared, self.soddi[::-1], checkpoints=checkpoints))
+        self.assertEqual(1, checkpoints.stats()["size"])
+        self.assertEqual(1, checkpoints.evictions)
+        self.assertNotEqual(full.soddi, next(iter(checkpoints.routed.values())).soddi)
+
+    def test_fromPositions(self):
+        # Test that a state rebuilt from its positionOf array is the same state
+        state = RoutingState(4)
+        state.applySwapSteps([(0, 2), (2, 3), "#"])
+        rebuilt = RoutingState.fromPositions(state.positionOf)
+        self.assertEqual([2, 1, 3, 0], list(rebuilt.positionOf))
+        self.assertEqual(list(state.labelAt), list(rebuilt.labelAt))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from server.caching.resultCache import ResultCache, resultKey
+from server.instrumentation.routingTrace import RoutingTrace
+from server.processingMain import coreExecution
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.inputG_swaps = [("a", "b"), ("b", "c"), ("c", "d"), ("d", "e")]
+        self.inputG_interactions = [("d", "e")]
+        self.soddi = [("a", "e"), ("b", "d")]
+
+    def test_key(self):
+        # Test that pairs given as tuples or lists make the same key, but not a different SODDI
+        self.assertEqual(resultKey("handle", [("a", "e")]), resultKey("handle", [["a", "e"]]))
+        self.assertNotEqual(resultKey("handle", [("a", "e")]), resultKey("handle", [("e", "a")]))
+        self.assertNotEqual(resultKey("handle", [("a", "e")]), resultKey("other", [("a", "e")]))
+
+    def test_memoizedSolution(self):
+        # Test that the same request is answered from the cache with the same solution, which callers cannot alter
+        cache = ResultCache()
+        expected = coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi, resultCache=cache)
+        expected[1].append("altered by the caller")
+
+        solution = coreExecution([list(edge) for edge in self.inputG_swaps], self.inputG_interactions, self.soddi,
+                                 resultCache=cache)
+        self.assertEqual(coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi), solution)
+        self.assertEqual({"hits": 1, "misses": 1, "hitRate": 0.5, "size": 1, "maxSize": 1024}, cache.stats())
+
+    def test_bypassedByTrace(self):
+        # Test that routing is done again when a trace has to be recorded
+        cache = ResultCache()
+        coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi, resultCache=cache)
+        trace = RoutingTrace()
+        coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi, trace=trace, resultCache=cache)
+        self.assertEqual(2, len(trace.entries))
+        self.assertEqual(0, cache.hits)
+
+    def test_leastRecentlyUsedEvicted(self):
+        # Test that only the maxSize most recently used solutions are kept
+        cache = ResultCache(maxSize=2)
+        cache.put("first", (0, [], []))
+        cache.put("second", (0, [], []))
+        cache.get("first")
+        cache.put("third", (0, [], []))
+        self.assertIsNone(cache.get("second"))
+        self.assertIsNotNone(cache.get("first"))
+        self.assertIsNotNone(cache.get("third"))
+
+
+if __name__ == '__main__':
+    unittest.main()
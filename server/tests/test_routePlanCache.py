@@ -0,0 +1,87 @@
+import pickle
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
+
+from server.searching.routePlanCache import RoutePlanCache
+from server.swapping.swapFunctions import swapsRequired
+from server.topology.routingTopology import RoutingTopology
+
+
+class TestRoutePlanCache(unittest.TestCase):
+    def setUp(self):
+        self.topology = RoutingTopology(4, [(0, 1), (1, 2), (2, 3)], [(2, 3)])
+        self.bestPinPen = ((2, 3), (2, 0, 0, 0), ([0, 1, 2], [3], True))
+
+    def test_hitsGetTheirOwnPaths(self):
+        # Test that altering the paths of a plan (as executeSwaps does) does not alter the cached plan
+        planCache = RoutePlanCache()
+        planCache.useWith(self.topology)
+        self.assertIsNone(planCache.get(0, 3))
+        planCache.put(0, 3, 0, self.bestPinPen)
+
+        plan, mergeBranch, situation = planCache.get(0, 3)
+        plan[2][0].append(9)
+        self.assertEqual(self.bestPinPen, planCache.get(0, 3)[0])
+        self.assertEqual({"hits": 2, "misses": 1, "hitRate": 2 / 3, "size": 1, "maxSize": 4096}, planCache.stats())
+
+    def test_leastRecentlyUsedEvicted(self):
+        # Test that only the most recently used plans are kept
+        planCache = RoutePlanCache(maxSize=2)
+        planCache.useWith(self.topology)
+        planCache.put(0, 3, 0, self.bestPinPen)
+        planCache.put(1, 3, 0, self.bestPinPen)
+        planCache.get(0, 3)
+        planCache.put(3, 0, 0, self.bestPinPen)
+        self.assertIsNone(planCache.get(1, 3))
+        self.assertIsNotNone(planCache.get(0, 3))
+
+    def test_otherTopology(self):
+        # Test that the plans are dropped when the cache is used with another topology
+        planCache = RoutePlanCache()
+        planCache.useWith(self.topology)
+        planCache.put(0, 3, 0, self.bestPinPen)
+        planCache.useWith(RoutingTopology(4, [(0, 1), (1, 2), (2, 3)], [(2, 3)]))
+        self.assertIsNone(planCache.get(0, 3))
+
+    def test_sameSwapsWithAndWithoutCache(self):
+        # Test that a SODDI repeating the same positions routes the same way when the plans are reused
+        G_swaps = nx.cycle_graph(6)
+        G_interactions = nx.DiGraph()
+        G_interactions.add_nodes_from(range(6))
+        G_interactions.add_edge(0, 1)
+        soddi = [(2, 5), (0, 3), (2, 5), (0, 3), (2, 5)] * 4
+
+        planCache = RoutePlanCache()
+        withCache = swapsRequired(G_swaps, G_interactions, soddi, planCache=planCache)[2]
+        withoutCache = swapsRequired(G_swaps, G_interactions, soddi, planCache=RoutePlanCache(maxSize=0))[2]
+        self.assertEqual(withoutCache, withCache)
+        self.assertGreater(planCache.stats()["hits"], 0)
+
+    def test_sharedByThreads(self):
+        # Test that threads looking plans up and storing them at once keep the cache consistent and count every lookup
+        planCache = RoutePlanCache(maxSize=8)
+        planCache.useWith(self.topology)
+
+        def lookUp(thread):
+            for i in range(2000):
+                if planCache.get(i % 16, thread) is None:
+                    planCache.put(i % 16, thread, 0, self.bestPinPen)
+
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(lookUp, range(4)))
+        stats = planCache.stats()
+        self.assertEqual(4 * 2000, stats["hits"] + stats["misses"])
+        self.assertEqual(8, stats["size"])
+
+    def test_pickledEmpty(self):
+        # Test that the cache can be sent to worker processes, without its plans
+        planCache = RoutePlanCache(maxSize=2)
+        planCache.put(0, 3, 0, self.bestPinPen)
+        unpickled = pickle.loads(pickle.dumps(planCache))
+        self.assertEqual({"hits": 0, "misses": 0, "hitRate": 0.0, "size": 0, "maxSize": 2}, unpickled.stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
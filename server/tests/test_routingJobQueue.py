@@ -0,0 +1,130 @@
+import threading
+import time
+import unittest
+
+from server.jobs.routingJobQueue import RoutingJobQueue, JobQueueFullError
+from server.processingMain import coreExecution, prepareTopology, iterRoutePreparedTopology
+
+
+def blockedEntries(started, release, numEntries):
+    """
+    Entries of one swap each that wait for release before the first one is routed
+    """
+    started.set()
+    release.wait(5)
+    for i in range(numEntries):
+        yield [("a", "b")]
+
+
+def waitFor(job, status):
+    deadline = time.time() + 5
+    while job.status != status and time.time() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+class TestRoutingJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.inputG_swaps = [("a", "b"), ("b", "c"), ("c", "d"), ("d", "e")]
+        self.inputG_interactions = [("d", "e")]
+        self.soddi = [("a", "e"), ("b", "d"), ("a", "c")]
+
+    def test_sameSolution(self):
+        # Test that a job ends up with the same solution as coreExecution, with every entry counted as routed
+        prepared = prepareTopology(self.inputG_swaps, self.inputG_interactions)
+        queue = RoutingJobQueue(maxWorkers=1)
+        job = queue.submit(iterRoutePreparedTopology(prepared, self.soddi), len(self.soddi), prepared.ids)
+
+        self.assertEqual("done", waitFor(job, "done"))
+        self.assertEqual(coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi), job.result())
+        self.assertEqual({"jobID": job.jobID, "status": "done", "entriesRouted": 3, "totalEntries": 3},
+                         job.progress())
+        self.assertIs(job, queue.job(job.jobID))
+
+    def test_cancel(self):
+        # Test that a waiting job is cancelled straight away and a running one before its next entry
+        queue = RoutingJobQueue(maxWorkers=1)
+        started, release = threading.Event(), threading.Event()
+        running = queue.submit(blockedEntries(started, release, 3), 3, [])
+        started.wait(5)
+        waiting = queue.submit(blockedEntries(threading.Event(), release, 1), 1, [])
+
+        self.assertTrue(queue.cancel(waiting.jobID))
+        self.assertEqual("cancelled", waiting.status)
+        self.assertTrue(queue.cancel(running.jobID))
+        release.set()
+        self.assertEqual("cancelled", waitFor(running, "cancelled"))
+        self.assertEqual(0, running.entriesRouted)
+        self.assertFalse(queue.cancel(running.jobID))
+        self.assertFalse(queue.cancel("unknown"))
+
+    def test_shortestFirstAndBounded(self):
+        # Test that waiting jobs start with the shortest one and that no more than maxQueued can wait
+        queue = RoutingJobQueue(maxWorkers=1, maxQueued=2)
+        started, release = threading.Event(), threading.Event()
+        blocking = queue.submit(blockedEntries(started, release, 1), 1, [])
+        started.wait(5)
+        order = []
+
+        def recordedEntries(name, numEntries):
+            order.append(name)
+            for i in range(numEntries):
+                yield []
+
+        long = queue.submit(recordedEntries("long", 100), 100, [])
+        short = queue.submit(recordedEntries("short", 2), 2, [])
+        with self.assertRaises(JobQueueFullError):
+            queue.submit(recordedEntries("rejected", 1), 1, [])
+        release.set()
+
+        self.assertEqual("done", waitFor(long, "done"))
+        self.assertEqual("done", waitFor(short, "done"))
+        self.assertEqual("done", blocking.status)
+        self.assertEqual(["short", "long"], order)
+
+    def test_oldestNotStarved(self):
+        # Test that a long job starts once maxOvertaking shorter jobs submitted after it have started
+        queue = RoutingJobQueue(maxWorkers=1, maxOvertaking=2)
+        started, release = threading.Event(), threading.Event()
+        queue.submit(blockedEntries(started, release, 1), 1, [])
+        started.wait(5)
+        order = []
+
+        def recordedEntries(name, numEntries):
+            order.append(name)
+            for i in range(numEntries):
+                yield []
+
+        jobs = [queue.submit(recordedEntries("long", 100), 100, [])]
+        jobs += [queue.submit(recordedEntries("short" + str(i), 1), 1, []) for i in range(3)]
+        release.set()
+
+        for job in jobs:
+            self.assertEqual("done", waitFor(job, "done"))
+        self.assertEqual(["short0", "short1", "long", "short2"], order)
+
+    def test_failure(self):
+        # Test that an error while routing fails the job with its message
+        def failingEntries():
+            yield [("a", "b")]
+            raise ValueError("Routing went wrong")
+
+        queue = RoutingJobQueue(maxWorkers=1)
+        job = queue.submit(failingEntries(), 2, [])
+        self.assertEqual("failed", waitFor(job, "failed"))
+        self.assertEqual("Routing went wrong", job.progress()["error"])
+        self.assertEqual(1, job.entriesRouted)
+
+    def test_finishedJobsForgotten(self):
+        # Test that only the last finishedJobsKept finished jobs are remembered
+        queue = RoutingJobQueue(maxWorkers=1, finishedJobsKept=1)
+        first = queue.submit(iter([]), 0, [])
+        waitFor(first, "done")
+        second = queue.submit(iter([]), 0, [])
+        waitFor(second, "done")
+        self.assertIsNone(queue.job(first.jobID))
+        self.assertIs(second, queue.job(second.jobID))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import networkx as nx
+
+from server.swapping.routingState import RoutingState
+from server.swapping.swapFunctions import swapsRequired
+
+
+class TestRoutingState(unittest.TestCase):
+    """
+    RoutingState keeps track of which label is on which position, so that the graphs never need to be relabelled while
+    routing
+    """
+    def test_initiallyIdentity(self):
+        # Test that every label starts on the position with its same number
+        state = RoutingState(4)
+        self.assertEqual((0, 1, 2, 3), state.positionsOf([0, 1, 2, 3]))
+        self.assertEqual({0: 0, 1: 1, 2: 2, 3: 3}, state.labelMapping())
+
+    def test_applyMapping(self):
+        # Test that applying the mapping of a label moving along a path updates both arrays
+        state = RoutingState(4)
+
+        # The label on position 0 has been swapped all the way to position 3
+        state.applyMapping({0: 1, 1: 2, 2: 3, 3: 0})
+        self.assertEqual({0: 1, 1: 2, 2: 3, 3: 0}, state.labelMapping())
+        self.assertEqual((3, 0), state.positionsOf((0, 1)))
+
+    def test_labelSwapSteps(self):
+        # Test that swap steps in positions are translated into labels, leaving the markers as they are
+        state = RoutingState(4)
+        state.applyMapping({0: 1, 1: 0})
+        self.assertEqual([(1, 0), (1, 2), "#"], state.labelSwapSteps([(0, 1), (0, 2), "#"]))
+
+
+class TestSwapsRequiredKeepsGraphs(unittest.TestCase):
+    def test_originalGraphsUntouched(self):
+        # Test that routing does not alter the graphs given and that the returned graphs show the final labels
+        G_swaps = nx.path_graph(4)
+        G_interactions = nx.DiGraph()
+        G_interactions.add_nodes_from(range(4))
+        G_interactions.add_edge(2, 3)
+
+        newG_swaps, newG_interactions, swapSteps = swapsRequired(G_swaps, G_interactions, [(0, 3)])
+
+        self.assertEqual([(0, 1), (0, 2), "#"], swapSteps)
+        self.assertEqual([(2, 3)], list(G_interactions.edges))
+        self.assertTrue(newG_interactions.has_edge(0, 3))
+
+    def test_copiesWhenNothingMoves(self):
+        # Test that new graphs are returned even when no swap is needed at all, and the given ones only if destructive
+        G_swaps = nx.path_graph(3)
+        G_interactions = nx.DiGraph()
+        G_interactions.add_nodes_from(range(3))
+        G_interactions.add_edge(0, 1)
+
+        newG_swaps, newG_interactions, swapSteps = swapsRequired(G_swaps, G_interactions, [(0, 1)])
+
+        self.assertEqual(["Done already"], swapSteps)
+        self.assertIsNot(G_swaps, newG_swaps)
+        self.assertIsNot(G_interactions, newG_interactions)
+        self.assertEqual(list(G_swaps.edges), list(newG_swaps.edges))
+        self.assertEqual(list(G_interactions.edges), list(newG_interactions.edges))
+
+        newG_swaps, newG_interactions, swapSteps = swapsRequired(G_swaps, G_interactions, [(0, 1)], destructive=True)
+        self.assertIs(G_swaps, newG_swaps)
+        self.assertIs(G_interactions, newG_interactions)
+
+    def test_destructive(self):
+        # Test that with destructive=True the given graphs themselves are relabelled
+        G_swaps = nx.path_graph(4)
+        G_interactions = nx.DiGraph()
+        G_interactions.add_nodes_from(range(4))
+        G_interactions.add_edge(2, 3)
+
+        newG_swaps, newG_interactions, swapSteps = swapsRequired(G_swaps, G_interactions, [(0, 3)], destructive=True)
+
+        self.assertIs(G_interactions, newG_interactions)
+        self.assertEqual([(0, 3)], list(G_interactions.edges))
+        self.assertEqual(3, G_swaps.number_of_edges())
+
+
+if __name__ == '__main__':
+    unittest.main()
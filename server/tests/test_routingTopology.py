@@ -0,0 +1,145 @@
+import pickle
+import random
+import unittest
+import networkx as nx
+import numpy as np
+
+from server.topology.routingTopology import RoutingTopology, CONST_topologyNodesNotInRangeMSG, \
+    CONST_topologyIsImmutableMSG, CONST_topologyArrayNames
+
+
+class TestRoutingTopologyTables(unittest.TestCase):
+    """
+    RoutingTopology precomputes the distance matrix and next-hop table of G_swaps so that searching does not need to
+    call nx.shortest_path again and again
+    """
+    def test_distancesMatchNetworkx(self):
+        # Test that every entry of the distance matrix is the length of a shortest path
+        G_swaps = nx.Graph()
+        G_swaps.add_nodes_from(range(6))
+        G_swaps.add_edges_from([(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (5, 0), (1, 4)])
+
+        topology = RoutingTopology.fromGraphs(G_swaps)
+        expectedDistances = dict(nx.all_pairs_shortest_path_length(G_swaps))
+        for source in range(6):
+            for target in range(6):
+                self.assertEqual(expectedDistances[source][target], topology.distance(source, target))
+
+    def test_shortestPathIsValid(self):
+        # Test that the paths walked along the next-hop table are shortest paths made of existing swap edges
+        G_swaps = nx.grid_2d_graph(3, 4)
+        G_swaps = nx.convert_node_labels_to_integers(G_swaps)
+
+        topology = RoutingTopology.fromGraphs(G_swaps)
+        for source in G_swaps.nodes:
+            for target in G_swaps.nodes:
+                path = topology.shortestPath(source, target)
+                self.assertEqual(source, path[0])
+                self.assertEqual(target, path[-1])
+                self.assertEqual(nx.shortest_path_length(G_swaps, source, target), len(path) - 1)
+                for i in range(1, len(path)):
+                    self.assertTrue(G_swaps.has_edge(path[i - 1], path[i]))
+
+    def test_lowestNextHop(self):
+        # Test that among equally short paths, the next hop is the lowest neighbour one swap closer to the target, even
+        # if a BFS from the target reaches another one first (4, through 1, before 3, through 2)
+        topology = RoutingTopology(6, [(0, 1), (0, 2), (1, 4), (2, 3), (3, 5), (4, 5)], [(0, 5)])
+        self.assertEqual([5, 3, 2, 0], topology.shortestPath(5, 0))
+        self.assertEqual([0, 1, 4, 5], topology.shortestPath(0, 5))
+
+    def test_relabelled(self):
+        # Test that relabelling a topology, disconnected ones included, gives exactly the one built from the relabelled
+        # edges, without any BFS
+        for seed in range(10):
+            rng = random.Random(seed)
+            numNodes = rng.randint(1, 25)
+            swapEdges = list(nx.gnm_random_graph(numNodes, rng.randint(0, 2 * numNodes), seed=seed).edges)
+            interactionEdges = [tuple(rng.sample(range(numNodes), 2)) for _ in range(numNodes // 3)] \
+                if numNodes > 1 else []
+            labels = list(range(numNodes))
+            rng.shuffle(labels)
+
+            relabelled = RoutingTopology(numNodes, swapEdges, interactionEdges).relabelled(labels)
+            expected = RoutingTopology(numNodes, [(labels[u], labels[v]) for u, v in swapEdges],
+                                       [(labels[u], labels[v]) for u, v in interactionEdges])
+            for name in CONST_topologyArrayNames:
+                self.assertEqual(getattr(expected, name).dtype, getattr(relabelled, name).dtype, name)
+                self.assertTrue(np.array_equal(getattr(expected, name), getattr(relabelled, name)), name)
+
+    def test_narrowDtypes(self):
+        # Test that small devices use the narrowest integer types for their tables
+        G_swaps = nx.path_graph(10)
+        topology = RoutingTopology.fromGraphs(G_swaps)
+        self.assertEqual(1, topology.distances.itemsize)
+        self.assertEqual(1, topology.nextHops.itemsize)
+
+    def test_nodesNotInRange(self):
+        # Test that nodes must be named 0 to (number of nodes - 1)
+        G_swaps = nx.Graph()
+        G_swaps.add_edges_from([(1, 2), (2, 3)])
+        with self.assertRaises(ValueError, msg=CONST_topologyNodesNotInRangeMSG):
+            RoutingTopology.fromGraphs(G_swaps)
+
+
+class TestRoutingTopologyInteractionIndex(unittest.TestCase):
+    """
+    The in-neighbour index of G_interactions allows finding the nodes aiming at a node without scanning every node
+    """
+    def test_activeNeighbours(self):
+        # Test that the in-neighbours of every node are given in ascending order
+        G_swaps = nx.path_graph(5)
+        G_interactions = nx.DiGraph()
+        G_interactions.add_nodes_from(range(5))
+        G_interactions.add_edges_from([(4, 0), (1, 0), (3, 0), (0, 2)])
+
+        topology = RoutingTopology.fromGraphs(G_swaps, G_interactions)
+        self.assertEqual([1, 3, 4], topology.activeNeighbours(0))
+        self.assertEqual([0], topology.activeNeighbours(2))
+        self.assertEqual([], topology.activeNeighbours(4))
+
+    def test_passiveNeighboursAndHasInteraction(self):
+        # Test that the out-neighbours of every node are given in ascending order and that interactions are directed
+        topology = RoutingTopology(4, [(0, 1), (1, 2), (2, 3)], [(0, 3), (0, 1), (2, 1)])
+        self.assertEqual([1, 3], topology.passiveNeighbours(0))
+        self.assertEqual([], topology.passiveNeighbours(1))
+        self.assertTrue(topology.hasInteraction(0, 3))
+        self.assertFalse(topology.hasInteraction(3, 0))
+        self.assertFalse(topology.hasInteraction(1, 2))
+
+
+class TestRoutingTopologyFromEdgeLists(unittest.TestCase):
+    """
+    The topology is built straight from the edge lists of G_swaps and G_interactions, as compact CSR arrays
+    """
+    def test_swapAdjacency(self):
+        # Test that swap edges go both ways, duplicates are dropped and every row is in ascending order
+        topology = RoutingTopology(4, [(2, 0), (0, 1), (1, 0), (3, 0)], [(0, 1)])
+        self.assertEqual([1, 2, 3], topology.swapNeighbours(0))
+        self.assertEqual([0], topology.swapNeighbours(3))
+        self.assertEqual([0, 3, 4, 5, 6], topology.swapIndptr.tolist())
+
+    def test_nodesNotInRange(self):
+        # Test that edges cannot mention nodes outside of 0 to (number of nodes - 1)
+        with self.assertRaises(ValueError, msg=CONST_topologyNodesNotInRangeMSG):
+            RoutingTopology(3, [(0, 1), (1, 3)], [(0, 1)])
+
+    def test_immutable(self):
+        # Test that neither the attributes nor the arrays of the topology can be altered
+        topology = RoutingTopology(3, [(0, 1), (1, 2)], [(0, 1)])
+        with self.assertRaises(AttributeError, msg=CONST_topologyIsImmutableMSG):
+            topology.numNodes = 4
+        with self.assertRaises(ValueError):
+            topology.distances[0, 2] = 0
+
+    def test_pickle(self):
+        # Test that the topology can be pickled (to be sent to worker processes) and stays immutable
+        topology = RoutingTopology(3, [(0, 1), (1, 2)], [(0, 2)])
+        unpickled = pickle.loads(pickle.dumps(topology))
+        self.assertEqual(topology.shortestPath(0, 2), unpickled.shortestPath(0, 2))
+        self.assertTrue(unpickled.hasInteraction(0, 2))
+        with self.assertRaises(AttributeError):
+            unpickled.numNodes = 4
+
+
+if __name__ == '__main__':
+    unittest.main()
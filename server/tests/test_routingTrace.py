@@ -0,0 +1,55 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+import networkx as nx
+
+from server.instrumentation.routingTrace import RoutingTrace, CONST_traceFields, CONST_doneAlreadyCase
+from server.swapping.swapFunctions import swapsRequired
+
+
+class TestRoutingTrace(unittest.TestCase):
+    def setUp(self):
+        G_swaps = nx.path_graph(4)
+        G_interactions = nx.DiGraph()
+        G_interactions.add_nodes_from(range(4))
+        G_interactions.add_edge(2, 3)
+        self.trace = RoutingTrace()
+        swapsRequired(G_swaps, G_interactions, [(0, 3), (0, 3)], trace=self.trace)
+
+    def test_countersPerEntry(self):
+        # Test that there is one row per SODDI entry with the work done to route it
+        first, second = self.trace.entries
+        self.assertEqual((0, 0, 3), (first["entry"], first["source"], first["target"]))
+        self.assertEqual(2, first["swaps"])
+        self.assertEqual(4 + 4, first["pinSearchNodesScanned"])  # Both pin lookups scan every position the first time
+        self.assertEqual(2, first["pinsConsidered"])
+        self.assertGreater(first["pendulumsScanned"], 0)
+        self.assertIsNotNone(first["mergeBranch"])
+        self.assertIsNotNone(first["evaluationCase"])
+
+        # The second time the interaction is already there
+        self.assertEqual(CONST_doneAlreadyCase, second["evaluationCase"])
+        self.assertEqual(0, second["swaps"])
+
+    def test_write(self):
+        # Test that the trace can be exported both as CSV and as JSON Lines
+        with tempfile.TemporaryDirectory() as directory:
+            csvFileName = os.path.join(directory, "trace.csv")
+            self.trace.write(csvFileName)
+            with open(csvFileName) as csvFile:
+                rows = list(csv.DictReader(csvFile))
+            self.assertEqual(list(CONST_traceFields), list(rows[0].keys()))
+            self.assertEqual("2", rows[0]["swaps"])
+
+            jsonlFileName = os.path.join(directory, "trace.jsonl")
+            self.trace.write(jsonlFileName)
+            with open(jsonlFileName) as jsonlFile:
+                self.assertEqual(self.trace.entries, [json.loads(line) for line in jsonlFile])
+
+            self.assertRaises(ValueError, self.trace.write, os.path.join(directory, "trace.txt"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,9 @@ import unittest
 import networkx as nx
 
 from server.searching.searchFunctions import findActiveNeighbours, CONST_gInteractionsHasNoActiveOrPassiveNodesMSG, \
-	bfsCheckingNeighbours, findBestPendulumForPin, findBestPinPenCombo, mergePaths
+	bfsCheckingNeighbours, findBestPendulumForPin, findBestPinPenCombo, mergePaths, findPinNodes, scorePinPendulumPairs, \
+	CONST_maxExtraSwapsPerCombo
+from server.topology.routingTopology import RoutingTopology
 
 
 class TestFindActiveNeighbours(unittest.TestCase):
@@ -185,6 +187,68 @@ class TestBFSCheckingNeighbours(unittest.TestCase):
 											   extraLevelsToConsider=3)
 		self.assertEqual(expectedOutput, obtainedOutput)
 
+	def test_sameLevelInNeighbourOrder(self):
+		# Test that the nodes on the same level come in the order G_swaps lists the neighbours, not in ascending order
+		G_swaps = nx.Graph()
+		G_swaps.add_nodes_from([0, 1, 2])
+		G_swaps.add_edges_from([(0, 2), (0, 1)])
+
+		G_interactions = nx.DiGraph()
+		G_interactions.add_nodes_from([0, 1, 2])
+		G_interactions.add_edges_from([(0, 1), (0, 2)])
+
+		expectedOutput = [(2, 1, "t", [0, 2]), (1, 1, "t", [0, 1])]
+		obtainedOutput = bfsCheckingNeighbours(G_swaps, G_interactions, 0, lookForPassive=True)
+		self.assertEqual(expectedOutput, obtainedOutput)
+
+class TestFindPinNodes(unittest.TestCase):
+	"""
+	findPinNodes gives the same pins as bfsCheckingNeighbours, but reads them from the precomputed index of a
+	RoutingTopology
+	"""
+	def test_sameAsBFS(self):
+		# Test that the same desired nodes are found as with the BFS, for every root and extra level
+		G_swaps = nx.Graph()
+		G_swaps.add_nodes_from([0, 1, 2, 3, 4, 5])
+		G_swaps.add_edges_from([(0, 1), (0, 2), (2, 3), (3, 4), (4, 5)])
+
+		G_interactions = nx.DiGraph()
+		G_interactions.add_nodes_from([0, 1, 2, 3, 4, 5])
+		G_interactions.add_edges_from([(2, 1), (3, 1), (4, 1), (5, 1)])
+
+		topology = RoutingTopology.fromGraphs(G_swaps, G_interactions)
+		for root in range(6):
+			for lookForPassive in (True, False):
+				for extraLevelsToConsider in range(4):
+					expectedOutput = bfsCheckingNeighbours(G_swaps, G_interactions, root, lookForPassive,
+														   extraLevelsToConsider)
+					obtainedOutput = findPinNodes(topology, root, lookForPassive, extraLevelsToConsider)
+					self.assertEqual(expectedOutput, obtainedOutput)
+
+	def test_sameLevelInAscendingOrder(self):
+		# Test that pins on the same level come in ascending order, whatever order G_swaps lists them in
+		G_swaps = nx.Graph()
+		G_swaps.add_nodes_from([0, 1, 2])
+		G_swaps.add_edges_from([(0, 2), (0, 1)])
+
+		G_interactions = nx.DiGraph()
+		G_interactions.add_nodes_from([0, 1, 2])
+		G_interactions.add_edges_from([(0, 1), (0, 2)])
+
+		topology = RoutingTopology.fromGraphs(G_swaps, G_interactions)
+		expectedOutput = [(1, 1, "t", [0, 1]), (2, 1, "t", [0, 2])]
+		self.assertEqual(expectedOutput, findPinNodes(topology, 0, lookForPassive=True))
+
+	def test_NoNeighboursMeetCriteria(self):
+		# Test that an exception is thrown when there are no active or passive nodes at all
+		G_swaps = nx.path_graph(3)
+		G_interactions = nx.DiGraph()
+		G_interactions.add_nodes_from([0, 1, 2])
+
+		topology = RoutingTopology.fromGraphs(G_swaps, G_interactions)
+		with self.assertRaises(Exception, msg=CONST_gInteractionsHasNoActiveOrPassiveNodesMSG):
+			findPinNodes(topology, 0, lookForPassive=True)
+
 class TestFindBestPendulumForPin(unittest.TestCase):
 	"""
 	Given a pin and a soldier, find the best pendulum for the soldier
@@ -235,6 +299,89 @@ class TestFindBestPendulumForPin(unittest.TestCase):
 		obtainedOutput = findBestPendulumForPin(G_swaps, G_interactions, soldier, pin)
 		self.assertEqual(expectedOutput, obtainedOutput)
 
+	def test_tieGoesToLowestPosition(self):
+		# Test that, with a RoutingTopology, equally close pendulums are decided by position, while the graphs alone go by
+		# the order the interaction edges were added in
+		G_swaps = nx.Graph()
+		G_swaps.add_nodes_from([0, 1, 2, 3])
+		G_swaps.add_edges_from([(0, 1), (0, 2), (0, 3)])
+
+		G_interactions = nx.DiGraph()
+		G_interactions.add_nodes_from([0, 1, 2, 3])
+		G_interactions.add_edges_from([(1, 3), (1, 2)])
+
+		pin = (1, 1, "s", [0, 1])
+		self.assertEqual((3, 1, "t", [0, 3]), findBestPendulumForPin(G_swaps, G_interactions, 0, pin))
+		topology = RoutingTopology.fromGraphs(G_swaps, G_interactions)
+		self.assertEqual((2, 1, "t", [0, 2]), findBestPendulumForPin(G_swaps, G_interactions, 0, pin, topology))
+
+class TestScorePinPendulumPairs(unittest.TestCase):
+	"""
+	scorePinPendulumPairs chooses the same pendulum for each pin as findBestPendulumForPin, for all the pins at once
+	"""
+	def test_sameAsFindBestPendulumForPin(self):
+		# Test both with few pins (scored one by one) and with many pins (scored with NumPy)
+		G_swaps = nx.grid_2d_graph(6, 6)
+		G_swaps = nx.convert_node_labels_to_integers(G_swaps, ordering="sorted")
+		G_interactions = nx.DiGraph()
+		G_interactions.add_nodes_from(range(36))
+		G_interactions.add_edges_from((u, v) if (u + v) % 3 else (v, u) for u, v in G_swaps.edges)
+		topology = RoutingTopology.fromGraphs(G_swaps, G_interactions)
+
+		iSource, iTarget = 0, 35
+		for extraLevelsToConsider in (0, 6):
+			allPinNodes = findPinNodes(topology, iSource, False, extraLevelsToConsider) + \
+						  findPinNodes(topology, iTarget, True, extraLevelsToConsider)
+			bestPendulums, bestPendulumsSwaps, baseCosts = scorePinPendulumPairs(topology, allPinNodes, iSource,
+																				 iTarget)
+			for i, pin in enumerate(allPinNodes):
+				soldier = iTarget if pin[2] == "s" else iSource
+				expectedPendulum = findBestPendulumForPin(None, G_interactions, soldier, pin, topology)
+				self.assertEqual(expectedPendulum[0], bestPendulums[i])
+				self.assertEqual(expectedPendulum[1], bestPendulumsSwaps[i])
+				self.assertEqual(pin[1] + expectedPendulum[1], baseCosts[i])
+
+class TestFindBestPinPenComboBound(unittest.TestCase):
+	"""
+	findBestPinPenCombo skips the pins whose lower bound shows they cannot be part of the best combo
+	"""
+	def test_branchAndBoundSameCombo(self):
+		# Test that skipping the pins that cannot win gives the same combo as evaluating each pin on its own
+		G_swaps = nx.grid_2d_graph(6, 6)
+		G_swaps = nx.convert_node_labels_to_integers(G_swaps, ordering="sorted")
+		G_interactions = nx.DiGraph()
+		G_interactions.add_nodes_from(range(36))
+		G_interactions.add_edges_from((u, v) if (u + v) % 3 else (v, u) for u, v in G_swaps.edges)
+		topology = RoutingTopology.fromGraphs(G_swaps, G_interactions)
+
+		iSource, iTarget = 0, 35
+		allPinNodes = findPinNodes(topology, iSource, False, 6) + findPinNodes(topology, iTarget, True, 6)
+		allPinNodes.sort(key=lambda tup: tup[1])
+
+		# The first pin with the fewest swaps is the one that has to be chosen
+		expectedOutput = min((findBestPinPenCombo(None, None, [pin], iSource, iTarget, topology) for pin in allPinNodes),
+							 key=lambda combo: sum(combo[1]))
+
+		counters = {"pinsConsidered": 0, "evaluationsSkipped": 0, "pendulumsScanned": 0, "shortestPathCalls": 0,
+					"mergeBranch": None, "evaluationCase": None}
+		obtainedOutput = findBestPinPenCombo(None, None, allPinNodes, iSource, iTarget, topology, counters=counters)
+		self.assertEqual(expectedOutput, obtainedOutput)
+		self.assertGreater(counters["evaluationsSkipped"], 0)
+
+	def test_extraSwapsWithinCombo(self):
+		# Test that the bound holds: evaluatePathsInteraction changes at most one side of a combo, by at most
+		# CONST_maxExtraSwapsPerCombo
+		G_swaps = nx.convert_node_labels_to_integers(nx.grid_2d_graph(5, 5), ordering="sorted")
+		G_interactions = nx.DiGraph()
+		G_interactions.add_nodes_from(range(25))
+		G_interactions.add_edges_from((u, v) if (u + v) % 3 else (v, u) for u, v in G_swaps.edges)
+		topology = RoutingTopology.fromGraphs(G_swaps, G_interactions)
+
+		for iSource, iTarget in ((0, 24), (3, 21), (12, 4), (7, 8)):
+			for pin in findPinNodes(topology, iSource, False, 4) + findPinNodes(topology, iTarget, True, 4):
+				extraSwaps = findBestPinPenCombo(None, None, [pin], iSource, iTarget, topology)[1][2:]
+				self.assertLessEqual(sum(abs(extra) for extra in extraSwaps), CONST_maxExtraSwapsPerCombo)
+
 class TestMergePaths(unittest.TestCase):
 	def test_OddCase1(self):
 		# This was giving an error due to empty paths being returned from slicing. Make sure it's not the case
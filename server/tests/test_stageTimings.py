@@ -0,0 +1,28 @@
+import unittest
+
+from server.instrumentation.stageTimings import StageTimings, timedStage, CONST_noTiming
+
+
+class TestStageTimings(unittest.TestCase):
+    def test_accumulatesCallsAndTime(self):
+        # Test that each stage accumulates its calls and a non-negative wall time
+        timings = StageTimings()
+        for i in range(3):
+            with timedStage(timings, "pinSearch"):
+                pass
+        with timedStage(timings, "executeSwaps"):
+            pass
+
+        report = timings.report()
+        self.assertEqual(["pinSearch", "executeSwaps"], list(report.keys()))
+        self.assertEqual(3, report["pinSearch"]["calls"])
+        self.assertEqual(1, report["executeSwaps"]["calls"])
+        self.assertGreaterEqual(report["pinSearch"]["seconds"], 0.0)
+
+    def test_disabled(self):
+        # Test that nothing is measured without a StageTimings
+        self.assertIs(CONST_noTiming, timedStage(None, "pinSearch"))
+
+
+if __name__ == '__main__':
+    unittest.main()
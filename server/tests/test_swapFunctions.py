@@ -1,9 +1,12 @@
+import random
 import unittest
 import networkx as nx
 
 from server.critics.inputCritics import checkingG_swaps, checkingG_interactions, checkingSODDI
 from server.searching.searchFunctions import bfsCheckingNeighbours, findBestPinPenCombo
-from server.swapping.swapFunctions import representSwaps, CONST_notListOfIntsOrNotBool, executeSwaps, swapsRequired
+from server.swapping.swapFunctions import representSwaps, CONST_notListOfIntsOrNotBool, executeSwaps, swapsRequired, \
+    iterSwapsRequired
+from server.swapping.routingBudget import RoutingBudget
 
 
 class TestRepresentSwaps(unittest.TestCase):
@@ -622,5 +625,92 @@ class TestSwapsRequired(unittest.TestCase):
         # First, we want to measure how many swaps are necessary with the initial configuration
         newG_swaps, newG_interactions, swaps = swapsRequired(G_swaps, G_interactions, soddi)
 
+
+class TestTieBreaks(unittest.TestCase):
+    def test_independentOfEdgeOrder(self):
+        # Test that the order in which the edges are given never changes the swap steps, ties going to the lowest
+        # position, and that the totals stay the ones routing has given since ties stopped following edge order
+        totals = []
+        for seed in range(10):
+            rng = random.Random(seed)
+            G_swaps = nx.connected_watts_strogatz_graph(12, 4, 0.3, seed=seed)
+            interactionEdges = [(u, v) for u in range(12) for v in range(12) if u != v and rng.random() < 0.1]
+            soddi = [tuple(rng.sample(range(12), 2)) for _ in range(15)]
+
+            steps = []
+            for order in (1, -1):
+                shuffledG_swaps = nx.Graph()
+                shuffledG_swaps.add_nodes_from(range(12)[::order])
+                shuffledG_swaps.add_edges_from(list(G_swaps.edges)[::order])
+                G_interactions = nx.DiGraph()
+                G_interactions.add_nodes_from(range(12)[::order])
+                G_interactions.add_edges_from(interactionEdges[::order])
+                steps.append(swapsRequired(shuffledG_swaps, G_interactions, soddi)[2])
+            self.assertEqual(steps[0], steps[1])
+            totals.append(len([step for step in steps[0] if type(step) is tuple]))
+        self.assertEqual([25, 15, 18, 15, 19, 19, 21, 15, 20, 16], totals)
+
+
+class TestIterSwapsRequired(unittest.TestCase):
+    def test_sameStepsAsSwapsRequired(self):
+        # Test that the swap steps yielded entry by entry are the ones of swapsRequired, each ending with its marker
+        G_swaps = nx.grid_2d_graph(4, 4)
+        G_swaps = nx.convert_node_labels_to_integers(G_swaps)
+        G_interactions = nx.DiGraph()
+        G_interactions.add_nodes_from(range(16))
+        G_interactions.add_edges_from([(0, 1), (10, 14), (7, 3)])
+        soddi = [(0, 15), (5, 12), (3, 9), (15, 0), (2, 3), (0, 15)]
+
+        newG_swaps, newG_interactions, allSwapSteps = swapsRequired(G_swaps, G_interactions, soddi)
+        entries = list(iterSwapsRequired(G_swaps, G_interactions, iter(soddi)))
+
+        self.assertEqual(len(soddi), len(entries))
+        self.assertEqual(allSwapSteps, [step for swapSteps in entries for step in swapSteps])
+        self.assertTrue(all(swapSteps[-1] in ("#", "Done already") for swapSteps in entries))
+
+
+class TestRoutingBudget(unittest.TestCase):
+    def setUp(self):
+        G_swaps = nx.convert_node_labels_to_integers(nx.grid_2d_graph(4, 4))
+        G_interactions = nx.DiGraph()
+        G_interactions.add_nodes_from(range(16))
+        G_interactions.add_edges_from([(0, 1), (10, 14), (7, 3)])
+        self.G_swaps, self.G_interactions = G_swaps, G_interactions
+        self.soddi = [(0, 15), (5, 12), (3, 9), (15, 0), (2, 3), (0, 15)]
+        self.entries = list(iterSwapsRequired(G_swaps, G_interactions, self.soddi))
+
+    def test_stopAndResume(self):
+        # Test that routing stops once maxEntries are routed, and that resuming routes exactly the rest of the SODDI
+        budget = RoutingBudget(maxEntries=2)
+        partial = swapsRequired(self.G_swaps, self.G_interactions, self.soddi, budget=budget)[2]
+        self.assertEqual([step for swapSteps in self.entries[:2] for step in swapSteps], partial)
+        self.assertEqual({"startIndex": 0, "complete": False, "resumeIndex": 2, "entriesRouted": 2, "entriesReused": 0,
+                          "degradedEntries": []},
+                         budget.report())
+
+        resumed = RoutingBudget(resumeFrom=budget)
+        rest = swapsRequired(self.G_swaps, self.G_interactions, self.soddi, budget=resumed)[2]
+        self.assertEqual([step for swapSteps in self.entries[2:] for step in swapSteps], rest)
+        self.assertTrue(resumed.report()["complete"])
+        self.assertFalse(resumed.routedInFull())
+
+    def test_deadline(self):
+        # Test that nothing is routed past the deadline, and that only stopped budgets can be resumed from
+        budget = RoutingBudget(seconds=0)
+        self.assertEqual([], swapsRequired(self.G_swaps, self.G_interactions, self.soddi, budget=budget)[2])
+        self.assertEqual(0, budget.resumeIndex)
+        with self.assertRaises(ValueError):
+            RoutingBudget(resumeFrom=RoutingBudget())
+
+    def test_degrade(self):
+        # Test that the entries after the budget runs out are routed the cheap way instead, every one still achieved
+        budget = RoutingBudget(maxEntries=1, degrade=True)
+        entries = list(iterSwapsRequired(self.G_swaps, self.G_interactions, self.soddi, budget=budget))
+        self.assertEqual(len(self.soddi), len(entries))
+        self.assertEqual(self.entries[0], entries[0])
+        self.assertEqual([1, 2, 3, 4, 5], budget.degradedEntries)
+        self.assertTrue(all(swapSteps[-1] in ("#", "Done already") for swapSteps in entries))
+
+
 if __name__ == '__main__':
     unittest.main()
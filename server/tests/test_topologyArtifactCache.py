@@ -0,0 +1,151 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from server.processingMain import coreExecution, prepareTopology, adaptNodeNamesToIDs
+from server.topology.routingTopology import RoutingTopology
+from server.topology.topologyArtifactCache import TopologyArtifactCache, topologyKey, \
+    CONST_loadedTopologiesKept, CONST_artifactsFormatVersion, CONST_metadataFileName
+
+
+class TestTopologyArtifactCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.inputG_swaps = [("a", "b"), ("b", "c"), ("c", "d"), ("d", "e"), ("c", "f")]
+        self.inputG_interactions = [("d", "e"), ("a", "b")]
+        self.soddi = [("a", "e"), ("c", "a"), ("e", "f")]
+
+    def test_roundTrip(self):
+        # Test that a stored topology is loaded back, memory-mapped, from another cache on the same directory
+        topology = RoutingTopology(3, [(0, 1), (1, 2)], [(0, 2)])
+        key = topologyKey(3, [(0, 1), (1, 2)], [(0, 2)])
+        TopologyArtifactCache(self.directory).store(key, topology)
+
+        cache = TopologyArtifactCache(self.directory)
+        loadedTopology = cache.load(key)
+        self.assertIsInstance(loadedTopology.distances, np.memmap)
+        for name, array in topology.arrays().items():
+            np.testing.assert_array_equal(array, loadedTopology.arrays()[name])
+        self.assertEqual(topology.shortestPath(0, 2), loadedTopology.shortestPath(0, 2))
+        self.assertEqual(1, cache.hits)
+
+    def test_storedTwice(self):
+        # Test that artifacts another worker has stored are kept as they are (they may be mapped), while those of
+        # another version are replaced, and that no temporary directory is left behind either way
+        topology = RoutingTopology(3, [(0, 1), (1, 2)], [(0, 2)])
+        key = topologyKey(3, [(0, 1), (1, 2)], [(0, 2)])
+        TopologyArtifactCache(self.directory).store(key, topology)
+        loadedTopology = TopologyArtifactCache(self.directory).load(key)
+        metadataFileName = os.path.join(self.directory, key, CONST_metadataFileName)
+        stored = os.stat(metadataFileName)
+
+        TopologyArtifactCache(self.directory).store(key, topology)
+        self.assertEqual(stored.st_ino, os.stat(metadataFileName).st_ino)
+        np.testing.assert_array_equal(topology.distances, loadedTopology.distances)
+
+        with open(metadataFileName, "w") as metadataFile:
+            json.dump({"formatVersion": CONST_artifactsFormatVersion - 1}, metadataFile)
+        self.assertIsNone(TopologyArtifactCache(self.directory).load(key))
+        TopologyArtifactCache(self.directory).store(key, topology)
+        self.assertIsNotNone(TopologyArtifactCache(self.directory).load(key))
+        self.assertEqual([key], os.listdir(self.directory))
+
+    def test_key(self):
+        # Test that unknown topologies miss, and that only the edges themselves make the key
+        self.assertIsNone(TopologyArtifactCache(self.directory).load(topologyKey(3, [(0, 1), (1, 2)], [(0, 2)])))
+        self.assertEqual(topologyKey(3, [(0, 1), (1, 2)], [(0, 2)]),
+                         topologyKey(3, [(2, 1), (1, 0), (0, 1)], [(0, 2)]))
+        self.assertNotEqual(topologyKey(3, [(0, 1), (1, 2)], [(0, 2)]), topologyKey(3, [(0, 1), (1, 2)], [(2, 0)]))
+
+    def test_routePlanCacheAfterEviction(self):
+        # Test that asking for the route plans of a topology other requests have already pushed out of memory does not
+        # fail, the plans just not being kept
+        cache = TopologyArtifactCache(self.directory)
+        topology = RoutingTopology(3, [(0, 1), (1, 2)], [(0, 2)])
+        cache.store("evicted", topology)
+        for i in range(CONST_loadedTopologiesKept):
+            cache.keepLoaded(str(i), topology)
+        self.assertNotIn("evicted", cache.loaded)
+        self.assertIsNot(cache.routePlanCache("evicted", topology), cache.routePlanCache("evicted", topology))
+        self.assertIs(cache.routePlanCache("0", topology), cache.routePlanCache("0", topology))
+
+    def test_sameSolutionWithCache(self):
+        # Test that routing with the artifacts computed by an earlier run gives the same solution
+        expected = coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi,
+                                 artifactCache=TopologyArtifactCache(self.directory))
+
+        cache = TopologyArtifactCache(self.directory)
+        self.assertEqual(expected, coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi,
+                                                 artifactCache=cache))
+        self.assertEqual(1, cache.hits)
+
+    def test_labellingKept(self):
+        # Test that the canonical labelling found for a topology is kept under the key of the topology as it was given,
+        # so that giving it again the same way, even after a restart, finds the artifacts without labelling it again,
+        # and that it is then routed on the IDs of its nodes, relabelled back from the canonical artifacts
+        cache = TopologyArtifactCache(self.directory)
+        prepared = prepareTopology(self.inputG_swaps, self.inputG_interactions, artifactCache=cache)
+        swapEdges, interactionEdges = adaptNodeNamesToIDs(prepared.ids, self.inputG_interactions, self.inputG_swaps,
+                                                          [])[:2]
+        exactKey = topologyKey(len(prepared.ids), swapEdges, interactionEdges)
+        self.assertEqual(list(range(len(prepared.ids))), prepared.positions)
+
+        cache = TopologyArtifactCache(self.directory)
+        key, positions = cache.loadLabelling(exactKey)
+        self.assertNotEqual(key, exactKey)
+        topology = prepareTopology(self.inputG_swaps, self.inputG_interactions, artifactCache=cache).topology
+        self.assertEqual(1, cache.hits)
+        self.assertIs(topology, cache.loadKept(exactKey))
+        for name, array in RoutingTopology(len(prepared.ids), swapEdges, interactionEdges).arrays().items():
+            np.testing.assert_array_equal(array, topology.arrays()[name])
+        self.assertIsNone(cache.loadLabelling(topologyKey(3, [(0, 1), (1, 2)], [(0, 2)])))
+
+    def test_relabelledCopyShared(self):
+        # Test that a relabelled copy of the topology, with its edges in another order, reuses the same artifacts, and
+        # gets the same solution translated to its own labels (the topology has no symmetries, so there is only one
+        # way of translating it)
+        cache = TopologyArtifactCache(self.directory)
+        totalSwaps, swapSteps, ids = coreExecution(self.inputG_swaps, self.inputG_interactions, self.soddi,
+                                                   artifactCache=cache)
+
+        relabel = {"a": 5, "b": 3, "c": 0, "d": 4, "e": 1, "f": 2}
+        copyG_swaps = [(relabel[v], relabel[u]) for u, v in reversed(self.inputG_swaps)]
+        copyG_interactions = [(relabel[u], relabel[v]) for u, v in reversed(self.inputG_interactions)]
+        copySODDI = [(relabel[u], relabel[v]) for u, v in self.soddi]
+        copyTotalSwaps, copySwapSteps, copyIds = coreExecution(copyG_swaps, copyG_interactions, copySODDI,
+                                                               artifactCache=cache)
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(totalSwaps, copyTotalSwaps)
+        self.assertEqual([(relabel[step[0]], relabel[step[1]]) if type(step) is tuple else step for step in swapSteps],
+                         copySwapSteps)
+
+    def test_sameSolutionsAsWithoutCache(self):
+        # Test that random topologies, and relabelled copies of them sharing their artifacts, get exactly the
+        # solutions they get without any cache
+        cache = TopologyArtifactCache(self.directory)
+        for seed in range(15):
+            rng = random.Random(seed)
+            numNodes = rng.randint(4, 14)
+            G_swaps = nx.connected_watts_strogatz_graph(numNodes, 2, 0.5, seed=seed)
+            names = ["q%d" % node for node in range(numNodes)]
+            for _ in range(2):
+                rng.shuffle(names)
+                edges = list(G_swaps.edges)
+                rng.shuffle(edges)
+                inputG_swaps = [(names[u], names[v]) for u, v in edges]
+                inputG_interactions = [(names[u], names[v]) for u, v in ((0, 1), (2, 3), (numNodes - 1, 1))]
+                soddi = [tuple(rng.sample(names, 2)) for _ in range(8)]
+                self.assertEqual(coreExecution(inputG_swaps, inputG_interactions, soddi),
+                                 coreExecution(inputG_swaps, inputG_interactions, soddi, artifactCache=cache))
+        self.assertGreater(cache.hits, 0)
+
+if __name__ == '__main__':
+    unittest.main()
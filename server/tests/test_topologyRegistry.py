@@ -0,0 +1,62 @@
+import unittest
+
+from server.processingMain import coreExecution, prepareTopology, routePreparedTopology, iterRoutePreparedTopology, \
+    iterEntrySwapSteps
+from server.topology.topologyRegistry import TopologyRegistry, topologyHandle
+
+
+class TestTopologyRegistry(unittest.TestCase):
+    def setUp(self):
+        self.inputG_swaps = [("a", "b"), ("b", "c"), ("c", "d"), ("d", "e")]
+        self.inputG_interactions = [("d", "e")]
+
+    def test_handle(self):
+        # Test that the handle only depends on the topology as given, edge order and node names included
+        self.assertEqual(topologyHandle(self.inputG_swaps, self.inputG_interactions),
+                         topologyHandle([list(edge) for edge in self.inputG_swaps], self.inputG_interactions))
+        self.assertNotEqual(topologyHandle(self.inputG_swaps, self.inputG_interactions),
+                            topologyHandle(self.inputG_swaps[::-1], self.inputG_interactions))
+
+    def test_routeManySODDIs(self):
+        # Test that routing on a prepared topology gives the same solutions as coreExecution
+        prepared = prepareTopology(self.inputG_swaps, self.inputG_interactions)
+        for soddi in ([("a", "e")], [("e", "a"), ("b", "d")], [("d", "e")]):
+            self.assertEqual(coreExecution(self.inputG_swaps, self.inputG_interactions, soddi),
+                             routePreparedTopology(prepared, soddi))
+
+    def test_streamed(self):
+        # Test that streaming the swap steps entry by entry gives the same solution, which splits back into them
+        prepared = prepareTopology(self.inputG_swaps, self.inputG_interactions)
+        soddi = [("d", "e"), ("e", "a"), ("b", "d"), ("a", "e")]
+        totalSwaps, swapSteps, ids = routePreparedTopology(prepared, soddi)
+        entries = list(iterRoutePreparedTopology(prepared, soddi))
+        self.assertEqual(len(soddi), len(entries))
+        self.assertEqual(swapSteps, [step for entrySteps in entries for step in entrySteps])
+        self.assertEqual(["Done already"], entries[0])
+        self.assertEqual(entries, list(iterEntrySwapSteps(swapSteps)))
+
+    def test_evictedUnderMemoryCap(self):
+        # Test that the least recently used topologies are evicted once the memory cap is exceeded
+        prepared = prepareTopology(self.inputG_swaps, self.inputG_interactions)
+        registry = TopologyRegistry(maxBytes=2 * prepared.nbytes())
+        registry.register("first", prepared)
+        registry.register("second", prepared)
+        self.assertIs(prepared, registry.get("first"))
+        registry.register("third", prepared)
+
+        self.assertIsNone(registry.get("second"))
+        self.assertIs(prepared, registry.get("first"))
+        self.assertIs(prepared, registry.get("third"))
+        stats = registry.stats()
+        self.assertEqual((1, 2, 2 * prepared.nbytes()), (stats["evictions"], stats["topologies"], stats["bytes"]))
+
+    def test_keepsLastRegistered(self):
+        # Test that a topology over the memory cap on its own is still kept until the next one is registered
+        prepared = prepareTopology(self.inputG_swaps, self.inputG_interactions)
+        registry = TopologyRegistry(maxBytes=1)
+        registry.register("first", prepared)
+        self.assertIs(prepared, registry.get("first"))
+
+
+if __name__ == '__main__':
+    unittest.main()
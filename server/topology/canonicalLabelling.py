@@ -0,0 +1,112 @@
+# Most node signatures that may be computed while refining colours, over every branch of the search. At a few
+# microseconds each, this keeps canonicalLabelling well under a second whatever the topology
+CONST_canonicalLabellingMaxWork = 100000
+
+
+class _RefinementBudget:
+    """
+    Node signatures left to compute before canonicalLabelling gives up
+    """
+    __slots__ = ("remaining",)
+
+    def __init__(self, maxWork):
+        self.remaining = maxWork
+
+    def spend(self, work):
+        self.remaining -= work
+        if self.remaining < 0:
+            raise _RefinementBudgetExhausted
+
+
+class _RefinementBudgetExhausted(Exception):
+    pass
+
+
+def canonicalLabelling(numNodes, swapEdges, interactionEdges, maxWork=CONST_canonicalLabellingMaxWork):
+    """
+    Canonical labelling of the pair (G_swaps, G_interactions) whose nodes are 0 to numNodes - 1: a list canonical such
+    that canonical[node] is the new label of node, and relabelling any isomorphic copy of the pair with its own
+    canonical labelling gives exactly the same edges. It is found by individualization-refinement: colours are refined
+    until they stop splitting (colour refinement, also known as 1-WL), and while some colour is shared by several
+    nodes, each one of them is tried as the first of its colour. Out of every labelling reached, the one giving the
+    smallest edge lists is kept. Every refinement round computes a signature per node, and highly symmetric topologies
+    can take exponentially many tries, while long paths and rings take as many rounds as nodes, so None is returned
+    (the caller keeping its own labelling) once more than maxWork signatures would have to be computed in total
+    """
+    swapNeighbours = [[] for _ in range(numNodes)]
+    for u, v in swapEdges:
+        if v not in swapNeighbours[u]:
+            swapNeighbours[u].append(v)
+            swapNeighbours[v].append(u)
+    outNeighbours = [[] for _ in range(numNodes)]
+    inNeighbours = [[] for _ in range(numNodes)]
+    for u, v in {(u, v) for u, v in interactionEdges}:
+        outNeighbours[u].append(v)
+        inNeighbours[v].append(u)
+    neighbours = (swapNeighbours, outNeighbours, inNeighbours)
+
+    best = None
+    budget = _RefinementBudget(maxWork)
+    try:
+        # Depth-first search over the individualizations, each entry being colours that have already been refined
+        pending = [refinedColours([0] * numNodes, neighbours, budget)]
+        while pending:
+            colours = pending.pop()
+            cell = _firstSharedColour(colours)
+            if cell is None:
+                certificate = canonicalEdges(colours, swapEdges, interactionEdges)
+                if best is None or certificate < best[0]:
+                    best = (certificate, colours)
+                continue
+            # Pushed in reverse so that nodes are tried in ascending order
+            for node in reversed([node for node in range(numNodes) if colours[node] == cell]):
+                individualized = [2 * colour for colour in colours]
+                individualized[node] -= 1
+                pending.append(refinedColours(individualized, neighbours, budget))
+    except _RefinementBudgetExhausted:
+        return None
+    return best[1]
+
+
+def refinedColours(colours, neighbours, budget=None):
+    """
+    Splits the colours of the nodes by the colours of their neighbours until no colour splits any more. New colours
+    are numbered by sorting their signatures, which start with the old colour, so colours only ever split and keep
+    their relative order, and the result does not depend on how the nodes are numbered. Each round is charged to the
+    _RefinementBudget given, if any
+    """
+    numColours = len(set(colours))
+    while True:
+        if budget is not None:
+            budget.spend(len(colours))
+        signatures = [(colours[node],) + tuple(tuple(sorted(colours[n] for n in adjacency[node]))
+                                               for adjacency in neighbours)
+                      for node in range(len(colours))]
+        numbering = {signature: i for i, signature in enumerate(sorted(set(signatures)))}
+        colours = [numbering[signature] for signature in signatures]
+        if len(numbering) == numColours:
+            return colours
+        numColours = len(numbering)
+
+
+def canonicalEdges(canonical, swapEdges, interactionEdges):
+    """
+    Swap edges (with the smallest node first) and interaction edges relabelled with canonical, each sorted and without
+    duplicates. Two topologies are the same if and only if they give the same canonicalEdges
+    """
+    relabelledSwapEdges = sorted({tuple(sorted((canonical[u], canonical[v]))) for u, v in swapEdges})
+    relabelledInteractionEdges = sorted({(canonical[u], canonical[v]) for u, v in interactionEdges})
+    return relabelledSwapEdges, relabelledInteractionEdges
+
+
+def _firstSharedColour(colours):
+    """
+    Smallest colour shared by several nodes, or None if every node has its own
+    """
+    seen = set()
+    shared = None
+    for colour in colours:
+        if colour in seen and (shared is None or colour < shared):
+            shared = colour
+        seen.add(colour)
+    return shared
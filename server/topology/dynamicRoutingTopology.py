@@ -0,0 +1,284 @@
+import bisect
+import heapq
+from collections import deque
+
+import numpy as np
+
+from topology.routingTopology import RoutingTopology, CONST_topologyNodesNotInRangeMSG, bfsDepths, \
+    narrowestSignedDtype, narrowestUnsignedDtype
+
+# Once the positions whose distances change in a row are more than this fraction of them, the whole row is worked out
+# again with a BFS, which is then cheaper than repairing it
+CONST_maxRepairedFraction = 0.25
+
+
+class DynamicRoutingTopology:
+    """
+    Mutable counterpart of a RoutingTopology, for when a topology is edited one edge at a time: swap and interaction
+    edges can be added and removed, and topology() gives the RoutingTopology of the edges so far, exactly as if it had
+    been built from them, without computing every table again after each edit:
+        1) Adding the swap edge (u, v) only changes the BFS of the targets from which u and v are at different
+           distances (for the others, neither is ever reached through the other), and removing it only changes the BFS
+           of the targets whose next hops use it. Only the rows of those targets in the distance matrix and next-hop
+           table are repaired, and only around the positions whose distances change (see _repairNextHops), breaking
+           ties the same way as RoutingTopology
+        2) The nearest-active/nearest-passive distances are the smallest distance from an active/passive position, so
+           they are only worked out again (from the rows of the distance matrix) when one of those rows changes, or
+           lowered with the row of a position that becomes active/passive
+    """
+    __slots__ = ("numNodes", "swapNeighbours", "interactionOut", "interactionIn", "distances", "nextHops",
+                 "nearestActiveDistance", "nearestPassiveDistance", "rowsRepaired")
+
+    def __init__(self, topology):
+        """
+        Starts from the edges of a RoutingTopology, whose tables are copied rather than computed again
+        """
+        self.numNodes = topology.numNodes
+        # Sorted adjacency lists, as in RoutingTopology
+        self.swapNeighbours = [topology.swapNeighbours(node) for node in range(self.numNodes)]
+        self.interactionOut = [topology.passiveNeighbours(node) for node in range(self.numNodes)]
+        self.interactionIn = [topology.activeNeighbours(node) for node in range(self.numNodes)]
+        self.distances = np.array(topology.distances)
+        self.nextHops = np.array(topology.nextHops)
+        self.nearestActiveDistance = np.array(topology.nearestActiveDistance)
+        self.nearestPassiveDistance = np.array(topology.nearestPassiveDistance)
+        # Number of rows of the tables repaired so far, to see how much work the edits took
+        self.rowsRepaired = 0
+
+    @classmethod
+    def fromEdges(cls, numNodes, swapEdges, interactionEdges):
+        return cls(RoutingTopology(numNodes, swapEdges, interactionEdges))
+
+    def addSwapEdge(self, u, v):
+        """
+        Adds the swap edge (u, v), returning whether it was not there already
+        """
+        self._checkNodes(u, v)
+        if _inSortedRow(self.swapNeighbours[u], v):
+            return False
+        affected = np.flatnonzero(self.distances[:, u] != self.distances[:, v])
+        bisect.insort(self.swapNeighbours[u], v)
+        if u != v:
+            bisect.insort(self.swapNeighbours[v], u)
+        self._repairRows(affected, self._repairRowAfterAdding, u, v)
+        return True
+
+    def removeSwapEdge(self, u, v):
+        """
+        Removes the swap edge (u, v), returning whether it was there
+        """
+        self._checkNodes(u, v)
+        if not _inSortedRow(self.swapNeighbours[u], v):
+            return False
+        affected = np.flatnonzero((self.nextHops[:, v] == u) | (self.nextHops[:, u] == v))
+        self.swapNeighbours[u].remove(v)
+        if u != v:
+            self.swapNeighbours[v].remove(u)
+        self._repairRows(affected, self._repairRowAfterRemoving, u, v)
+        return True
+
+    def addInteractionEdge(self, u, v):
+        """
+        Adds the interaction edge from u to v, returning whether it was not there already
+        """
+        self._checkNodes(u, v)
+        if _inSortedRow(self.interactionOut[u], v):
+            return False
+        bisect.insort(self.interactionOut[u], v)
+        bisect.insort(self.interactionIn[v], u)
+        # Only lowered by the positions that have just become active or passive
+        if len(self.interactionOut[u]) == 1:
+            np.minimum(self.nearestActiveDistance, self.distances[u], out=self.nearestActiveDistance)
+        if len(self.interactionIn[v]) == 1:
+            np.minimum(self.nearestPassiveDistance, self.distances[v], out=self.nearestPassiveDistance)
+        return True
+
+    def removeInteractionEdge(self, u, v):
+        """
+        Removes the interaction edge from u to v, returning whether it was there
+        """
+        self._checkNodes(u, v)
+        if not _inSortedRow(self.interactionOut[u], v):
+            return False
+        self.interactionOut[u].remove(v)
+        self.interactionIn[v].remove(u)
+        if not self.interactionOut[u]:
+            self.nearestActiveDistance = self._nearestDistances(self.interactionOut)
+        if not self.interactionIn[v]:
+            self.nearestPassiveDistance = self._nearestDistances(self.interactionIn)
+        return True
+
+    def isConnected(self):
+        """
+        Whether every position can be reached from every other one through swap edges
+        """
+        return not bool((self.distances[0] == self._unreachable()).any())
+
+    def numInteractionEdges(self):
+        return sum(len(row) for row in self.interactionOut)
+
+    def topology(self):
+        """
+        Immutable RoutingTopology of the edges so far, the same as building it from them
+        """
+        swapIndptr, swapIndices = self._compressedRows(self.swapNeighbours)
+        interactionOutIndptr, interactionOutIndices = self._compressedRows(self.interactionOut)
+        interactionInIndptr, interactionInIndices = self._compressedRows(self.interactionIn)
+        return RoutingTopology.fromArrays(self.numNodes, {
+            "swapIndptr": swapIndptr, "swapIndices": swapIndices,
+            "interactionOutIndptr": interactionOutIndptr, "interactionOutIndices": interactionOutIndices,
+            "interactionInIndptr": interactionInIndptr, "interactionInIndices": interactionInIndices,
+            "distances": self.distances.copy(), "nextHops": self.nextHops.copy(),
+            "activeMask": np.diff(interactionOutIndptr) > 0, "passiveMask": np.diff(interactionInIndptr) > 0,
+            "nearestActiveDistance": self.nearestActiveDistance.copy(),
+            "nearestPassiveDistance": self.nearestPassiveDistance.copy()})
+
+    def _repairRows(self, targets, repairRow, u, v):
+        """
+        Repairs the rows of targets with repairRow, which works on the row of each target as lists and returns the
+        positions whose entries it touched, the only ones written back
+        """
+        for target in targets.tolist():
+            distances, nextHops = self.distances[target].tolist(), self.nextHops[target].tolist()
+            touched = list(repairRow(target, distances, nextHops, u, v))
+            self.distances[target, touched] = [distances[node] for node in touched]
+            self.nextHops[target, touched] = [nextHops[node] for node in touched]
+        self.rowsRepaired += len(targets)
+        # The distance matrix is symmetric, so the nearest distances only change if the row of an active (or passive)
+        # position did
+        if any(self.interactionOut[target] for target in targets.tolist()):
+            self.nearestActiveDistance = self._nearestDistances(self.interactionOut)
+        if any(self.interactionIn[target] for target in targets.tolist()):
+            self.nearestPassiveDistance = self._nearestDistances(self.interactionIn)
+
+    def _repairRowAfterAdding(self, target, distances, nextHops, u, v):
+        """
+        Repairs the row of target after adding (u, v), u and v being at different distances from it. Only the
+        distances of the positions that get closer through the new edge go down, found with a BFS from the farther end
+        """
+        if distances[u] > distances[v]:
+            u, v = v, u
+        changed = set()
+        if distances[v] > distances[u] + 1:
+            distances[v] = distances[u] + 1
+            changed.add(v)
+            queue = deque([v])
+            while queue:
+                node = queue.popleft()
+                for neighbour in self.swapNeighbours[node]:
+                    if distances[neighbour] > distances[node] + 1:
+                        distances[neighbour] = distances[node] + 1
+                        changed.add(neighbour)
+                        queue.append(neighbour)
+        if len(changed) > CONST_maxRepairedFraction * self.numNodes:
+            return self._refillRow(target, distances, nextHops)
+        return changed | self._repairNextHops(distances, nextHops, changed | {v}, changed)
+
+    def _repairRowAfterRemoving(self, target, distances, nextHops, u, v):
+        """
+        Repairs the row of target after removing (u, v), which was in its tree of next hops. Only the positions in the
+        subtree hanging from the edge can get farther away: their distances are worked out again from the positions
+        around the subtree, with a Dijkstra restricted to it
+        """
+        if nextHops[v] != u:
+            u, v = v, u
+        subtree = {v}
+        stack = [v]
+        while stack:
+            node = stack.pop()
+            for neighbour in self.swapNeighbours[node]:
+                if nextHops[neighbour] == node and neighbour not in subtree:
+                    subtree.add(neighbour)
+                    stack.append(neighbour)
+        if len(subtree) > CONST_maxRepairedFraction * self.numNodes:
+            return self._refillRow(target, distances, nextHops)
+
+        unreachable = self._unreachable()
+        newDistances = {}
+        heap = []
+        for node in subtree:
+            outside = [distances[neighbour] for neighbour in self.swapNeighbours[node]
+                       if neighbour not in subtree and distances[neighbour] != unreachable]
+            newDistances[node] = min(outside) + 1 if outside else unreachable
+            if outside:
+                heapq.heappush(heap, (newDistances[node], node))
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance > newDistances[node]:
+                continue
+            for neighbour in self.swapNeighbours[node]:
+                if neighbour in subtree and distance + 1 < newDistances[neighbour]:
+                    newDistances[neighbour] = distance + 1
+                    heapq.heappush(heap, (distance + 1, neighbour))
+
+        changed = {node for node in subtree if newDistances[node] != distances[node]}
+        for node in subtree:
+            distances[node] = newDistances[node]
+            if newDistances[node] == unreachable:
+                nextHops[node] = -1
+        return subtree | self._repairNextHops(distances, nextHops, subtree, changed)
+
+    def _refillRow(self, target, distances, nextHops):
+        """
+        Works out the whole row of target again, with the same BFS as RoutingTopology, returning every position
+        """
+        unreachable = self._unreachable()
+        distances[:] = [d if d >= 0 else unreachable for d in bfsDepths(self.swapNeighbours, target)]
+        nextHops[:] = [_lowestCloserNeighbour(self.swapNeighbours[node], distances, node, unreachable)
+                       for node in range(self.numNodes)]
+        return range(self.numNodes)
+
+    def _repairNextHops(self, distances, nextHops, toCheck, changed):
+        """
+        Repairs the next hops of a row, as RoutingTopology would choose them, returning the positions whose next hops
+        changed. The next hop of a position is its lowest neighbour one swap closer to the target, so it can only
+        change for the positions in toCheck (whose distances or neighbours may have changed, those in changed did) and
+        for the neighbours of those in changed
+        """
+        unreachable = self._unreachable()
+        repaired = set()
+        for node in set(toCheck).union(changed, *(self.swapNeighbours[node] for node in changed)):
+            nextHop = _lowestCloserNeighbour(self.swapNeighbours[node], distances, node, unreachable)
+            if nextHop != nextHops[node]:
+                nextHops[node] = nextHop
+                repaired.add(node)
+        return repaired
+
+    def _nearestDistances(self, interactionRows):
+        """
+        Distance from every position to the nearest position with some edge in interactionRows
+        """
+        sources = [node for node in range(self.numNodes) if interactionRows[node]]
+        if not sources:
+            return np.full(self.numNodes, self._unreachable(), dtype=self.distances.dtype)
+        return self.distances[sources].min(axis=0)
+
+    def _compressedRows(self, rows):
+        indptr = np.zeros(self.numNodes + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(row) for row in rows])
+        indices = np.array([node for row in rows for node in row], dtype=narrowestSignedDtype(self.numNodes))
+        return indptr, indices
+
+    def _unreachable(self):
+        return np.iinfo(narrowestUnsignedDtype(self.numNodes)).max
+
+    def _checkNodes(self, u, v):
+        if not (0 <= u < self.numNodes and 0 <= v < self.numNodes):
+            raise ValueError(CONST_topologyNodesNotInRangeMSG)
+
+
+def _inSortedRow(row, node):
+    index = bisect.bisect_left(row, node)
+    return index < len(row) and row[index] == node
+
+
+def _lowestCloserNeighbour(neighbours, distances, node, unreachable):
+    """
+    First of the (sorted) neighbours of node one swap closer to the target of the row distances, or -1 if there is none
+    """
+    if distances[node] == unreachable:
+        return -1
+    for neighbour in neighbours:
+        if distances[neighbour] + 1 == distances[node]:
+            return neighbour
+    return -1
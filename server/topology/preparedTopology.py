@@ -0,0 +1,38 @@
+import sys
+
+
+class PreparedTopology:
+    """
+    Everything routing needs from a topology given by the user, worked out once (see prepareTopology in
+    processingMain) so that any number of SODDIs can then be routed on it without parsing, validating nor
+    preprocessing it again (see routePreparedTopology):
+        1) inputG_swaps/inputG_interactions: the edge lists as given by the user
+        2) ids: the ID of every node name (see idNodes)
+        3) positions: positions[i] is the position on which the node with ID i is routed, and namesOnPositions the
+           other way round, from positions to node names
+        4) topology: the validated RoutingTopology routing runs on
+        5) planCache: the RoutePlanCache shared by every SODDI routed on it (None to use a new one every time)
+        6) visual: nodes and edges for the visualization, only worked out the first time they are asked for
+    """
+    __slots__ = ("inputG_swaps", "inputG_interactions", "ids", "positions", "namesOnPositions", "topology",
+                 "planCache", "visual")
+
+    def __init__(self, inputG_swaps, inputG_interactions, ids, positions, topology, planCache=None):
+        self.inputG_swaps = inputG_swaps
+        self.inputG_interactions = inputG_interactions
+        self.ids = ids
+        self.positions = positions
+        self.namesOnPositions = [None] * len(ids)
+        for i, position in enumerate(positions):
+            self.namesOnPositions[position] = ids[i]
+        self.topology = topology
+        self.planCache = planCache
+        self.visual = None
+
+    def nbytes(self):
+        """
+        Estimated memory taken by the topology arrays and the lists kept, not counting the objects inside the lists
+        """
+        return (sum(array.nbytes for array in self.topology.arrays().values())
+                + sum(sys.getsizeof(values) for values in (self.inputG_swaps, self.inputG_interactions, self.ids,
+                                                          self.positions, self.namesOnPositions)))
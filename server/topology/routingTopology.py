@@ -0,0 +1,318 @@
+from collections import deque
+
+import numpy as np
+
+CONST_topologyNodesNotInRangeMSG = "Nodes of the topology must be integers from 0 to (number of nodes - 1)"
+CONST_topologyIsImmutableMSG = "RoutingTopology is immutable once built"
+# Arrays a RoutingTopology is made of, which are all it takes to rebuild it (see arrays() and fromArrays())
+CONST_topologyArrayNames = ("swapIndptr", "swapIndices", "interactionOutIndptr", "interactionOutIndices",
+                            "interactionInIndptr", "interactionInIndices", "distances", "nextHops", "activeMask",
+                            "passiveMask", "nearestActiveDistance", "nearestPassiveDistance")
+
+
+def narrowestUnsignedDtype(maxValue):
+    """
+    Returns the smallest unsigned integer dtype that can hold maxValue
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if maxValue <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def narrowestSignedDtype(maxValue):
+    """
+    Returns the smallest signed integer dtype that can hold every value in the range [-1, maxValue]
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if maxValue <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def bfsDepths(adjacency, root):
+    """
+    Depth of every node in a BFS from root (-1 for the nodes it does not reach)
+    """
+    depth = [-1] * len(adjacency)
+    depth[root] = 0
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        for neighbour in adjacency[node]:
+            if depth[neighbour] < 0:
+                depth[neighbour] = depth[node] + 1
+                queue.append(neighbour)
+    return depth
+
+
+class RoutingTopology:
+    """
+    Compact, array-backed description of a device on which the whole routing engine runs, built once from the edge
+    lists of G_swaps and G_interactions (nodes are physical positions 0 to numNodes - 1, which never change while
+    routing). It is immutable once built. It stores:
+        1) swapIndptr/swapIndices: CSR adjacency of G_swaps, each row in ascending order
+        2) interactionOutIndptr/interactionOutIndices and interactionInIndptr/interactionInIndices: CSR adjacency of
+           G_interactions, out-neighbours and in-neighbours respectively, each row in ascending order
+        3) distances[u, v]: number of swaps needed to take whatever is on u to v
+        4) nextHops[target, node]: the lowest neighbour of node that is one swap closer to target (-1 for target
+           itself), which only depends on the distances (see _nextHopsTable)
+        5) nearestActiveDistance/nearestPassiveDistance: distance from every position to its nearest active
+           (out-degree > 0) and nearest passive (in-degree > 0) position, obtained with a multi-source BFS
+    Path lookups are then a walk along nextHops (O(path length)), distance checks are a single read (O(1)) and pin
+    candidates are answered from the nearest-active/nearest-passive index.
+    networkx is only needed at the edges (validation and drawing), see fromGraphs().
+
+    Every tie while routing is broken by the lowest position: among equally short paths (nextHops), pins at the same
+    depth (pinCandidates) and equally close pendulums (passiveNeighbours and activeNeighbours). The swap steps
+    therefore do not depend on the order in which the edges are given, and a relabelled copy of the topology (see
+    relabelled) is exactly the one built from the relabelled edges. With the networkx graphs, pendulum ties followed the
+    order the interaction edges were added in, and equally short paths the order of a BFS, so the totals can differ
+    from what those gave.
+    """
+    __slots__ = ("numNodes",) + CONST_topologyArrayNames + ("_pinCandidates",)
+
+    def __init__(self, numNodes, swapEdges, interactionEdges):
+        swapEdges = self._edgeArray(numNodes, swapEdges)
+        interactionEdges = self._edgeArray(numNodes, interactionEdges)
+
+        # Swap edges go both ways
+        bothWaysSwapEdges = np.concatenate((swapEdges, swapEdges[:, ::-1]))
+        swapIndptr, swapIndices = self._compressedRows(numNodes, bothWaysSwapEdges)
+        interactionOutIndptr, interactionOutIndices = self._compressedRows(numNodes, interactionEdges)
+        interactionInIndptr, interactionInIndices = self._compressedRows(numNodes, interactionEdges[:, ::-1])
+
+        adjacency = [swapIndices[swapIndptr[node]:swapIndptr[node + 1]].tolist() for node in range(numNodes)]
+        distances = self._allPairsDistances(adjacency)
+        nextHops = self._nextHopsTable(swapIndptr, swapIndices, distances)
+
+        activeMask = np.diff(interactionOutIndptr) > 0
+        passiveMask = np.diff(interactionInIndptr) > 0
+
+        self._setArrays(numNodes, swapIndptr=swapIndptr, swapIndices=swapIndices,
+                        interactionOutIndptr=interactionOutIndptr, interactionOutIndices=interactionOutIndices,
+                        interactionInIndptr=interactionInIndptr, interactionInIndices=interactionInIndices,
+                        distances=distances, nextHops=nextHops, activeMask=activeMask, passiveMask=passiveMask,
+                        nearestActiveDistance=self._multiSourceDistances(adjacency, np.flatnonzero(activeMask)),
+                        nearestPassiveDistance=self._multiSourceDistances(adjacency, np.flatnonzero(passiveMask)))
+
+    @classmethod
+    def fromGraphs(cls, G_swaps, G_interactions=None):
+        """
+        Builds the topology from networkx graphs whose nodes are 0 to (number of nodes - 1)
+        """
+        numNodes = G_swaps.number_of_nodes()
+        if sorted(G_swaps.nodes) != list(range(numNodes)):
+            raise ValueError(CONST_topologyNodesNotInRangeMSG)
+        interactionEdges = list(G_interactions.edges) if G_interactions is not None else []
+        return cls(numNodes, list(G_swaps.edges), interactionEdges)
+
+    @classmethod
+    def fromArrays(cls, numNodes, arrays):
+        """
+        Rebuilds a topology from the dictionary given by arrays() (for example, loaded back from disk as memory-mapped
+        arrays), without computing anything again
+        """
+        topology = cls.__new__(cls)
+        topology._setArrays(numNodes, **{name: arrays[name] for name in CONST_topologyArrayNames})
+        return topology
+
+    def arrays(self):
+        """
+        Dictionary {name: array} of every array the topology is made of
+        """
+        return {name: getattr(self, name) for name in CONST_topologyArrayNames}
+
+    def relabelled(self, labels):
+        """
+        The same topology with every node i renamed labels[i] (a permutation of the nodes), exactly as if it was built
+        from the renamed edges. The distances are only moved around and the next hops worked out from them, with no
+        BFS at all
+        """
+        numNodes = self.numNodes
+        labels = np.asarray(labels, dtype=np.int64)
+        # nodes[label] is the node renamed label
+        nodes = np.empty(numNodes, dtype=np.int64)
+        nodes[labels] = np.arange(numNodes)
+        swapIndptr, swapIndices = self._compressedRows(numNodes, self._renamedEdges(self.swapIndptr, self.swapIndices,
+                                                                                    labels))
+        interactionEdges = self._renamedEdges(self.interactionOutIndptr, self.interactionOutIndices, labels)
+        interactionOutIndptr, interactionOutIndices = self._compressedRows(numNodes, interactionEdges)
+        interactionInIndptr, interactionInIndices = self._compressedRows(numNodes, interactionEdges[:, ::-1])
+        distances = np.ascontiguousarray(np.asarray(self.distances)[np.ix_(nodes, nodes)])
+        topology = RoutingTopology.__new__(RoutingTopology)
+        topology._setArrays(numNodes, swapIndptr=swapIndptr, swapIndices=swapIndices,
+                            interactionOutIndptr=interactionOutIndptr, interactionOutIndices=interactionOutIndices,
+                            interactionInIndptr=interactionInIndptr, interactionInIndices=interactionInIndices,
+                            distances=distances, nextHops=self._nextHopsTable(swapIndptr, swapIndices, distances),
+                            activeMask=np.diff(interactionOutIndptr) > 0, passiveMask=np.diff(interactionInIndptr) > 0,
+                            nearestActiveDistance=np.asarray(self.nearestActiveDistance)[nodes],
+                            nearestPassiveDistance=np.asarray(self.nearestPassiveDistance)[nodes])
+        return topology
+
+    def __reduce__(self):
+        # Pickled through fromArrays (for example, to be sent to worker processes), since attributes cannot be set
+        return RoutingTopology.fromArrays, (self.numNodes, self.arrays())
+
+    def _setArrays(self, numNodes, **arrays):
+        """
+        Freezes every array so that the topology can be safely shared between routing runs
+        """
+        object.__setattr__(self, "numNodes", numNodes)
+        for name, array in arrays.items():
+            array.flags.writeable = False
+            object.__setattr__(self, name, array)
+        object.__setattr__(self, "_pinCandidates", {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError(CONST_topologyIsImmutableMSG)
+
+    @staticmethod
+    def _edgeArray(numNodes, edges):
+        """
+        Edge list as an (E, 2) array of ints, without duplicates, checking that every node is in range
+        """
+        edgeArray = np.array([(int(u), int(v)) for u, v in edges], dtype=np.int64).reshape(-1, 2)
+        if edgeArray.size and (edgeArray.min() < 0 or edgeArray.max() >= numNodes):
+            raise ValueError(CONST_topologyNodesNotInRangeMSG)
+        return np.unique(edgeArray, axis=0)
+
+    @staticmethod
+    def _compressedRows(numNodes, edges):
+        """
+        Packs directed edges (u, v) into CSR form (indptr, indices), with the row of each u in ascending order
+        """
+        edges = np.unique(edges, axis=0)
+        indptr = np.zeros(numNodes + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(edges[:, 0], minlength=numNodes))
+        return indptr, edges[:, 1].astype(narrowestSignedDtype(numNodes))
+
+    @staticmethod
+    def _renamedEdges(indptr, indices, labels):
+        """
+        Directed edges of a CSR adjacency, as an (E, 2) array, with every node i renamed labels[i]
+        """
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        return np.stack((labels[rows], labels[np.asarray(indices, dtype=np.int64)]), axis=1)
+
+    @staticmethod
+    def _allPairsDistances(adjacency):
+        """
+        One BFS per target fills its row of the distance matrix
+        """
+        numNodes = len(adjacency)
+        unreachable = np.iinfo(narrowestUnsignedDtype(numNodes)).max
+        distances = np.full((numNodes, numNodes), unreachable, dtype=narrowestUnsignedDtype(numNodes))
+        for target in range(numNodes):
+            depth = bfsDepths(adjacency, target)
+            reached = [node for node in range(numNodes) if depth[node] >= 0]
+            distances[target, reached] = [depth[node] for node in reached]
+        return distances
+
+    @staticmethod
+    def _nextHopsTable(swapIndptr, swapIndices, distances):
+        """
+        Next-hop table worked out from the distance matrix: the next hop from a node towards a target is its lowest
+        neighbour one swap closer to the target. The k-th neighbours of every node are checked at once for every
+        target, from the last ones to the first, so the lowest one is written last
+        """
+        numNodes = len(swapIndptr) - 1
+        unreachable = np.iinfo(distances.dtype).max
+        nextHops = np.full((numNodes, numNodes), -1, dtype=narrowestSignedDtype(numNodes))
+        degrees = np.diff(swapIndptr)
+        for k in range(int(degrees.max()) - 1 if numNodes else -1, -1, -1):
+            nodes = np.flatnonzero(degrees > k)
+            neighbours = np.asarray(swapIndices[swapIndptr[nodes] + k], dtype=np.int64)
+            neighbourDistances = distances[:, neighbours]
+            closer = (neighbourDistances != unreachable) & (neighbourDistances + 1 == distances[:, nodes])
+            nextHops[:, nodes] = np.where(closer, neighbours, nextHops[:, nodes])
+        return nextHops
+
+    @staticmethod
+    def _multiSourceDistances(adjacency, sources):
+        """
+        Distance from every node to its nearest node in sources, with a single BFS started from all of them at once
+        """
+        numNodes = len(adjacency)
+        depth = [-1] * numNodes
+        queue = deque()
+        for source in sources.tolist():
+            depth[source] = 0
+            queue.append(source)
+        while queue:
+            node = queue.popleft()
+            for neighbour in adjacency[node]:
+                if depth[neighbour] < 0:
+                    depth[neighbour] = depth[node] + 1
+                    queue.append(neighbour)
+
+        unreachable = np.iinfo(narrowestUnsignedDtype(numNodes)).max
+        return np.array([d if d >= 0 else unreachable for d in depth], dtype=narrowestUnsignedDtype(numNodes))
+
+    def distance(self, source, target):
+        """
+        Number of swaps needed to take whatever is on position source to position target
+        """
+        return int(self.distances[source, target])
+
+    def shortestPath(self, source, target):
+        """
+        Shortest path of positions from source to target (both included)
+        """
+        hops = self.nextHops[target]
+        path = [source]
+        while source != target:
+            source = int(hops[source])
+            path.append(source)
+        return path
+
+    def swapNeighbours(self, node):
+        """
+        Nodes that can swap with node, in ascending order
+        """
+        return self.swapIndices[self.swapIndptr[node]:self.swapIndptr[node + 1]].tolist()
+
+    def passiveNeighbours(self, node):
+        """
+        Nodes that node aims at with an interaction edge, in ascending order
+        """
+        return self.interactionOutIndices[self.interactionOutIndptr[node]:self.interactionOutIndptr[node + 1]].tolist()
+
+    def activeNeighbours(self, node):
+        """
+        Nodes with an interaction edge aiming at node, in ascending order
+        """
+        return self.interactionInIndices[self.interactionInIndptr[node]:self.interactionInIndptr[node + 1]].tolist()
+
+    def hasInteraction(self, source, target):
+        """
+        Whether there is an interaction edge from source to target
+        """
+        row = self.interactionOutIndices[self.interactionOutIndptr[source]:self.interactionOutIndptr[source + 1]]
+        index = np.searchsorted(row, target)
+        return bool(index < len(row) and row[index] == target)
+
+    def hasPinCandidates(self, root, lookForPassive, extraLevelsToConsider=0):
+        """
+        Whether pinCandidates has already been answered for this query, so that asking again costs no scan
+        """
+        return (root, lookForPassive, extraLevelsToConsider) in self._pinCandidates
+
+    def pinCandidates(self, root, lookForPassive, extraLevelsToConsider=0):
+        """
+        Active (or passive) positions whose distance from root is at most the distance to the nearest one plus
+        extraLevelsToConsider, as a list of (position, depth) sorted by depth and then by position. The answer only
+        depends on the topology, so it is computed once per query and reused afterwards
+        """
+        key = (root, lookForPassive, extraLevelsToConsider)
+        candidates = self._pinCandidates.get(key)
+        if candidates is None:
+            mask, nearestDistance = self.activeMask, self.nearestActiveDistance
+            if lookForPassive:
+                mask, nearestDistance = self.passiveMask, self.nearestPassiveDistance
+            row = self.distances[root]
+            positions = np.flatnonzero(mask & (row <= int(nearestDistance[root]) + extraLevelsToConsider))
+            positions = positions[np.argsort(row[positions], kind="stable")]
+            candidates = list(zip(positions.tolist(), row[positions].tolist()))
+            self._pinCandidates[key] = candidates
+        return candidates
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from searching.routePlanCache import RoutePlanCache
+from topology.canonicalLabelling import canonicalEdges
+from topology.routingTopology import RoutingTopology, CONST_topologyArrayNames
+
+CONST_artifactsFormatVersion = 3
+CONST_metadataFileName = "metadata.json"
+CONST_loadedTopologiesKept = 16
+# Subdirectory where the canonical labelling of every topology seen as it was given is kept (see storeLabelling)
+CONST_labellingsDirectoryName = "labellings"
+CONST_labellingsKept = 1024
+
+
+def topologyKey(numNodes, swapEdges, interactionEdges):
+    """
+    Hash of a topology whose nodes are 0 to numNodes - 1. Only the edges themselves count, not their order nor
+    duplicates, just like for the RoutingTopology built from them
+    """
+    canonical = json.dumps([numNodes] + list(canonicalEdges(list(range(numNodes)), swapEdges, interactionEdges)),
+                           separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class TopologyArtifactCache:
+    """
+    Keeps on disk everything that only depends on the topology and not on the SODDI, so that the same device is never
+    validated nor preprocessed twice, not even after a restart or in another worker. Topologies are meant to be stored
+    canonically labelled (see canonicalLabelling), so that every relabelled copy of a device shares them, relabelled
+    back to its own labelling (see RoutingTopology.relabelled). Each topology (see topologyKey) gets its own directory
+    with:
+        1) metadata.json: the number of nodes and the fact that the topology passed validation (only topologies that
+           pass it are stored)
+        2) One .npy file per array of its RoutingTopology (distance and next-hop tables, CSR adjacencies and
+           active/passive indices), which are loaded memory-mapped, so loading them costs nothing until they are read
+    The last CONST_loadedTopologiesKept topologies loaded, or relabelled from them, are also kept in memory, along with
+    what their RoutingTopology has memoized since and a RoutePlanCache shared by every routing run on them. Finding the canonical
+    labelling of a topology is the costly part of looking it up, so the one found for every topology as it was given
+    (by its topologyKey with its own labelling) is kept too, in the labellings subdirectory and the last
+    CONST_labellingsKept in memory, and a topology given again the same way skips it. It may be shared by
+    the requests of the app, hence the lock, which is never held while reading or writing the disk.
+    """
+    __slots__ = ("directory", "loaded", "planCaches", "labellings", "hits", "misses", "lock")
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.loaded = OrderedDict()
+        self.planCaches = {}
+        self.labellings = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def load(self, key):
+        """
+        RoutingTopology with the given key, or None if it has not been stored
+        """
+        topology = self.loadKept(key)
+        if topology is not None:
+            return topology
+
+        topologyDirectory = os.path.join(self.directory, key)
+        try:
+            metadata = _storedMetadata(topologyDirectory)
+            arrays = {name: np.load(os.path.join(topologyDirectory, name + ".npy"), mmap_mode="r")
+                      for name in CONST_topologyArrayNames}
+        except (OSError, ValueError, KeyError):
+            # Not stored yet, or stored by another version (it will be overwritten)
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        topology = RoutingTopology.fromArrays(metadata["numNodes"], arrays)
+        self.keepLoaded(key, topology)
+        return topology
+
+    def loadKept(self, key):
+        """
+        RoutingTopology with the given key if it is kept in memory (see keepLoaded), or None, without reading the disk
+        """
+        with self.lock:
+            topology = self.loaded.get(key)
+            if topology is not None:
+                self.hits += 1
+                self.loaded.move_to_end(key)
+            return topology
+
+    def store(self, key, topology):
+        """
+        Stores the artifacts of a topology that has passed validation. They are written to a temporary directory that
+        is then renamed, so that other workers never see half-written artifacts. Artifacts already stored by another
+        worker are never deleted, since they may be mapped by then; only those of another version are replaced
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        temporaryDirectory = tempfile.mkdtemp(prefix=key + ".", dir=self.directory)
+        for name, array in topology.arrays().items():
+            np.save(os.path.join(temporaryDirectory, name + ".npy"), array)
+        with open(os.path.join(temporaryDirectory, CONST_metadataFileName), "w") as metadataFile:
+            json.dump({"formatVersion": CONST_artifactsFormatVersion, "numNodes": topology.numNodes,
+                       "validated": True}, metadataFile)
+
+        topologyDirectory = os.path.join(self.directory, key)
+        try:
+            os.rename(temporaryDirectory, topologyDirectory)
+        except OSError:
+            try:
+                _storedMetadata(topologyDirectory)
+            except (OSError, ValueError, KeyError):
+                # Stored by another version, so moved out of the way before being deleted, and replaced
+                staleDirectory = tempfile.mkdtemp(prefix=key + ".", dir=self.directory)
+                try:
+                    os.rename(topologyDirectory, os.path.join(staleDirectory, key))
+                    os.rename(temporaryDirectory, topologyDirectory)
+                except OSError:
+                    pass
+                shutil.rmtree(staleDirectory, ignore_errors=True)
+            # Unless they were replaced, another worker has just stored the same topology, whose artifacts are as good
+            shutil.rmtree(temporaryDirectory, ignore_errors=True)
+        self.keepLoaded(key, topology)
+
+    def loadLabelling(self, exactKey):
+        """
+        (key, positions) stored by storeLabelling for the topology whose topologyKey with its own labelling is
+        exactKey, or None if there is none
+        """
+        with self.lock:
+            labelling = self.labellings.get(exactKey)
+            if labelling is not None:
+                self.labellings.move_to_end(exactKey)
+                return labelling
+        try:
+            with open(os.path.join(self.directory, CONST_labellingsDirectoryName, exactKey + ".json"), "r") as file:
+                stored = json.load(file)
+            if stored["formatVersion"] != CONST_artifactsFormatVersion:
+                raise ValueError
+            labelling = (stored["key"], stored["positions"])
+        except (OSError, ValueError, KeyError):
+            return None
+        self._keepLabelling(exactKey, labelling)
+        return labelling
+
+    def storeLabelling(self, exactKey, key, positions):
+        """
+        Records that the topology whose topologyKey with its own labelling is exactKey is the one stored with key once
+        node i is moved to positions[i]. Written to a temporary file that is then renamed, like the artifacts
+        """
+        labellingsDirectory = os.path.join(self.directory, CONST_labellingsDirectoryName)
+        os.makedirs(labellingsDirectory, exist_ok=True)
+        descriptor, temporaryPath = tempfile.mkstemp(prefix=exactKey + ".", dir=labellingsDirectory)
+        with os.fdopen(descriptor, "w") as file:
+            json.dump({"formatVersion": CONST_artifactsFormatVersion, "key": key, "positions": list(positions)}, file)
+        os.replace(temporaryPath, os.path.join(labellingsDirectory, exactKey + ".json"))
+        self._keepLabelling(exactKey, (key, list(positions)))
+
+    def _keepLabelling(self, exactKey, labelling):
+        with self.lock:
+            self.labellings[exactKey] = labelling
+            self.labellings.move_to_end(exactKey)
+            if len(self.labellings) > CONST_labellingsKept:
+                self.labellings.popitem(last=False)
+
+    def keepLoaded(self, key, topology):
+        with self.lock:
+            self.loaded[key] = topology
+            self.loaded.move_to_end(key)
+            if len(self.loaded) > CONST_loadedTopologiesKept:
+                forgottenKey, _ = self.loaded.popitem(last=False)
+                self.planCaches.pop(forgottenKey, None)
+
+    def routePlanCache(self, key, topology):
+        """
+        RoutePlanCache shared by every routing run on topology, which was loaded or stored with the given key. If it has
+        been forgotten since (by other requests loading other topologies), a new RoutePlanCache that is not kept is
+        returned instead
+        """
+        with self.lock:
+            planCache = self.planCaches.get(key)
+            if planCache is None:
+                planCache = RoutePlanCache()
+                planCache.useWith(topology)
+                if key in self.loaded:
+                    self.planCaches[key] = planCache
+            return planCache
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            planHits = sum(planCache.hits for planCache in self.planCaches.values())
+            planMisses = sum(planCache.misses for planCache in self.planCaches.values())
+        return {"hits": self.hits, "misses": self.misses, "hitRate": self.hits / lookups if lookups else 0.0,
+                "routePlanHits": planHits, "routePlanMisses": planMisses}
+
+
+def _storedMetadata(topologyDirectory):
+    """
+    Metadata of the artifacts stored in topologyDirectory, raising OSError, ValueError or KeyError unless they are
+    there, of this version and validated
+    """
+    with open(os.path.join(topologyDirectory, CONST_metadataFileName), "r") as metadataFile:
+        metadata = json.load(metadataFile)
+    if metadata["formatVersion"] != CONST_artifactsFormatVersion or not metadata["validated"]:
+        raise ValueError
+    return metadata
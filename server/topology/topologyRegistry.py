@@ -0,0 +1,80 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+CONST_defaultTopologyRegistryMaxBytes = 256 * 1024 * 1024
+
+
+def topologyHandle(inputG_swaps, inputG_interactions):
+    """
+    Handle of a topology as given by the user, node names and edge order included (the IDs of the nodes depend on
+    both), so that registering the same topology twice gives the same handle
+    """
+    content = json.dumps([[list(edge) for edge in inputG_swaps], [list(edge) for edge in inputG_interactions]],
+                         separators=(",", ":"))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def updatedTopologyHandle(inputG_swaps, inputG_interactions, positions):
+    """
+    Handle of a topology got by editing another one (see updatePreparedTopology), whose nodes are on the positions
+    they had before, which may break routing ties another way than the same topology registered from scratch, so the
+    positions are part of it and it never collides with a topologyHandle
+    """
+    content = json.dumps(["updated", [list(edge) for edge in inputG_swaps],
+                          [list(edge) for edge in inputG_interactions], list(positions)], separators=(",", ":"))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class TopologyRegistry:
+    """
+    Topologies registered by clients, as PreparedTopology objects under their handles, so that they can be routed on
+    and visualized any number of times without sending, parsing nor validating them again. The least recently used
+    ones are evicted whenever their estimated memory (see PreparedTopology.nbytes) goes over maxBytes, the last one
+    registered always being kept. Clients asking for an evicted handle have to register the topology again. It is
+    shared by every request of the app, hence the lock
+    """
+    __slots__ = ("maxBytes", "entries", "totalBytes", "hits", "misses", "evictions", "lock")
+
+    def __init__(self, maxBytes=CONST_defaultTopologyRegistryMaxBytes):
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.totalBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def register(self, handle, prepared):
+        with self.lock:
+            if handle in self.entries:
+                self.totalBytes -= self.entries.pop(handle)[1]
+            size = prepared.nbytes()
+            self.entries[handle] = (prepared, size)
+            self.totalBytes += size
+            while self.totalBytes > self.maxBytes and len(self.entries) > 1:
+                _, (_, evictedSize) = self.entries.popitem(last=False)
+                self.totalBytes -= evictedSize
+                self.evictions += 1
+        return handle
+
+    def get(self, handle):
+        """
+        PreparedTopology registered under handle, or None if it is unknown or has been evicted
+        """
+        with self.lock:
+            entry = self.entries.get(handle)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(handle)
+            return entry[0]
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hitRate": self.hits / lookups if lookups else 0.0,
+                    "evictions": self.evictions, "topologies": len(self.entries), "bytes": self.totalBytes,
+                    "maxBytes": self.maxBytes}